@@ -9,6 +9,10 @@ const { spawn } = require('child_process');
 
 const app = express();
 const PORT = process.env.MCP_PORT || 3002;
+// Default deadline in seconds for a tool call that doesn't specify one
+const BRIDGE_TIMEOUT = Number(process.env.BRIDGE_TIMEOUT || 300);
+// Extra seconds the MCP process gets to report its own deadline error before it is killed
+const KILL_GRACE = 5;
 
 // Middleware
 app.use(cors());
@@ -24,7 +28,7 @@ app.get('/health', (req, res) => {
 
 // MCP tool execution endpoint
 app.post('/v1/tools/execute', async (req, res) => {
-  const { tool_name, arguments: toolArguments } = req.body;
+  const { tool_name, arguments: toolArguments, timeout } = req.body;
 
   if (!tool_name) {
     return res.status(400).json({ error: 'tool_name is required' });
@@ -34,11 +38,39 @@ app.post('/v1/tools/execute', async (req, res) => {
   console.log(`Arguments:`, JSON.stringify(toolArguments, null, 2));
 
   try {
-    // Spawn the MCP server process
-    const mcpProcess = spawn('python', ['connectwise_mcp.py']);
+    // Spawn the MCP server process; an X-Caller header names the caller the call is charged to,
+    // which the server then uses instead of any caller in the tool arguments
+    const caller = req.get('X-Caller');
+    const mcpProcess = spawn('python', ['connectwise_mcp.py'], {
+      env: caller ? { ...process.env, CW_CALLER: caller } : process.env
+    });
 
     let stdout = '';
     let stderr = '';
+    let finished = false;
+
+    // The MCP server enforces the deadline itself; the timer only catches a hung process.
+    // A timeout in the tool arguments can only shorten it, so both sides use the same deadline
+    const deadlines = [timeout, toolArguments && toolArguments.timeout]
+      .map(Number)
+      .filter((seconds) => seconds > 0);
+    const deadline = deadlines.length ? Math.min(...deadlines) : BRIDGE_TIMEOUT;
+    const killTimer = setTimeout(() => {
+      console.error(`Tool ${tool_name} exceeded its ${deadline}s deadline, killing MCP process`);
+      mcpProcess.kill();
+      if (!res.headersSent) {
+        res.status(504).json({ error: `Deadline of ${deadline}s exceeded` });
+      }
+    }, (deadline + KILL_GRACE) * 1000);
+
+    // Stop upstream work as soon as the caller goes away
+    res.on('close', () => {
+      if (!finished) {
+        console.log(`Client disconnected, cancelling ${tool_name}`);
+        clearTimeout(killTimer);
+        mcpProcess.kill();
+      }
+    });
 
     // Build MCP request
     const mcpRequest = {
@@ -47,7 +79,7 @@ app.post('/v1/tools/execute', async (req, res) => {
       method: 'tools/call',
       params: {
         name: tool_name,
-        arguments: toolArguments || {}
+        arguments: { ...(toolArguments || {}), timeout: deadline }
       }
     };
 
@@ -68,6 +100,11 @@ app.post('/v1/tools/execute', async (req, res) => {
 
     // Handle process completion
     mcpProcess.on('close', (code) => {
+      finished = true;
+      clearTimeout(killTimer);
+      if (res.headersSent || res.writableEnded || res.destroyed) {
+        return;
+      }
       if (code !== 0) {
         console.error(`MCP process exited with code ${code}`);
         console.error('stderr:', stderr);
@@ -136,6 +173,8 @@ app.post('/v1/tools/execute', async (req, res) => {
 
     // Handle process errors
     mcpProcess.on('error', (error) => {
+      finished = true;
+      clearTimeout(killTimer);
       console.error('Failed to start MCP process:', error);
       res.status(500).json({
         error: 'Failed to start MCP server',
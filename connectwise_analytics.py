@@ -0,0 +1,338 @@
+"""
+ConnectWise analytics store - columnar in-memory tables with daily rollups for reporting
+"""
+import time
+import asyncio
+from array import array
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterator, Callable, Optional
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Where a dataset comes from and which fields it keeps"""
+    endpoint: str
+    date_field: str
+    dimensions: dict
+    measures: dict
+
+
+DATASETS = {
+    'time': DatasetSpec(
+        endpoint='time/entries',
+        date_field='timeStart',
+        dimensions={
+            'member': 'member/identifier',
+            'company': 'company/identifier',
+            'work_type': 'workType/name',
+            'billable': 'billableOption',
+        },
+        measures={'hours': 'actualHours', 'billed_hours': 'hoursBilled'},
+    ),
+    'expenses': DatasetSpec(
+        endpoint='expense/entries',
+        date_field='date',
+        dimensions={
+            'member': 'member/identifier',
+            'company': 'company/identifier',
+            'type': 'type/name',
+            'billable': 'billableOption',
+        },
+        measures={'amount': 'amount', 'bill_amount': 'billAmount'},
+    ),
+    'invoices': DatasetSpec(
+        endpoint='finance/invoices',
+        date_field='date',
+        dimensions={
+            'company': 'company/identifier',
+            'type': 'type',
+            'status': 'status/name',
+        },
+        measures={'total': 'total', 'subtotal': 'subtotal', 'balance': 'balance'},
+    ),
+}
+
+PERIODS = ('day', 'week', 'month', 'year')
+
+# Incremental refreshes can't see deletions, so tables are rebuilt from scratch this often
+FULL_RELOAD_INTERVAL = 86400
+
+Stream = Callable[[str, dict], AsyncIterator[Any]]
+
+
+class ReportError(ValueError):
+    """Raised for a report request that names unknown datasets, columns or dates"""
+
+
+def _path(record: dict, path: str) -> Any:
+    value = record
+    for key in path.split('/'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _day(value: Any) -> Optional[int]:
+    """Convert a ConnectWise timestamp to a proleptic ordinal day (UTC)"""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.toordinal()
+
+
+def _period_start(day: int, period: str) -> int:
+    if period == 'day':
+        return day
+    d = date.fromordinal(day)
+    if period == 'week':
+        return day - d.weekday()
+    if period == 'month':
+        return d.replace(day=1).toordinal()
+    return d.replace(month=1, day=1).toordinal()
+
+
+class Dictionary:
+    """Dictionary encoding for a string column: each distinct value is stored once"""
+
+    def __init__(self):
+        self.values: list[Optional[str]] = [None]
+        self.codes: dict[Optional[str], int] = {None: 0}
+
+    def encode(self, value: Any) -> int:
+        if value is not None and not isinstance(value, str):
+            value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> set:
+        """Codes whose value matches case-insensitively"""
+        folded = value.casefold()
+        return {code for code, v in enumerate(self.values) if v is not None and v.casefold() == folded}
+
+
+class ColumnTable:
+    """One dataset held as typed arrays, one per column, plus daily rollups
+
+    Rows are indexed by record id so re-fetched records overwrite in place.
+    ``rollups`` maps (day, *dimension codes) to [row count, *measure sums] and
+    is adjusted on every upsert, so reports never have to scan the rows.
+    """
+
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        self.ids = array('q')
+        self.days = array('i')
+        self.dims = {name: array('i') for name in spec.dimensions}
+        self.measures = {name: array('d') for name in spec.measures}
+        self.dictionaries = {name: Dictionary() for name in spec.dimensions}
+        self.rows: dict[int, int] = {}
+        self.rollups: dict[tuple, array] = {}
+        self.watermark: Optional[str] = None
+        self.loaded_from: Optional[int] = None
+        self.refreshed_at = 0.0
+        self.rebuilt_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _roll(self, row: int, sign: int) -> None:
+        key = (self.days[row], *(self.dims[name][row] for name in self.dims))
+        totals = self.rollups.get(key)
+        if totals is None:
+            totals = self.rollups[key] = array('d', bytes(8 * (len(self.measures) + 1)))
+        totals[0] += sign
+        for i, column in enumerate(self.measures.values(), 1):
+            totals[i] += sign * column[row]
+        if totals[0] == 0:
+            del self.rollups[key]
+
+    def upsert(self, record: dict) -> bool:
+        """Add or replace a record; returns False if it has no id or date"""
+        record_id = record.get('id')
+        day = _day(record.get(self.spec.date_field))
+        if record_id is None or day is None:
+            return False
+
+        row = self.rows.get(record_id)
+        if row is None:
+            row = self.rows[record_id] = len(self.ids)
+            self.ids.append(record_id)
+            self.days.append(day)
+            for name, path in self.spec.dimensions.items():
+                self.dims[name].append(self.dictionaries[name].encode(_path(record, path)))
+            for name, path in self.spec.measures.items():
+                self.measures[name].append(float(_path(record, path) or 0))
+        else:
+            self._roll(row, -1)
+            self.days[row] = day
+            for name, path in self.spec.dimensions.items():
+                self.dims[name][row] = self.dictionaries[name].encode(_path(record, path))
+            for name, path in self.spec.measures.items():
+                self.measures[name][row] = float(_path(record, path) or 0)
+        self._roll(row, 1)
+
+        updated = _path(record, '_info/lastUpdated')
+        if isinstance(updated, str) and (self.watermark is None or updated > self.watermark):
+            self.watermark = updated
+        return True
+
+    def report(
+        self,
+        group_by: list[str],
+        measures: Optional[list[str]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        filters: Optional[dict] = None,
+    ) -> list[dict]:
+        """Grouped sums over the rollups, largest first measure first"""
+        measures = measures or list(self.measures)
+        dim_names = list(self.dims)
+        for column in group_by:
+            if column not in self.dims and column not in PERIODS:
+                raise ReportError(f"Unknown group_by column '{column}', expected one of {dim_names + list(PERIODS)}")
+        measure_index = []
+        for column in measures:
+            if column not in self.measures:
+                raise ReportError(f"Unknown measure '{column}', expected one of {list(self.measures)}")
+            measure_index.append(list(self.measures).index(column) + 1)
+
+        allowed = {}
+        for column, value in (filters or {}).items():
+            if column not in self.dims:
+                raise ReportError(f"Unknown filter column '{column}', expected one of {dim_names}")
+            allowed[dim_names.index(column) + 1] = self.dictionaries[column].lookup(str(value))
+
+        key_parts = []
+        for column in group_by:
+            if column in PERIODS:
+                key_parts.append((column, 0))
+            else:
+                key_parts.append((column, dim_names.index(column) + 1))
+
+        groups: dict[tuple, list] = {}
+        for key, totals in self.rollups.items():
+            day = key[0]
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            if any(key[i] not in codes for i, codes in allowed.items()):
+                continue
+            group = tuple(
+                _period_start(day, column) if index == 0 else key[index]
+                for column, index in key_parts
+            )
+            sums = groups.get(group)
+            if sums is None:
+                sums = groups[group] = [0.0] * (len(measure_index) + 1)
+            sums[0] += totals[0]
+            for i, index in enumerate(measure_index, 1):
+                sums[i] += totals[index]
+
+        rows = []
+        for group, sums in groups.items():
+            row = {}
+            for (column, index), code in zip(key_parts, group):
+                if index == 0:
+                    row[column] = date.fromordinal(code).isoformat()
+                else:
+                    row[column] = self.dictionaries[column].values[code]
+            row['count'] = int(sums[0])
+            for column, total in zip(measures, sums[1:]):
+                row[column] = round(total, 2)
+            rows.append(row)
+        rows.sort(key=lambda r: r[measures[0]] if measures else r['count'], reverse=True)
+        return rows
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the column arrays and rollups"""
+        columns = [self.ids, self.days, *self.dims.values(), *self.measures.values(), *self.rollups.values()]
+        return sum(c.itemsize * len(c) for c in columns)
+
+
+class AnalyticsStore:
+    """Columnar tables for one tenant, refreshed incrementally on demand"""
+
+    def __init__(self, days: int, refresh_interval: float, page_size: int = 1000):
+        self.days = days
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self.tables: dict[str, ColumnTable] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def table(self, dataset: str, stream: Stream) -> ColumnTable:
+        """Return an up-to-date table, loading or refreshing it through ``stream``"""
+        spec = DATASETS.get(dataset)
+        if spec is None:
+            raise ReportError(f"Unknown dataset '{dataset}', expected one of {list(DATASETS)}")
+
+        async with self._locks.setdefault(dataset, asyncio.Lock()):
+            now = time.monotonic()
+            table = self.tables.get(dataset)
+            if table is None or now - table.rebuilt_at > FULL_RELOAD_INTERVAL:
+                table = ColumnTable(spec)
+                table.loaded_from = date.today().toordinal() - self.days
+                await self._load(table, stream)
+                table.rebuilt_at = table.refreshed_at = now
+                self.tables[dataset] = table
+            elif now - table.refreshed_at > self.refresh_interval:
+                await self._load(table, stream)
+                table.refreshed_at = now
+            return table
+
+    async def _load(self, table: ColumnTable, stream: Stream) -> int:
+        """Page through records changed since the table's watermark"""
+        spec = table.spec
+        since = date.fromordinal(table.loaded_from).isoformat()
+        conditions = f"{spec.date_field} >= [{since}]"
+        if table.watermark:
+            # Inclusive so records updated within the watermark second aren't missed; upserts are idempotent
+            conditions += f" and lastUpdated >= [{table.watermark}]"
+        fields = ','.join(['id', spec.date_field, '_info/lastUpdated', *spec.dimensions.values(), *spec.measures.values()])
+
+        # Seek by id rather than page number, so deep pages of a large load cost the same as the first
+        loaded = 0
+        last_id = 0
+        while True:
+            count = 0
+            async for record in stream(spec.endpoint, {
+                "conditions": f"{conditions} and id > {last_id}",
+                "fields": fields,
+                "orderBy": "id asc",
+                "pageSize": self.page_size,
+            }):
+                loaded += table.upsert(record)
+                last_id = record.get('id', last_id)
+                count += 1
+            if count < self.page_size:
+                return loaded
+
+    def stats(self) -> dict:
+        """Row, rollup and memory counts per loaded table"""
+        return {
+            name: {
+                "rows": len(table),
+                "rollups": len(table.rollups),
+                "memory_bytes": table.memory_bytes(),
+                "watermark": table.watermark,
+            }
+            for name, table in self.tables.items()
+        }
+
+
+def parse_day(value: Optional[str], name: str) -> Optional[int]:
+    """Parse a YYYY-MM-DD report bound into an ordinal day"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value).toordinal()
+    except ValueError:
+        raise ReportError(f"Invalid {name} '{value}', expected YYYY-MM-DD") from None
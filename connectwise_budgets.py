@@ -0,0 +1,174 @@
+"""
+ConnectWise caller budgets - per-caller upstream usage over sliding windows, and quotas on it
+"""
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass, fields
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    caller TEXT NOT NULL,
+    second INTEGER NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    rejected INTEGER NOT NULL DEFAULT 0,
+    requests INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (caller, second)
+) WITHOUT ROWID;
+"""
+
+# Usage older than the longest window is deleted about this often
+_PRUNE_INTERVAL = 60
+_HOUR = 3600
+
+
+class QuotaError(ValueError):
+    """Raised for a quota definition that can't be parsed"""
+
+
+@dataclass(frozen=True)
+class Quota:
+    """Upstream usage one caller may have within the trailing windows (0 = unlimited)"""
+    requests_per_minute: int = 0
+    requests_per_hour: int = 0
+    mb_per_hour: float = 0
+
+    @classmethod
+    def from_dict(cls, data: dict, base: Optional['Quota'] = None) -> 'Quota':
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise QuotaError(f"Unknown quota fields {sorted(unknown)}, expected {sorted(known)}")
+        return cls(**{**(base.__dict__ if base else {}), **data})
+
+    @property
+    def unlimited(self) -> bool:
+        return not (self.requests_per_minute or self.requests_per_hour or self.mb_per_hour)
+
+
+@dataclass
+class CallUsage:
+    """Upstream requests and response bytes of one tool call"""
+    requests: int = 0
+    bytes: int = 0
+
+
+@dataclass(frozen=True)
+class Verdict:
+    """Why a caller is over quota and how long until it is under again"""
+    reason: str
+    retry_after: float
+
+
+class CallerBudgets:
+    """Per-caller call, request and byte counts in one-second buckets
+
+    Counts live in SQLite, either in memory or in a file shared by every
+    process using it (the bridge's per-call processes, or worker mode), so
+    quotas hold across processes. Windows slide by the second.
+    Methods are blocking; call them through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str, default: Quota, quotas: Optional[dict[str, Quota]] = None):
+        self.path = path
+        self.default = default
+        self.quotas = quotas or {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pruned = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            if self.path != ':memory:':
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def quota(self, caller: str) -> Quota:
+        return self.quotas.get(caller, self.default)
+
+    def record(self, caller: str, calls: int = 0, rejected: int = 0, requests: int = 0, size: int = 0) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO usage (caller, second, calls, rejected, requests, bytes) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (caller, second) DO UPDATE SET calls = calls + excluded.calls, "
+                "rejected = rejected + excluded.rejected, requests = requests + excluded.requests, "
+                "bytes = bytes + excluded.bytes",
+                (caller, int(now), calls, rejected, requests, size),
+            )
+            if now - self._pruned > _PRUNE_INTERVAL:
+                self._pruned = now
+                conn.execute("DELETE FROM usage WHERE second < ?", (int(now) - _HOUR,))
+
+    def _retry_after(self, conn: sqlite3.Connection, caller: str, column: str, window: int, excess: float) -> float:
+        """Seconds until enough of the window's oldest usage has aged out to drop ``excess``"""
+        now = time.time()
+        freed = 0.0
+        for second, amount in conn.execute(
+            f"SELECT second, {column} FROM usage WHERE caller = ? AND second > ? ORDER BY second",
+            (caller, int(now) - window),
+        ):
+            freed += amount
+            if freed >= excess:
+                return max(0.0, second + window - now + 1)
+        return float(window)
+
+    def check(self, caller: str) -> Optional[Verdict]:
+        """None if the caller may make another call, else why not"""
+        quota = self.quota(caller)
+        if quota.unlimited:
+            return None
+        now = int(time.time())
+        limits = [
+            ('requests', 60, quota.requests_per_minute, "upstream requests per minute"),
+            ('requests', _HOUR, quota.requests_per_hour, "upstream requests per hour"),
+            ('bytes', _HOUR, quota.mb_per_hour * 1024 * 1024, "MB per hour"),
+        ]
+        with self._lock:
+            conn = self._connect()
+            for column, window, limit, unit in limits:
+                if not limit:
+                    continue
+                used = conn.execute(
+                    f"SELECT COALESCE(SUM({column}), 0) FROM usage WHERE caller = ? AND second > ?",
+                    (caller, now - window),
+                ).fetchone()[0]
+                if used >= limit:
+                    shown = quota.mb_per_hour if column == 'bytes' else int(limit)
+                    return Verdict(
+                        f"Caller '{caller}' is over its quota of {shown:g} {unit}",
+                        self._retry_after(conn, caller, column, window, used - limit + 1),
+                    )
+        return None
+
+    def top(self, limit: int = 10, window: int = _HOUR) -> list[dict]:
+        """Callers with the most upstream requests in the trailing window"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT caller, SUM(calls), SUM(rejected), SUM(requests), SUM(bytes) FROM usage "
+                "WHERE second > ? GROUP BY caller ORDER BY SUM(requests) DESC, SUM(bytes) DESC LIMIT ?",
+                (int(time.time()) - window, limit),
+            ).fetchall()
+        return [
+            {
+                "caller": caller,
+                "calls": calls,
+                "rejected": rejected,
+                "requests": requests,
+                "bytes": size,
+                "quota": {k: v for k, v in self.quota(caller).__dict__.items() if v},
+            }
+            for caller, calls, rejected, requests, size in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
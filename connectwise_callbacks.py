@@ -0,0 +1,215 @@
+"""
+ConnectWise callback receiver - minimal HTTP endpoint for ConnectWise change notifications
+"""
+import json
+import hmac
+import socket
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger('connectwise_mcp')
+
+# Callback Type values and the API endpoint holding that record type
+CALLBACK_ENDPOINTS = {
+    'ticket': 'service/tickets',
+    'company': 'company/companies',
+    'contact': 'company/contacts',
+    'configuration': 'company/configurations',
+    'opportunity': 'sales/opportunities',
+    'project': 'project/projects',
+    'agreement': 'finance/agreements',
+    'activity': 'sales/activities',
+    'member': 'system/members',
+    'timeentry': 'time/entries',
+    'time': 'time/entries',
+    'expense': 'expense/entries',
+    'invoice': 'finance/invoices',
+}
+
+MAX_BODY = 1024 * 1024
+
+
+class CallbackError(ValueError):
+    """Raised for a callback payload that can't be mapped to a record"""
+
+
+@dataclass(frozen=True)
+class CallbackEvent:
+    """One change notification: which record changed and how"""
+    endpoint: str
+    record_id: int
+    action: str
+    entity: Optional[dict] = None
+
+
+def parse_callback(payload: Any) -> CallbackEvent:
+    """Interpret a ConnectWise callback body (Action, Type, ID and an optional Entity)"""
+    if not isinstance(payload, dict):
+        raise CallbackError("Callback body must be a JSON object")
+    fields = {k.lower(): v for k, v in payload.items()}
+
+    kind = str(fields.get('type') or '').replace(' ', '').lower()
+    endpoint = CALLBACK_ENDPOINTS.get(kind)
+    if endpoint is None:
+        raise CallbackError(f"Unsupported callback type '{fields.get('type')}'")
+
+    try:
+        record_id = int(fields.get('id'))
+    except (TypeError, ValueError):
+        raise CallbackError(f"Invalid record ID '{fields.get('id')}'") from None
+
+    # ConnectWise sends the changed record as a JSON-encoded string
+    entity = fields.get('entity')
+    if isinstance(entity, str):
+        try:
+            entity = json.loads(entity) if entity else None
+        except ValueError:
+            entity = None
+    if not isinstance(entity, dict):
+        entity = None
+
+    return CallbackEvent(endpoint, record_id, str(fields.get('action') or 'updated').lower(), entity)
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found', 405: 'Method Not Allowed',
+            408: 'Request Timeout', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+
+async def read_head(reader: asyncio.StreamReader) -> Optional[tuple[str, str, dict]]:
+    """Read an HTTP request line and headers as (method, target, headers), or None if malformed"""
+    request_line = (await asyncio.wait_for(reader.readline(), 10)).decode('latin-1').split()
+    if len(request_line) != 3:
+        return None
+    method, target, _ = request_line
+
+    headers = {}
+    while True:
+        line = (await asyncio.wait_for(reader.readline(), 10)).decode('latin-1')
+        if line in ('\r\n', '\n', ''):
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+
+async def read_body(reader: asyncio.StreamReader, headers: dict, limit: int = MAX_BODY) -> Optional[bytes]:
+    """Read a Content-Length body, or return None if it is larger than ``limit``"""
+    length = int(headers.get('content-length') or 0)
+    if length > limit:
+        return None
+    return await asyncio.wait_for(reader.readexactly(length), 10)
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, body: Any) -> None:
+    """Write a JSON response (``body`` may already be encoded) and close the connection"""
+    data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    writer.write(
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode('ascii') + data
+    )
+    try:
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+
+
+Handler = Callable[[str, CallbackEvent], Awaitable[dict]]
+
+
+class CallbackServer:
+    """asyncio HTTP server accepting POST /callback or /callback/<tenant>
+
+    Each valid callback is passed to ``handler(tenant, event)``. When a secret
+    is configured, requests must carry it as the ``key`` query parameter,
+    which goes in the callback URL registered with ConnectWise. Given
+    ``sock``, an already bound socket such as one inherited from the worker
+    supervisor, the server accepts on it instead of binding host and port.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        host: str,
+        port: int,
+        secret: str = '',
+        default_tenant: str = 'default',
+        sock: Optional[socket.socket] = None,
+    ):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.secret = secret
+        self.default_tenant = default_tenant
+        self.sock = sock
+        self.received = 0
+        self.rejected = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        if self.sock is not None:
+            self._server = await asyncio.start_server(self._handle, sock=self.sock)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info("Callback receiver listening on %s:%d", self.host, self.port)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status, body = await self._process(reader)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.LimitOverrunError, ValueError):
+            status, body = 400, {"error": "Malformed request"}
+        except asyncio.TimeoutError:
+            status, body = 408, {"error": "Timed out reading the request"}
+        except Exception as e:
+            logger.error("Callback handling failed: %s", e)
+            status, body = 500, {"error": str(e)}
+
+        if status != 200:
+            self.rejected += 1
+        await send_json(writer, status, body)
+
+    async def _process(self, reader: asyncio.StreamReader) -> tuple[int, dict]:
+        head = await read_head(reader)
+        if head is None:
+            return 400, {"error": "Malformed request line"}
+        method, target, headers = head
+
+        url = urlsplit(target)
+        parts = [p for p in url.path.split('/') if p]
+        if not parts or parts[0] != 'callback' or len(parts) > 2:
+            return 404, {"error": "Not found"}
+        if method != 'POST':
+            return 405, {"error": "Use POST"}
+        if self.secret:
+            key = parse_qs(url.query).get('key', [''])[0]
+            if not hmac.compare_digest(key.encode('utf-8'), self.secret.encode('utf-8')):
+                return 403, {"error": "Invalid callback key"}
+
+        raw = await read_body(reader, headers)
+        if raw is None:
+            return 413, {"error": "Callback body too large"}
+        try:
+            event = parse_callback(json.loads(raw or b'null'))
+        except (CallbackError, ValueError) as e:
+            return 400, {"error": str(e)}
+
+        tenant = parts[1] if len(parts) == 2 else self.default_tenant
+        logger.info("Callback: %s %s/%d (tenant: %s)", event.action, event.endpoint, event.record_id, tenant)
+        try:
+            result = await self.handler(tenant, event)
+        except CallbackError as e:
+            return 400, {"error": str(e)}
+        self.received += 1
+        return 200, result
+
+    def stats(self) -> dict:
+        return {"received": self.received, "rejected": self.rejected}
@@ -0,0 +1,850 @@
+"""
+ConnectWise conditions parser - validate and canonicalize `conditions` strings locally
+"""
+import re
+import difflib
+from dataclasses import dataclass, field as dataclass_field
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Optional, Union
+
+
+class ConditionsError(ValueError):
+    """Raised when a conditions string is malformed or references unknown fields"""
+
+    def __init__(self, message: str, position: Optional[int] = None):
+        self.position = position
+        if position is not None:
+            message = f"{message} at position {position}"
+        super().__init__(f"Invalid conditions: {message}")
+
+
+@dataclass(frozen=True)
+class DateLiteral:
+    """A bracketed date such as [2024-01-01] or [2024-01-01T08:00:00Z]"""
+    value: datetime
+    has_time: bool
+
+    def __str__(self) -> str:
+        if self.has_time:
+            # Keep fractional seconds, trimmed to milliseconds when that loses nothing
+            fraction = ''
+            if self.value.microsecond:
+                digits = f"{self.value.microsecond:06d}"
+                fraction = '.' + (digits[:3] if digits.endswith('000') else digits)
+            return f"[{self.value.strftime('%Y-%m-%dT%H:%M:%S')}{fraction}Z]"
+        return f"[{self.value.strftime('%Y-%m-%d')}]"
+
+
+Value = Union[str, int, float, bool, None, DateLiteral, tuple]
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """A single ``field operator value`` term"""
+    field: str
+    op: str
+    value: Any
+    position: int = dataclass_field(default=0, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class BoolOp:
+    """Terms joined by ``and`` or ``or``"""
+    op: str
+    terms: tuple
+
+
+Node = Union[Comparison, BoolOp]
+
+COMPARISON_OPERATORS = ('=', '!=', '<', '<=', '>', '>=')
+WORD_OPERATORS = ('like', 'contains', 'in', 'not like', 'not contains', 'not in')
+LIST_OPERATORS = ('in', 'not in')
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<op><=|>=|!=|<>|=|<|>)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<comma>,)
+  | (?P<string>")
+  | (?P<squote>')
+  | (?P<date>\[[^\]]*\]?)
+  | (?P<number>-?\d+(?:\.\d+)?(?![\w/]))
+  | (?P<word>[A-Za-z_][\w]*(?:/[A-Za-z_][\w]*)*)
+""", re.VERBOSE)
+
+_DATE_FORMATS = (
+    ('%Y-%m-%d', False),
+    ('%Y-%m-%dT%H:%M:%SZ', True),
+    ('%Y-%m-%dT%H:%M:%S.%fZ', True),
+    ('%Y-%m-%dT%H:%M:%S', True),
+    ('%Y-%m-%dT%H:%M:%S%z', True),
+    ('%Y-%m-%d %H:%M:%S', True),
+)
+
+
+def _parse_date(text: str, position: int) -> DateLiteral:
+    if not text.endswith(']'):
+        raise ConditionsError("Unterminated date literal, expected ']'", position)
+    inner = text[1:-1].strip()
+    for fmt, has_time in _DATE_FORMATS:
+        try:
+            value = datetime.strptime(inner, fmt)
+        except ValueError:
+            continue
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return DateLiteral(value, has_time)
+    raise ConditionsError(
+        f"Invalid date literal {text}, use [YYYY-MM-DD] or [YYYY-MM-DDTHH:MM:SSZ]", position
+    )
+
+
+def _tokenize(text: str) -> list[tuple[str, Any, int]]:
+    """Split a conditions string into (kind, value, position) tokens"""
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise ConditionsError(f"Unexpected character {text[pos]!r}", pos)
+        kind = match.lastgroup
+        if kind == 'space':
+            pos = match.end()
+            continue
+        if kind == 'squote':
+            raise ConditionsError("Strings must be enclosed in double quotes, not single quotes", pos)
+        if kind == 'string':
+            value, end = _read_string(text, pos)
+            tokens.append(('string', value, pos))
+            pos = end
+            continue
+        raw = match.group()
+        if kind == 'date':
+            tokens.append(('date', _parse_date(raw, pos), pos))
+        elif kind == 'number':
+            tokens.append(('number', float(raw) if '.' in raw else int(raw), pos))
+        elif kind == 'op':
+            tokens.append(('op', '!=' if raw == '<>' else raw, pos))
+        else:
+            tokens.append((kind, raw, pos))
+        pos = match.end()
+    tokens.append(('end', None, len(text)))
+    return tokens
+
+
+def _read_string(text: str, start: int) -> tuple[str, int]:
+    """Read a double-quoted string starting at ``start``, honouring backslash escapes"""
+    chars = []
+    pos = start + 1
+    while pos < len(text):
+        ch = text[pos]
+        if ch == '\\' and pos + 1 < len(text):
+            chars.append(text[pos + 1])
+            pos += 2
+            continue
+        if ch == '"':
+            return ''.join(chars), pos + 1
+        chars.append(ch)
+        pos += 1
+    raise ConditionsError("Unterminated string, missing closing '\"'", start)
+
+
+class _Parser:
+    """Recursive descent parser for the ConnectWise conditions grammar"""
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.index = 0
+
+    def peek(self) -> tuple[str, Any, int]:
+        return self.tokens[self.index]
+
+    def next(self) -> tuple[str, Any, int]:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def peek_keyword(self, *words: str) -> bool:
+        kind, value, _ = self.peek()
+        return kind == 'word' and value.lower() in words
+
+    def parse(self) -> Node:
+        if self.peek()[0] == 'end':
+            raise ConditionsError("Conditions string is empty")
+        node = self.parse_or()
+        kind, value, pos = self.peek()
+        if kind != 'end':
+            raise ConditionsError(f"Expected 'and' or 'or' before {_describe(kind, value)}", pos)
+        return node
+
+    def parse_or(self) -> Node:
+        terms = [self.parse_and()]
+        while self.peek_keyword('or'):
+            self.next()
+            terms.append(self.parse_and())
+        return terms[0] if len(terms) == 1 else BoolOp('or', tuple(terms))
+
+    def parse_and(self) -> Node:
+        terms = [self.parse_primary()]
+        while self.peek_keyword('and'):
+            self.next()
+            terms.append(self.parse_primary())
+        return terms[0] if len(terms) == 1 else BoolOp('and', tuple(terms))
+
+    def parse_primary(self) -> Node:
+        kind, _, pos = self.peek()
+        if kind == 'lparen':
+            self.next()
+            node = self.parse_or()
+            kind, value, pos = self.next()
+            if kind != 'rparen':
+                raise ConditionsError(f"Expected ')' but found {_describe(kind, value)}", pos)
+            return node
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> Comparison:
+        kind, field, start = self.next()
+        if kind != 'word' or field.lower() in ('and', 'or', 'not'):
+            raise ConditionsError(f"Expected a field name but found {_describe(kind, field)}", start)
+
+        op = self.parse_operator(field)
+        if op in LIST_OPERATORS:
+            value = self.parse_list(op)
+        else:
+            kind, value, pos = self.peek()
+            if kind == 'lparen':
+                raise ConditionsError(f"Value lists are only allowed with 'in' and 'not in', not '{op}'", pos)
+            value = self.parse_value()
+            if op in ('like', 'not like', 'contains', 'not contains') and not isinstance(value, str):
+                raise ConditionsError(f"Operator '{op}' requires a quoted string value", pos)
+        return Comparison(field, op, value, start)
+
+    def parse_operator(self, field: str) -> str:
+        kind, value, pos = self.next()
+        if kind == 'op':
+            return value
+        if kind == 'word':
+            word = value.lower()
+            if word == 'not':
+                kind, value, pos = self.next()
+                if kind == 'word' and value.lower() in ('like', 'contains', 'in'):
+                    return f"not {value.lower()}"
+                raise ConditionsError(f"Expected 'like', 'contains' or 'in' after 'not' but found {_describe(kind, value)}", pos)
+            if word in WORD_OPERATORS:
+                return word
+        raise ConditionsError(f"Expected an operator after '{field}' but found {_describe(kind, value)}", pos)
+
+    def parse_list(self, op: str) -> tuple:
+        kind, value, pos = self.next()
+        if kind != 'lparen':
+            raise ConditionsError(f"Operator '{op}' requires a parenthesized list of values", pos)
+        values = [self.parse_value()]
+        while self.peek()[0] == 'comma':
+            self.next()
+            values.append(self.parse_value())
+        kind, value, pos = self.next()
+        if kind != 'rparen':
+            raise ConditionsError(f"Expected ',' or ')' in value list but found {_describe(kind, value)}", pos)
+        return tuple(values)
+
+    def parse_value(self) -> Value:
+        kind, value, pos = self.next()
+        if kind in ('string', 'number', 'date'):
+            return value
+        if kind == 'word':
+            word = value.lower()
+            if word in ('true', 'false'):
+                return word == 'true'
+            if word == 'null':
+                return None
+            raise ConditionsError(f"String values must be enclosed in double quotes: \"{value}\"", pos)
+        raise ConditionsError(f"Expected a value but found {_describe(kind, value)}", pos)
+
+
+def _describe(kind: str, value: Any) -> str:
+    if kind == 'end':
+        return "end of conditions"
+    if kind == 'string':
+        return f'"{value}"'
+    return repr(str(value))
+
+
+def parse_conditions(text: str) -> Node:
+    """Parse a conditions string into a tree of Comparison and BoolOp nodes"""
+    return _Parser(text).parse()
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return 'null'
+    if isinstance(value, str):
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    if isinstance(value, tuple):
+        return '(' + ','.join(_format_value(v) for v in value) + ')'
+    return str(value)
+
+
+def format_conditions(node: Node) -> str:
+    """Render a parsed tree back to a canonical conditions string"""
+    if isinstance(node, Comparison):
+        return f"{node.field} {node.op} {_format_value(node.value)}"
+    parts = []
+    for term in node.terms:
+        text = format_conditions(term)
+        if isinstance(term, BoolOp) and term.op != node.op:
+            text = f"({text})"
+        parts.append(text)
+    return f" {node.op} ".join(parts)
+
+
+def _flatten(node: Node) -> Node:
+    """Merge nested and/or groups of the same kind, e.g. (a and b) and c"""
+    if isinstance(node, Comparison):
+        return node
+    terms = []
+    for term in node.terms:
+        term = _flatten(term)
+        if isinstance(term, BoolOp) and term.op == node.op:
+            terms.extend(term.terms)
+        else:
+            terms.append(term)
+    return BoolOp(node.op, tuple(terms))
+
+
+# Fields that every ConnectWise record can be filtered on
+COMMON_FIELDS = {'id', '_info', 'customFields', 'dateEntered', 'enteredBy', 'lastUpdated', 'updatedBy'}
+
+# Top-level filterable fields per endpoint; nested paths are checked on their first segment
+ENTITY_FIELDS = {
+    'company/companies': {
+        'identifier', 'name', 'status', 'type', 'types', 'addressLine1', 'addressLine2', 'city',
+        'state', 'zip', 'country', 'phoneNumber', 'faxNumber', 'website', 'territory', 'market',
+        'accountNumber', 'defaultContact', 'dateAcquired', 'sicCode', 'parentCompany',
+        'annualRevenue', 'numberOfEmployees', 'yearEstablished', 'revenueYear', 'ownershipType',
+        'timeZoneSetup', 'leadSource', 'leadFlag', 'unsubscribeFlag', 'calendar',
+        'userDefinedField1', 'userDefinedField2', 'userDefinedField3', 'userDefinedField4',
+        'userDefinedField5', 'userDefinedField6', 'userDefinedField7', 'userDefinedField8',
+        'userDefinedField9', 'userDefinedField10', 'vendorIdentifier', 'taxIdentifier', 'taxCode',
+        'billingTerms', 'invoiceTemplate', 'pricingSchedule', 'companyEntityType', 'billToCompany',
+        'billingSite', 'billingContact', 'invoiceDeliveryMethod', 'invoiceToEmailAddress',
+        'invoiceCCEmailAddress', 'deletedFlag', 'dateDeleted', 'deletedBy', 'mobileGuid',
+        'facebookUrl', 'twitterUrl', 'linkedInUrl', 'currency', 'territoryManager',
+        'resellerIdentifier', 'isVendorFlag', 'site', 'integratorTags',
+    },
+    'company/contacts': {
+        'firstName', 'lastName', 'company', 'site', 'addressLine1', 'addressLine2', 'city', 'state',
+        'zip', 'country', 'relationship', 'relationshipOverride', 'department', 'inactiveFlag',
+        'defaultMergeContactId', 'securityIdentifier', 'managerContact', 'assistantContact',
+        'title', 'school', 'nickName', 'marriedFlag', 'childrenFlag', 'children', 'significantOther',
+        'portalPassword', 'portalSecurityLevel', 'disablePortalLoginFlag', 'unsubscribeFlag',
+        'gender', 'birthDay', 'anniversary', 'presence', 'mobileGuid', 'facebookUrl', 'twitterUrl',
+        'linkedInUrl', 'defaultPhoneType', 'defaultPhoneNbr', 'defaultPhoneExtension',
+        'defaultBillingFlag', 'defaultFlag', 'userDefinedField1', 'userDefinedField2',
+        'userDefinedField3', 'userDefinedField4', 'userDefinedField5', 'userDefinedField6',
+        'userDefinedField7', 'userDefinedField8', 'userDefinedField9', 'userDefinedField10',
+        'companyLocation', 'communicationItems', 'types', 'integratorTags', 'ignoreDuplicates',
+        'typeIds',
+    },
+    'service/tickets': {
+        'summary', 'recordType', 'board', 'status', 'workRole', 'workType', 'company', 'site',
+        'siteName', 'addressLine1', 'addressLine2', 'city', 'stateIdentifier', 'zip', 'country',
+        'contact', 'contactName', 'contactPhoneNumber', 'contactPhoneExtension',
+        'contactEmailAddress', 'type', 'subType', 'item', 'team', 'owner', 'priority',
+        'serviceLocation', 'source', 'requiredDate', 'budgetHours', 'opportunity', 'agreement',
+        'agreementType', 'severity', 'impact', 'externalXRef', 'poNumber',
+        'knowledgeBaseCategoryId', 'knowledgeBaseSubCategoryId', 'allowAllClientsPortalView',
+        'customerUpdatedFlag', 'automaticEmailContactFlag', 'automaticEmailResourceFlag',
+        'automaticEmailCcFlag', 'automaticEmailCc', 'initialDescription', 'initialInternalAnalysis',
+        'initialResolution', 'initialDescriptionFrom', 'contactEmailLookup', 'processNotifications',
+        'skipCallback', 'closedDate', 'closedBy', 'closedFlag', 'actualHours', 'approved',
+        'estimatedExpenseCost', 'estimatedExpenseRevenue', 'estimatedProductCost',
+        'estimatedProductRevenue', 'estimatedTimeCost', 'estimatedTimeRevenue', 'billingMethod',
+        'billingAmount', 'hourlyRate', 'subBillingMethod', 'subBillingAmount', 'subDateAccepted',
+        'dateResolved', 'dateResplan', 'dateResponded', 'resolveMinutes', 'resPlanMinutes',
+        'respondMinutes', 'isInSla', 'knowledgeBaseLinkId', 'resources', 'parentTicket', 'parentTicketId',
+        'hasChildTicket', 'hasMergedChildTicketFlag', 'knowledgeBaseLinkType', 'billTime',
+        'billExpenses', 'billProducts', 'predecessorType', 'predecessorId', 'predecessorClosedFlag',
+        'lagDays', 'lagNonworkingDaysFlag', 'estimatedStartDate', 'duration', 'location',
+        'department', 'mobileGuid', 'sla', 'slaStatus', 'requestForChangeFlag', 'currency',
+        'mergedParentTicket', 'integratorTags', 'escalationStartDateUTC', 'escalationLevel',
+        'minutesBeforeWaiting', 'respondedSkippedMinutes', 'resplanSkippedMinutes',
+        'respondedHours', 'respondedBy', 'resplanHours', 'resplanBy', 'resolutionHours',
+        'resolvedBy', 'minutesWaiting',
+    },
+    'sales/opportunities': {
+        'name', 'expectedCloseDate', 'type', 'stage', 'status', 'priority', 'notes', 'probability',
+        'source', 'rating', 'campaign', 'primarySalesRep', 'secondarySalesRep', 'locationId',
+        'businessUnitId', 'company', 'contact', 'site', 'customerPO', 'pipelineChangeDate',
+        'dateBecameLead', 'closedDate', 'closedBy', 'totalSalesTax', 'shipToCompany',
+        'shipToContact', 'shipToSite', 'billToCompany', 'billToContact', 'billToSite',
+        'billingTerms', 'taxCode', 'currency', 'companyLocation', 'technicalContact',
+    },
+    'finance/agreements': {
+        'name', 'type', 'company', 'contact', 'site', 'subContractCompany', 'subContractContact',
+        'parentAgreement', 'customerPO', 'location', 'department', 'restrictLocationFlag',
+        'restrictDepartmentFlag', 'startDate', 'endDate', 'noEndingDateFlag', 'opportunity',
+        'cancelledFlag', 'dateCancelled', 'reasonCancelled', 'sla', 'workOrder',
+        'internalNotes', 'applicationUnits', 'applicationLimit', 'applicationCycle',
+        'applicationUnlimitedFlag', 'oneTimeFlag', 'coverAgreementTime', 'coverAgreementProduct',
+        'coverAgreementExpense', 'coverSalesTax', 'carryOverUnused', 'allowOverruns',
+        'expiredDays', 'limit', 'expireWhenZero', 'chargeToFirm', 'employeeCompRate',
+        'employeeCompNotExceed', 'compHourlyRate', 'compLimitAmount', 'billingCycle',
+        'billOneTimeFlag', 'billingTerms', 'invoicingCycle', 'billToCompany', 'billToContact',
+        'billToSite', 'billAmount', 'taxable', 'prorateFirstBill', 'billStartDate', 'taxCode',
+        'restrictDownPayment', 'prorateFlag', 'invoiceProratedAdditionsFlag', 'invoiceDescription',
+        'topComment', 'bottomComment', 'workRole', 'workType', 'projectType', 'invoiceTemplate',
+        'billTime', 'billExpenses', 'billProducts', 'billableTimeInvoice',
+        'billableExpenseInvoice', 'billableProductInvoice', 'currency', 'periodType',
+        'autoInvoiceFlag', 'nextInvoiceDate', 'companyLocation', 'agreementStatus',
+    },
+    'time/entries': {
+        'company', 'companyType', 'chargeToId', 'chargeToType', 'member', 'locationId',
+        'businessUnitId', 'businessGroupDesc', 'location', 'department', 'workType', 'workRole',
+        'agreement', 'agreementType', 'activity', 'opportunityRecid', 'projectActivity',
+        'territory', 'timeStart', 'timeEnd', 'hoursDeduct', 'actualHours', 'billableOption',
+        'notes', 'internalNotes', 'addToDetailDescriptionFlag', 'addToInternalAnalysisFlag',
+        'addToResolutionFlag', 'emailResourceFlag', 'emailContactFlag', 'emailCcFlag', 'emailCc',
+        'hoursBilled', 'invoiceHours', 'hourlyCost', 'enteredBy', 'dateEntered', 'invoice',
+        'mobileGuid', 'hourlyRate', 'overageRate', 'agreementHours', 'agreementAmount',
+        'agreementAdjustment', 'adjustment', 'invoiceReady', 'timeSheet', 'status', 'ticket',
+        'project', 'phase', 'ticketBoard', 'ticketStatus', 'ticketType', 'ticketSubType',
+    },
+    'project/projects': {
+        'actualEnd', 'actualHours', 'actualStart', 'agreement', 'billExpenses',
+        'billingAmount', 'billingAttention', 'billingMethod', 'billingRateType', 'billingTerms',
+        'billProducts', 'billProjectAfterClosedFlag', 'billTime', 'billToCompany', 'billToContact',
+        'billToSite', 'billUnapprovedTimeAndExpense', 'board', 'budgetAnalysis', 'budgetFlag',
+        'budgetHours', 'company', 'contact', 'customerPO', 'description', 'currency',
+        'downpayment', 'estimatedEnd', 'percentComplete', 'estimatedExpenseRevenue',
+        'estimatedHours', 'estimatedProductRevenue', 'estimatedStart', 'estimatedTimeRevenue',
+        'expenseApprover', 'includeDependenciesFlag', 'includeEstimatesFlag', 'location',
+        'department', 'manager', 'name', 'opportunity', 'projectTemplateId', 'restrictDownPaymentFlag',
+        'scheduledEnd', 'scheduledHours', 'scheduledStart', 'shipToCompany', 'shipToContact',
+        'shipToSite', 'site', 'status', 'closedFlag', 'timeApprover', 'type', 'doNotDisplayInPortalFlag',
+        'billingStartDate', 'poAmount', 'estimatedTimeCost', 'estimatedExpenseCost',
+        'estimatedProductCost', 'taxCode', 'companyLocation',
+    },
+    'sales/activities': {
+        'name', 'type', 'company', 'contact', 'phoneNumber', 'email', 'status', 'opportunity',
+        'ticket', 'agreement', 'campaign', 'notes', 'dateStart', 'dateEnd', 'assignedBy',
+        'assignTo', 'scheduleStatus', 'reminder', 'where', 'notifyFlag', 'mobileGuid',
+        'currency',
+    },
+    'system/members': {
+        'identifier', 'password', 'disableOnlineFlag', 'licenseClass', 'notes', 'employeeIdentifer',
+        'vendorNumber', 'enableMobileFlag', 'type', 'firstName', 'middleInitial', 'lastName',
+        'hourlyCost', 'hourlyRate', 'title', 'inactiveDate', 'inactiveFlag', 'timeZone',
+        'defaultEmail', 'primaryEmail', 'officeEmail', 'mobileEmail', 'homeEmail', 'defaultPhone',
+        'officePhone', 'officeExtension', 'mobilePhone', 'mobileExtension', 'homePhone',
+        'homeExtension', 'securityRole', 'adminFlag', 'structureLevel', 'securityLocation',
+        'defaultLocation', 'defaultDepartment', 'reportsTo', 'restrictLocationFlag',
+        'restrictDepartmentFlag', 'workRole', 'workType', 'timeApprover', 'expenseApprover',
+        'billableForecast', 'dailyCapacity', 'hireDate', 'serviceDefaultBoard',
+        'restrictServiceDefaultFlag', 'excludedServiceBoardIds', 'projectDefaultBoard',
+        'restrictProjectDefaultFlag', 'excludedProjectBoardIds', 'scheduleDefaultDepartment',
+        'scheduleDefaultLocation', 'salesDefaultLocation', 'calendar', 'country',
+        'minimumHours', 'partnerPortalFlag', 'stsUserAdminUrl', 'toastNotificationFlag',
+        'memberPersonas', 'companyActivityTabFormat', 'invoiceTimeTabFormat',
+        'invoiceScreenDefaultTabFormat', 'invoicingDisplayOptions', 'agreementInvoicingDisplayOptions',
+        'office365', 'mapiName', 'calendarSyncIntegrationFlag', 'enableLdapAuthenticationFlag',
+        'ldapConfiguration', 'ldapUserName', 'directionalSync', 'ssoSettings', 'signature',
+        'phoneSource', 'phoneIntegrationType', 'useBrowserLanguageFlag', 'warehouse',
+        'warehouseBin', 'autoStartStopwatch', 'autoPopupQuickNotesWithStopwatch',
+        'globalSearchDefaultTicketFilter', 'globalSearchDefaultSort', 'photo',
+        'requireExpenseEntryFlag', 'requireStartAndEndTimeOnTimeEntryFlag',
+        'requireTimeSheetEntryFlag', 'allowExpensesEnteredAgainstCompaniesFlag',
+        'allowInCellEntryOnTimeSheet', 'enterTimeAgainstCompanyFlag', 'timeReminderEmailFlag',
+        'timebasedOneTimePasswordActivated', 'daysTolerance', 'clientId',
+    },
+    'company/configurations': {
+        'name', 'type', 'status', 'company', 'contact', 'site', 'locationId', 'location',
+        'businessUnitId', 'department', 'deviceIdentifier', 'serialNumber', 'modelNumber',
+        'tagNumber', 'purchaseDate', 'installationDate', 'installedBy', 'warrantyExpirationDate',
+        'vendorNotes', 'notes', 'macAddress', 'lastLoginName', 'billFlag', 'backupSuccesses',
+        'backupIncomplete', 'backupFailed', 'backupRestores', 'lastBackupDate', 'backupServerName',
+        'backupBillableSpaceGb', 'backupProtectedDeviceList', 'backupYear', 'backupMonth',
+        'ipAddress', 'defaultGateway', 'osType', 'osInfo', 'cpuSpeed', 'ram', 'localHardDrives',
+        'parentConfigurationId', 'vendor', 'manufacturer', 'questions', 'activeFlag',
+        'managementLink', 'remoteLink', 'sla', 'mobileGuid', 'companyLocationId',
+        'showRemoteFlag', 'showAutomateFlag', 'needsRenewalFlag', 'manufacturerPartNumber',
+    },
+    'company/configurations/types': {'name', 'inactiveFlag', 'systemFlag', 'questions'},
+    'company/companies/{id}/sites': {
+        'name', 'addressLine1', 'addressLine2', 'city', 'stateReference', 'zip', 'country',
+        'addressFormat', 'phoneNumber', 'phoneNumberExt', 'faxNumber', 'taxCode', 'entityType',
+        'expenseReimbursement', 'primaryAddressFlag', 'defaultShippingFlag', 'defaultBillingFlag',
+        'defaultMailingFlag', 'inactiveFlag', 'mobileGuid', 'calendar', 'timeZone', 'company',
+    },
+    'company/companies/types': {'name', 'defaultFlag', 'vendorFlag', 'serviceAlertFlag', 'serviceAlertMessage'},
+    'company/companies/statuses': {
+        'name', 'defaultFlag', 'inactiveFlag', 'notifyFlag', 'disallowSavingFlag',
+        'notificationMessage', 'customNoteFlag', 'cancelOpenTracksFlag', 'track',
+    },
+    'service/priorities': {'name', 'color', 'sortOrder', 'defaultFlag', 'imageLink', 'urgencySortOrder', 'level'},
+    'service/sources': {'name', 'defaultFlag', 'enteredBy', 'dateEntered'},
+    'company/contacts/types': {'description', 'defaultFlag'},
+    'finance/invoices': {
+        'invoiceNumber', 'type', 'status', 'company', 'billToCompany', 'shipToCompany',
+        'accountNumber', 'applyToType', 'applyToId', 'attention', 'shipToAttention', 'billingSite',
+        'billingSiteAddressLine1', 'billingSiteAddressLine2', 'billingSiteCity',
+        'billingSiteState', 'billingSiteZip', 'billingSiteCountry', 'shippingSite',
+        'shippingSiteAddressLine1', 'shippingSiteAddressLine2', 'shippingSiteCity',
+        'shippingSiteState', 'shippingSiteZip', 'shippingSiteCountry', 'billingTerms',
+        'reference', 'customerPO', 'templateSetupId', 'invoiceTemplate', 'emailTemplateId',
+        'addToBatchEmailList', 'date', 'restrictDownpaymentFlag', 'locationId', 'departmentId',
+        'territoryId', 'topComment', 'bottomComment', 'taxableFlag', 'taxCode',
+        'internalNotes', 'downpaymentPreviouslyTaxedFlag', 'serviceTotal', 'overrideDownPaymentAmountFlag',
+        'currency', 'dueDate', 'expenseTotal', 'productTotal', 'previousProgressApplied',
+        'serviceAdjustmentAmount', 'agreementAmount', 'downpaymentApplied', 'subtotal', 'total',
+        'remainingDownpayment', 'salesTax', 'adjustmentReason', 'adjustedBy', 'payments',
+        'credits', 'balance', 'specialInvoiceFlag', 'billingSetupReference', 'ticket', 'project',
+        'phase', 'salesOrder', 'agreement', 'glBatch', 'unbatchedBatch', 'location', 'department',
+        'territory', 'companyLocation',
+    },
+    'expense/entries': {
+        'expenseReport', 'company', 'chargeToId', 'chargeToType', 'type', 'member', 'paymentMethod',
+        'classification', 'amount', 'billableOption', 'date', 'locationId', 'businessUnitId',
+        'notes', 'agreement', 'invoiceAmount', 'mobileGuid', 'taxes', 'invoice', 'currency',
+        'status', 'billAmount', 'agreementAmount', 'odometerStart', 'odometerEnd', 'ticket',
+        'project', 'phase',
+    },
+    'finance/billingCycles': {'identifier', 'name', 'defaultFlag', 'inactiveFlag', 'cycleType'},
+    'finance/agreements/{id}/additions': {
+        'product', 'quantity', 'lessIncluded', 'unitPrice', 'unitCost', 'billCustomer',
+        'effectiveDate', 'cancelledDate', 'taxableFlag', 'serialNumber', 'invoiceDescription',
+        'purchaseItemFlag', 'specialOrderFlag', 'agreementId', 'description', 'billedQuantity',
+        'uom', 'extPrice', 'extCost', 'sequenceNumber', 'margin', 'prorateCost', 'proratePrice',
+        'extendedProrateCost', 'extendedProratePrice', 'prorateCurrentPeriodFlag',
+        'opportunity', 'agreementStatus', 'invoiceGrouping',
+    },
+    'service/boards': {
+        'name', 'location', 'department', 'inactiveFlag', 'signOffTemplate',
+        'sendToContactFlag', 'contactTemplate', 'sendToResourceFlag', 'resourceTemplate',
+        'projectFlag', 'showDependenciesFlag', 'showEstimatesFlag', 'boardIcon',
+        'billTicketsAfterClosedFlag', 'billTicketSeparatelyFlag', 'billUnapprovedTimeExpenseFlag',
+        'overrideBillingSetupFlag', 'dispatchMember', 'serviceManagerMember', 'dutyManagerMember',
+        'oncallMember', 'workRole', 'workType', 'billTime', 'billExpense', 'billProduct',
+        'autoCloseStatus', 'autoAssignNewTicketsFlag', 'autoAssignNewECTicketsFlag',
+        'autoAssignNewPortalTicketsFlag', 'discussionsLockedFlag', 'timeEntryLockedFlag',
+        'notifyEmailFrom', 'notifyEmailFromName', 'closedLoopDiscussionsFlag',
+        'closedLoopResolutionFlag', 'closedLoopInternalAnalysisFlag', 'timeEntryDiscussionFlag',
+        'timeEntryResolutionFlag', 'timeEntryInternalAnalysisFlag', 'problemSort',
+        'resolutionSort', 'internalAnalysisSort', 'emailConnectorAllowReopenClosedFlag',
+        'emailConnectorReopenStatus', 'emailConnectorReopenResourcesFlag',
+        'emailConnectorNewTicketNoMatchFlag', 'emailConnectorNeverReopenByDaysFlag',
+        'emailConnectorReopenDaysLimit', 'emailConnectorNeverReopenByDaysClosedFlag',
+        'emailConnectorReopenDaysClosedLimit', 'useMemberDisplayNameFlag',
+        'sendToCCFlag', 'autoAssignTicketOwnerFlag', 'autoAssignLimitFlag', 'autoAssignLimitAmount',
+        'closedLoopAllFlag', 'percentageCalculation', 'allSort', 'markFirstNoteIssueFlag',
+        'restrictBoardByDefaultFlag', 'sendToBundledFlag',
+    },
+    'service/boards/{id}/statuses': {
+        'name', 'board', 'sortOrder', 'displayOnBoard', 'inactive', 'closedStatus', 'timeEntryNotAllowed',
+        'roundRobinCatchall', 'defaultFlag', 'escalationStatus', 'customerPortalDescription',
+        'customerPortalFlag', 'emailTemplate', 'statusIndicator', 'customStatusIndicatorName',
+        'saveTimeAsNote', 'workflowApplied',
+    },
+    'service/tickets/{id}/tasks': {
+        'ticketId', 'notes', 'closedFlag', 'priority', 'schedule', 'code', 'resolution',
+        'childScheduleAction', 'childTicketId',
+    },
+    'service/tickets/{id}/scheduleentries': {
+        'objectId', 'name', 'member', 'where', 'dateStart', 'dateEnd', 'reminder', 'status',
+        'type', 'span', 'doneFlag', 'acknowledgedFlag', 'ownerFlag', 'meetingFlag',
+        'allowScheduleConflictsFlag', 'addMemberToProjectTeamFlag', 'projectRoleId',
+        'mobileGuid', 'acknowledgedDate', 'closeDate', 'hours',
+    },
+}
+
+_ID_SEGMENT_RE = re.compile(r'/\d+(?=/|$)')
+
+
+def entity_for_endpoint(endpoint: str) -> str:
+    """Map a concrete endpoint such as service/boards/7/statuses to its template"""
+    return _ID_SEGMENT_RE.sub('/{id}', endpoint.strip('/'))
+
+
+def _validate_fields(node: Node, entity: str, fields: set) -> Node:
+    """Check field names against an entity's field list and normalize their casing"""
+    if isinstance(node, BoolOp):
+        return BoolOp(node.op, tuple(_validate_fields(t, entity, fields) for t in node.terms))
+
+    head, _, rest = node.field.partition('/')
+    known = {f.lower(): f for f in fields | COMMON_FIELDS}
+    canonical = known.get(head.lower())
+    if canonical is None:
+        message = f"Unknown field '{head}' for {entity}"
+        suggestion = difflib.get_close_matches(head, list(known.values()), n=1)
+        if suggestion:
+            message += f" (did you mean '{suggestion[0]}'?)"
+        raise ConditionsError(message, node.position)
+    field = f"{canonical}/{rest}" if rest else canonical
+    return Comparison(field, node.op, node.value, node.position)
+
+
+@lru_cache(maxsize=1024)
+def canonicalize_conditions(text: str, entity: Optional[str] = None) -> str:
+    """Validate a conditions string and return its canonical form
+
+    When ``entity`` names an endpoint template with a known field list, field
+    names are also checked against it. Raises ConditionsError on any problem.
+    """
+    node = _flatten(parse_conditions(text))
+    fields = ENTITY_FIELDS.get(entity) if entity else None
+    if fields is not None:
+        node = _validate_fields(node, entity, fields)
+    return format_conditions(node)
+
+
+# Local evaluation of parsed conditions against records already in memory.
+# Semantics follow ConnectWise (SQL Server): string comparisons are case-insensitive,
+# comparisons against missing values are false except for "= null", and a path that
+# crosses a list matches when any element matches.
+
+_MISSING = object()
+_INFO_FIELDS = {'lastupdated', 'dateentered', 'enteredby', 'updatedby'}
+
+
+def _child(value: Any, key: str) -> Any:
+    if not isinstance(value, dict):
+        return _MISSING
+    if key in value:
+        return value[key]
+    lowered = key.lower()
+    for k, v in value.items():
+        if k.lower() == lowered:
+            return v
+    return _MISSING
+
+
+def _resolve(record: dict, path: tuple) -> list:
+    """Return the leaf values a field path points at, expanding lists along the way"""
+    values = [record]
+    for key in path:
+        found = []
+        for value in values:
+            child = _child(value, key)
+            if isinstance(child, list):
+                found.extend(child)
+            elif child is not _MISSING:
+                found.append(child)
+        values = found
+    return values or [None]
+
+
+@lru_cache(maxsize=8192)
+def _to_datetime(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _coerce(leaf: Any, literal: Any) -> tuple[Any, Any]:
+    """Bring a record value and a literal to comparable types, or (None, None)"""
+    if isinstance(literal, DateLiteral):
+        return _to_datetime(leaf), literal.value
+    if isinstance(literal, bool):
+        return (leaf, literal) if isinstance(leaf, bool) else (None, None)
+    if isinstance(literal, (int, float)):
+        if isinstance(leaf, bool):
+            return None, None
+        if isinstance(leaf, (int, float)):
+            return leaf, literal
+        try:
+            return float(leaf), literal
+        except (TypeError, ValueError):
+            return None, None
+    if isinstance(literal, str):
+        if isinstance(leaf, bool):
+            leaf = 'true' if leaf else 'false'
+        return (str(leaf).casefold(), literal.casefold()) if leaf is not None else (None, None)
+    return None, None
+
+
+_COMPARATORS = {
+    '=': lambda a, b: a == b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+def _like_regex(pattern: str) -> re.Pattern:
+    """Translate a SQL LIKE pattern (% and _ wildcards) into a regular expression"""
+    parts = []
+    for ch in pattern:
+        if ch == '%':
+            parts.append('.*')
+        elif ch == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(ch))
+    return re.compile(''.join(parts), re.IGNORECASE | re.DOTALL)
+
+
+def _leaf_matcher(op: str, literal: Any):
+    """Build a test for a single non-null leaf value"""
+    if op in ('like', 'not like'):
+        regex = _like_regex(literal)
+        return lambda leaf: regex.fullmatch(leaf if isinstance(leaf, str) else str(leaf)) is not None
+    if op in ('contains', 'not contains'):
+        needle = literal.casefold()
+        return lambda leaf: needle in str(leaf).casefold()
+    if op in ('in', 'not in'):
+        tests = [_leaf_matcher('=', v) for v in literal]
+        return lambda leaf: any(test(leaf) for test in tests)
+
+    compare = _COMPARATORS['=' if op == '!=' else op]
+
+    def match(leaf):
+        a, b = _coerce(leaf, literal)
+        if a is None:
+            return False
+        try:
+            return compare(a, b)
+        except TypeError:
+            return False
+
+    # Fast paths for the common equality checks on plain values
+    if compare is _COMPARATORS['='] and isinstance(literal, (int, float)) and not isinstance(literal, bool):
+        return lambda leaf: leaf == literal if type(leaf) in (int, float) else match(leaf)
+    if compare is _COMPARATORS['='] and isinstance(literal, bool):
+        return lambda leaf: leaf is literal
+    if compare is _COMPARATORS['='] and isinstance(literal, str):
+        folded = literal.casefold()
+        return lambda leaf: leaf.casefold() == folded if type(leaf) is str else match(leaf)
+    return match
+
+
+def _getter(path: tuple):
+    """Build a function returning the value at a path, or a list of candidates"""
+    if len(path) == 1:
+        key = path[0]
+
+        def get(record):
+            value = record.get(key, _MISSING)
+            if value is _MISSING:
+                value = _child(record, key)
+                if value is _MISSING and key.lower() in _INFO_FIELDS:
+                    # Audit fields such as lastUpdated live under _info in API responses
+                    value = _child(record.get('_info'), key)
+            return None if value is _MISSING else value
+        return get
+    return lambda record: _resolve(record, path)
+
+
+def _compile_node(node: Node):
+    if isinstance(node, BoolOp):
+        terms = [_compile_node(t) for t in node.terms]
+        if len(terms) == 2:
+            first, second = terms
+            if node.op == 'and':
+                return lambda record: first(record) and second(record)
+            return lambda record: first(record) or second(record)
+        if node.op == 'and':
+            return lambda record: all(term(record) for term in terms)
+        return lambda record: any(term(record) for term in terms)
+
+    get = _getter(tuple(node.field.split('/')))
+    if node.value is None and node.op in ('=', '!='):
+        wants_null = node.op == '='
+
+        def check(leaf):
+            return (leaf is None) == wants_null
+    else:
+        test = _leaf_matcher(node.op, node.value)
+        if node.op == '!=' or node.op.startswith('not '):
+            def check(leaf):
+                return leaf is not None and not test(leaf)
+        else:
+            def check(leaf):
+                return leaf is not None and test(leaf)
+
+    def predicate(record):
+        value = get(record)
+        if type(value) is list:
+            return any(check(leaf) for leaf in value) if value else check(None)
+        return check(value)
+    return predicate
+
+
+@lru_cache(maxsize=512)
+def compile_conditions(text: str):
+    """Compile a conditions string into a predicate over records, cached per string"""
+    return _compile_node(_flatten(parse_conditions(text)))
+
+
+_ORDER_TERM_RE = re.compile(r'^\s*([A-Za-z_]\w*(?:/[A-Za-z_]\w*)*)(?:\s+(asc|desc))?\s*$', re.IGNORECASE)
+
+
+def _sort_key(value: Any) -> tuple:
+    # Nulls first, then numbers, dates and strings in a stable cross-type order
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, int(value))
+    if isinstance(value, (int, float)):
+        return (1, value)
+    parsed = _to_datetime(value)
+    if parsed is not None:
+        return (2, parsed)
+    return (3, str(value).casefold())
+
+
+def _order_key(get):
+    """Sort key over the value a getter returns, using the first leaf of a list"""
+    def key(record):
+        value = get(record)
+        if type(value) is list:
+            value = value[0] if value else None
+        return _sort_key(value)
+    return key
+
+
+@lru_cache(maxsize=256)
+def compile_order_by(text: str) -> tuple:
+    """Parse an orderBy string such as "name asc, id desc" into (path, descending) pairs"""
+    terms = []
+    for part in text.split(','):
+        match = _ORDER_TERM_RE.match(part)
+        if not match:
+            raise ConditionsError(f"Invalid orderBy term {part.strip()!r}, use 'field [asc|desc]'")
+        terms.append((tuple(match.group(1).split('/')), (match.group(2) or 'asc').lower() == 'desc'))
+    return tuple(terms)
+
+
+def apply_query(
+    records: list,
+    conditions: Optional[str] = None,
+    order_by: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 25,
+) -> list:
+    """Filter, sort and page records in memory the way the ConnectWise API would
+
+    Without an orderBy the input order is kept, so records should already be sorted by id.
+    """
+    start = (max(page, 1) - 1) * page_size
+    matches = filter(compile_conditions(conditions), records) if conditions else iter(records)
+    if not order_by:
+        # Input order is final, so stop scanning once the requested page is filled
+        return list(islice(matches, start, start + page_size))
+    records = list(matches)
+
+    # Records are expected in the API's default id order, so only an explicit orderBy sorts.
+    # Sort by the last key first so earlier keys take precedence (sorts are stable).
+    for path, descending in reversed(compile_order_by(order_by) if order_by else ()):
+        records.sort(key=_order_key(_getter(path)), reverse=descending)
+    return records[start:start + page_size]
@@ -0,0 +1,167 @@
+"""
+ConnectWise disk cache - compressed GET responses in SQLite, shared between processes
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Any, Optional
+
+logger = logging.getLogger('connectwise_mcp')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (id, total) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries
+BEGIN UPDATE meta SET total = total + NEW.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries
+BEGIN UPDATE meta SET total = total - OLD.size WHERE id = 0; END;
+"""
+
+# Reads refresh an entry's LRU position at most this often, to keep reads mostly read-only
+_TOUCH_INTERVAL = 60
+
+# Evict down to this fraction of the size bound so eviction doesn't run on every write
+_EVICT_TARGET = 0.9
+
+
+def parse_ttls(text: str) -> dict[str, float]:
+    """Parse 'service/tickets/{id}=60,system/members=3600' into {template: seconds}"""
+    ttls = {}
+    for part in text.split(','):
+        endpoint, sep, seconds = part.partition('=')
+        if not sep or not endpoint.strip():
+            continue
+        try:
+            ttls[endpoint.strip().strip('/')] = float(seconds)
+        except ValueError:
+            logger.warning("Ignoring disk cache TTL with invalid seconds: %s", part.strip())
+    return ttls
+
+
+class DiskCache:
+    """SQLite-backed response cache that any number of processes can share
+
+    The database runs in WAL mode, so readers never block the writer and
+    several bridge-spawned processes can use one file. Values are zlib-
+    compressed JSON. Entries expire by wall-clock time, and once the stored
+    size passes ``max_bytes`` the least recently used entries are evicted.
+    Opening the cache touches only the schema, not the stored entries.
+
+    Methods are blocking; call them through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str, max_bytes: int, default_ttl: float, ttls: Optional[dict[str, float]] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Makes INSERT OR REPLACE fire the delete trigger, keeping meta.total exact
+            conn.execute("PRAGMA recursive_triggers=ON")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def ttl_for(self, template: str) -> float:
+        """TTL for an endpoint template such as service/tickets/{id}"""
+        return self.ttls.get(template, self.default_ttl)
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, expires, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires, accessed = row
+            if expires < now:
+                conn.execute("DELETE FROM entries WHERE key = ? AND expires < ?", (key, now))
+                return None
+            if accessed < now - _TOUCH_INTERVAL:
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(zlib.decompress(value))
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        blob = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), 6)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now + ttl, now),
+            )
+            # Triggers keep the running total in meta, so this check is a single-row read
+            if conn.execute("SELECT total FROM meta WHERE id = 0").fetchone()[0] > self.max_bytes:
+                self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entries WHERE expires < ?", (now,))
+            total = conn.execute("SELECT total FROM meta WHERE id = 0").fetchone()[0]
+            keys = []
+            if total > self.max_bytes:
+                excess = total - int(self.max_bytes * _EVICT_TARGET)
+                removed = 0
+                for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                    keys.append((key,))
+                    removed += size
+                    if removed >= excess:
+                        break
+                conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info("Disk cache evicted %d least recently used entries", len(keys))
+
+    def invalidate(self, prefixes: list[str], exact: list[str]) -> int:
+        """Delete entries whose key equals one of ``exact`` or starts with one of ``prefixes``"""
+        with self._lock:
+            conn = self._connect()
+            deleted = 0
+            for key in exact:
+                deleted += conn.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount
+            for prefix in prefixes:
+                # A key range instead of LIKE, so the primary key index is used
+                deleted += conn.execute(
+                    "DELETE FROM entries WHERE key >= ? AND key < ?", (prefix, prefix + '\uffff')
+                ).rowcount
+            return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            size = conn.execute("SELECT total FROM meta WHERE id = 0").fetchone()[0]
+        return {"path": self.path, "entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
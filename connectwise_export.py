@@ -0,0 +1,121 @@
+"""
+ConnectWise bulk export - stream every record of an endpoint to gzip-compressed NDJSON
+"""
+import os
+import json
+import time
+import zlib
+import logging
+from typing import Any, AsyncIterator, Callable, Optional
+
+logger = logging.getLogger('connectwise_mcp')
+
+Stream = Callable[[str, dict], AsyncIterator[Any]]
+
+
+def _state_path(path: str) -> str:
+    return f"{path}.state"
+
+
+def _load_state(path: str) -> Optional[dict]:
+    try:
+        with open(_state_path(path), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(path: str, state: dict) -> None:
+    # Write then rename so a crash never leaves a half-written state file
+    tmp = f"{_state_path(path)}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, _state_path(path))
+
+
+async def export_endpoint(
+    stream: Stream,
+    endpoint: str,
+    path: str,
+    conditions: Optional[str] = None,
+    fields: Optional[str] = None,
+    page_size: int = 1000,
+    resume: bool = True,
+) -> dict:
+    """Write every record of ``endpoint`` matching ``conditions`` to ``path``
+
+    Records are fetched in id order using ``id > last id`` rather than page
+    numbers, so deep pages stay cheap and new records can't shift the walk.
+    Each page is appended as its own gzip member and only then recorded in
+    ``path.state``, which makes the file valid after every page. An
+    interrupted export resumes after the last completed page. Records are
+    compressed as ``stream`` yields them, so memory use stays at one record
+    plus the compressor state regardless of page or endpoint size.
+    """
+    job = {"endpoint": endpoint, "conditions": conditions, "fields": fields, "page_size": page_size}
+    state = _load_state(path) if resume else None
+    if state and state.get("job") == job and os.path.exists(path):
+        logger.info("Resuming export of %s at id > %s (%d records written)", endpoint, state["last_id"], state["records"])
+    else:
+        state = {"job": job, "last_id": 0, "records": 0, "pages": 0, "offset": 0}
+    resumed_from = state["records"]
+
+    if fields and 'id' not in fields.split(','):
+        # The id of the last record drives the next request
+        fields = f"id,{fields}"
+
+    started = time.monotonic()
+    with open(path, 'r+b' if state["offset"] else 'wb') as out:
+        # Drop anything written after the last recorded page
+        out.truncate(state["offset"])
+        out.seek(state["offset"])
+        while True:
+            keyset = f"id > {state['last_id']}"
+            params = {
+                "conditions": f"({conditions}) and {keyset}" if conditions else keyset,
+                "orderBy": "id asc",
+                "pageSize": page_size,
+            }
+            if fields:
+                params["fields"] = fields
+            # A fresh gzip member per page; wbits=31 selects the gzip container
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            count = 0
+            last_id = state["last_id"]
+            async for record in stream(endpoint, params):
+                line = json.dumps(record, separators=(',', ':')) + '\n'
+                out.write(compressor.compress(line.encode('utf-8')))
+                last_id = record["id"]
+                count += 1
+            if count:
+                out.write(compressor.flush())
+                out.flush()
+                os.fsync(out.fileno())
+                state.update(
+                    last_id=last_id,
+                    records=state["records"] + count,
+                    pages=state["pages"] + 1,
+                    offset=out.tell(),
+                )
+                _save_state(path, state)
+                logger.info("Exported %d records of %s", state["records"], endpoint)
+            if count < page_size:
+                break
+
+    try:
+        os.remove(_state_path(path))
+    except OSError:
+        pass
+
+    elapsed = time.monotonic() - started
+    exported = state["records"] - resumed_from
+    return {
+        "endpoint": endpoint,
+        "path": os.path.abspath(path),
+        "records": state["records"],
+        "pages": state["pages"],
+        "resumed_from": resumed_from,
+        "bytes": state["offset"],
+        "seconds": round(elapsed, 2),
+        "records_per_second": round(exported / elapsed, 1) if elapsed > 0 else 0.0,
+    }
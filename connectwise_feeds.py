@@ -0,0 +1,313 @@
+"""
+ConnectWise change feeds - watched queries served as subscribable MCP resources
+"""
+import asyncio
+import logging
+import weakref
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from connectwise_conditions import compile_conditions
+
+logger = logging.getLogger('connectwise_mcp')
+
+# Feed names usable in connectwise://feeds/<name> and the endpoint each one watches
+FEED_ENDPOINTS = {
+    'tickets': 'service/tickets',
+    'companies': 'company/companies',
+    'contacts': 'company/contacts',
+    'configurations': 'company/configurations',
+    'opportunities': 'sales/opportunities',
+    'projects': 'project/projects',
+    'activities': 'sales/activities',
+    'time_entries': 'time/entries',
+}
+
+FEED_URI_TEMPLATE = 'connectwise://feeds/{name}{?conditions,tenant}'
+
+PAGE_SIZE = 1000
+
+
+class FeedError(ValueError):
+    """Raised for a feed URI that can't be watched"""
+
+
+def parse_feed_uri(uri: str, default_tenant: str) -> tuple[str, str, Optional[str]]:
+    """Split connectwise://feeds/tickets?conditions=...&tenant=... into (tenant, endpoint, conditions)"""
+    url = urlsplit(uri)
+    if url.scheme != 'connectwise' or url.netloc != 'feeds':
+        raise FeedError(f"Not a feed URI: {uri} (expected {FEED_URI_TEMPLATE})")
+    name = url.path.strip('/')
+    endpoint = FEED_ENDPOINTS.get(name)
+    if endpoint is None:
+        raise FeedError(f"Unknown feed '{name}' (one of: {', '.join(FEED_ENDPOINTS)})")
+    query = parse_qs(url.query)
+    tenant = query.get('tenant', [''])[0] or default_tenant
+    conditions = query.get('conditions', [''])[0] or None
+    return tenant, endpoint, conditions
+
+
+def _last_updated(record: dict) -> str:
+    return (record.get('_info') or {}).get('lastUpdated') or ''
+
+
+class Feed:
+    """The records currently matching one watched query, with a log of what changed when
+
+    Every change gets the next sequence number. Each session remembers the
+    sequence it last read, so its next read returns only records changed or
+    removed since then; a session's first read returns the full result.
+    """
+
+    def __init__(self, uri: str, tenant: str, endpoint: str, conditions: Optional[str]):
+        self.uri = uri
+        self.tenant = tenant
+        self.endpoint = endpoint
+        self.conditions = conditions
+        self.match = compile_conditions(conditions) if conditions else (lambda record: True)
+        self.records: dict[int, dict] = {}
+        # Record id -> sequence of its last change, in sequence order
+        self.log: dict[int, int] = {}
+        self.seq = 0
+        self.subscribers: weakref.WeakSet = weakref.WeakSet()
+        self.cursors: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _mark(self, record_id: int) -> None:
+        self.seq += 1
+        self.log.pop(record_id, None)
+        self.log[record_id] = self.seq
+
+    def apply(self, changed: list[dict]) -> bool:
+        """Fold changed records of the endpoint into the feed; True if any affected it"""
+        before = self.seq
+        for record in changed:
+            record_id = record.get('id')
+            if self.match(record):
+                # Polls overlap at the watermark second, so a record may come back unchanged
+                if self.records.get(record_id) != record:
+                    self.records[record_id] = record
+                    self._mark(record_id)
+            elif self.records.pop(record_id, None) is not None:
+                # Changed so it no longer matches, e.g. a ticket that was closed
+                self._mark(record_id)
+        return self.seq != before
+
+    def read(self, session: Any) -> dict:
+        """Changes since this session's last read, or everything on its first"""
+        cursor = self.cursors.get(session)
+        if cursor is None:
+            body = {"full": True, "changed": list(self.records.values()), "removed": []}
+        else:
+            changed, removed = [], []
+            for record_id, seq in reversed(self.log.items()):
+                if seq <= cursor:
+                    break
+                if record_id in self.records:
+                    changed.append(self.records[record_id])
+                else:
+                    removed.append(record_id)
+            body = {"full": False, "changed": changed[::-1], "removed": removed[::-1]}
+        self.cursors[session] = self.seq
+        self._prune()
+        return {"uri": self.uri, "sequence": self.seq, **body}
+
+    def _prune(self) -> None:
+        """Forget log entries every reading session has already seen"""
+        oldest = min(self.cursors.values(), default=self.seq)
+        for record_id, seq in list(self.log.items()):
+            if seq > oldest:
+                break
+            del self.log[record_id]
+
+
+Fetch = Callable[[str, str, dict], Awaitable[list]]
+Notify = Callable[[Any, str], Awaitable[None]]
+
+
+class FeedHub:
+    """Shared poller behind every feed
+
+    Each (tenant, endpoint) with subscribed feeds is polled once per
+    ``interval`` with ``lastUpdated >= [watermark]``, however many feeds and
+    sessions watch it. Changed records are matched against each feed's
+    conditions locally, so a record that stops matching is reported as
+    removed, and every subscriber of an affected feed is notified.
+
+    ``fetch(tenant, endpoint, params)`` returns one page of records;
+    ``notify(session, uri)`` tells a session that a resource changed.
+    """
+
+    def __init__(
+        self,
+        fetch: Fetch,
+        notify: Notify,
+        default_tenant: str,
+        interval: float,
+        max_records: int = 1000,
+        max_pages: int = 10,
+    ):
+        self.fetch = fetch
+        self.notify = notify
+        self.default_tenant = default_tenant
+        self.interval = interval
+        self.max_records = max_records
+        self.max_pages = max_pages
+        self.feeds: dict[str, Feed] = {}
+        # (tenant, endpoint) -> (lastUpdated watermark, ids already seen at that timestamp)
+        self.watermarks: dict[tuple[str, str], tuple[str, set[int]]] = {}
+        self.polls = 0
+        self.notifications = 0
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def feed(self, uri: str) -> Feed:
+        """The feed for a URI, loading its current records on first use"""
+        feed = self.feeds.get(uri)
+        if feed is not None:
+            return feed
+        lock = self._locks.setdefault(uri, asyncio.Lock())
+        async with lock:
+            feed = self.feeds.get(uri)
+            if feed is not None:
+                return feed
+            try:
+                feed = Feed(uri, *parse_feed_uri(uri, self.default_tenant))
+                key = (feed.tenant, feed.endpoint)
+                added = key not in self.watermarks
+                try:
+                    if added:
+                        # Taken before the initial load, so changes made during it are picked up by the next poll
+                        self.watermarks[key] = (await self._latest(*key), set())
+                    feed.apply(await self._load(feed))
+                except BaseException:
+                    # Don't leave a watermark polled for a feed that never came to be
+                    if added and not any((f.tenant, f.endpoint) == key for f in self.feeds.values()):
+                        self.watermarks.pop(key, None)
+                    raise
+                # A caller that found the lock already dropped may have loaded the feed meanwhile
+                feed = self.feeds.setdefault(uri, feed)
+            finally:
+                self._locks.pop(uri, None)
+        self._start()
+        return feed
+
+    async def _latest(self, tenant: str, endpoint: str) -> str:
+        newest = await self.fetch(tenant, endpoint, {
+            "orderBy": "lastUpdated desc", "fields": "id,_info/lastUpdated", "pageSize": 1,
+        })
+        return _last_updated(newest[0]) if newest else '1970-01-01T00:00:00Z'
+
+    async def _load(self, feed: Feed) -> list:
+        records: list = []
+        params = {"orderBy": "id asc", "pageSize": PAGE_SIZE}
+        if feed.conditions:
+            params["conditions"] = feed.conditions
+        page = 1
+        while True:
+            batch = await self.fetch(feed.tenant, feed.endpoint, {**params, "page": page})
+            records.extend(batch)
+            if len(records) > self.max_records:
+                raise FeedError(f"{feed.uri} matches more than {self.max_records} records; narrow its conditions")
+            if len(batch) < PAGE_SIZE:
+                return records
+            page += 1
+
+    async def subscribe(self, uri: str, session: Any) -> None:
+        (await self.feed(uri)).subscribers.add(session)
+
+    async def unsubscribe(self, uri: str, session: Any) -> None:
+        feed = self.feeds.get(uri)
+        if feed is not None:
+            feed.subscribers.discard(session)
+            feed.cursors.pop(session, None)
+
+    async def read(self, uri: str, session: Any) -> dict:
+        return (await self.feed(uri)).read(session)
+
+    def wake(self) -> None:
+        """Poll now instead of at the next interval, e.g. after a change callback"""
+        self._wake.set()
+
+    def _start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            # Feeds nobody subscribes to are dropped; reading one again reloads it
+            for uri in [uri for uri, feed in self.feeds.items() if not feed.subscribers]:
+                del self.feeds[uri]
+            if not self.feeds:
+                self.watermarks.clear()
+                return
+            for key in {(feed.tenant, feed.endpoint) for feed in self.feeds.values()}:
+                try:
+                    await self.poll(*key)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Feed poll of %s (tenant: %s) failed: %s", key[1], key[0], e)
+            self.watermarks = {
+                key: mark for key, mark in self.watermarks.items()
+                if any((feed.tenant, feed.endpoint) == key for feed in self.feeds.values())
+            }
+
+    async def poll(self, tenant: str, endpoint: str) -> int:
+        """Fetch records changed since the watermark, update feeds and notify; returns the count"""
+        watermark, seen = self.watermarks[(tenant, endpoint)]
+        changed = []
+        for page in range(1, self.max_pages + 1):
+            batch = await self.fetch(tenant, endpoint, {
+                # >= rather than >, since lastUpdated has one-second resolution
+                "conditions": f"lastUpdated >= [{watermark}]",
+                "orderBy": "lastUpdated asc, id asc",
+                "page": page,
+                "pageSize": PAGE_SIZE,
+            })
+            changed.extend(r for r in batch if not (_last_updated(r) == watermark and r.get('id') in seen))
+            if len(batch) < PAGE_SIZE:
+                break
+        self.polls += 1
+        if not changed:
+            return 0
+
+        newest = max(_last_updated(r) for r in changed)
+        at_newest = {r.get('id') for r in changed if _last_updated(r) == newest}
+        self.watermarks[(tenant, endpoint)] = (newest, at_newest | seen if newest == watermark else at_newest)
+
+        for feed in list(self.feeds.values()):
+            if (feed.tenant, feed.endpoint) != (tenant, endpoint) or not feed.apply(changed):
+                continue
+            for session in list(feed.subscribers):
+                try:
+                    await self.notify(session, feed.uri)
+                    self.notifications += 1
+                except Exception as e:
+                    logger.info("Dropping feed subscriber of %s: %s", feed.uri, e)
+                    feed.subscribers.discard(session)
+        return len(changed)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "feeds": len(self.feeds),
+            "subscribers": sum(len(feed.subscribers) for feed in self.feeds.values()),
+            "polled_endpoints": len(self.watermarks),
+            "polls": self.polls,
+            "notifications": self.notifications,
+        }
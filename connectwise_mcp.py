@@ -2,20 +2,125 @@
 ConnectWise MCP Server - Read-only access to ConnectWise Manage
 """
 import os
+import re
+import math
 import json
+import gzip
+import time
 import base64
+import codecs
+import queue
+import atexit
+import random
+import tempfile
+import asyncio
 import logging
-from typing import Optional, Any
+import logging.handlers
+import threading
+import contextvars
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Optional, Any, AsyncIterator
+from urllib.parse import parse_qsl, urlencode
 import httpx
 from mcp.server import Server
-from mcp.types import TextContent, Tool, INVALID_PARAMS, INTERNAL_ERROR
-from pydantic import BaseModel, Field
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.types import Resource, ResourceTemplate, TextContent, Tool, INVALID_PARAMS, INTERNAL_ERROR
+from pydantic import AnyUrl, BaseModel, Field
+from connectwise_callbacks import CallbackError, CallbackEvent, CallbackServer
+from connectwise_analytics import DATASETS, AnalyticsStore, parse_day
+from connectwise_export import export_endpoint
+from connectwise_diskcache import DiskCache, parse_ttls
+from connectwise_feeds import FEED_ENDPOINTS, FEED_URI_TEMPLATE, FeedHub
+from connectwise_budgets import CallerBudgets, CallUsage, Quota, Verdict
+from connectwise_workers import InvalidationLog, SharedRateLimiter, Supervisor, ToolServer, worker_command
+from connectwise_conditions import ConditionsError, apply_query, canonicalize_conditions, entity_for_endpoint
+
+# Logging configuration
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+CW_LOG_SAMPLE_RATE = float(os.getenv('CW_LOG_SAMPLE_RATE', '1.0'))
+CW_LOG_RATE_LIMIT = int(os.getenv('CW_LOG_RATE_LIMIT', '20'))
+CW_LOG_RATE_WINDOW = float(os.getenv('CW_LOG_RATE_WINDOW', '60'))
+CW_LOG_MAX_BODY = int(os.getenv('CW_LOG_MAX_BODY', '2048'))
+
+
+class LogRateLimitFilter(logging.Filter):
+    """Sample and rate limit log records before they are queued
+
+    A record passed ``extra={"sample_rate": r}`` is kept with probability ``r``.
+    Each message template is then limited to ``limit`` records per ``window``
+    seconds; the count of suppressed records is appended to the next one let through.
+    """
+
+    _MAX_TEMPLATES = 10000
+
+    def __init__(self, limit: int, window: float):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._counters: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_rate = getattr(record, 'sample_rate', 1.0)
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return False
+        if self.limit <= 0:
+            return True
+
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                if len(self._counters) >= self._MAX_TEMPLATES:
+                    self._counters.clear()
+                counter = self._counters[key] = [now, 0, 0]
+            elif now - counter[0] >= self.window:
+                counter[0], counter[1] = now, 0
+            if counter[1] >= self.limit:
+                counter[2] += 1
+                return False
+            counter[1] += 1
+            suppressed, counter[2] = counter[2], 0
+
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
+
+
+def _configure_logging() -> logging.handlers.QueueListener:
+    """Route all logging through a queue so handler I/O happens off the event loop"""
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(LogRateLimitFilter(CW_LOG_RATE_LIMIT, CW_LOG_RATE_WINDOW))
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def _truncate_body(body: bytes, limit: Optional[int] = None) -> str:
+    """Decode at most ``limit`` bytes of a response body for logging"""
+    limit = CW_LOG_MAX_BODY if limit is None else limit
+    text = body[:limit].decode('utf-8', errors='replace')
+    if len(body) > limit:
+        text += f"... [{len(body) - limit} more bytes]"
+    return text
+
 
 # Configure logging
-logging.basicConfig(
-    level=os.getenv('LOG_LEVEL', 'INFO'),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+log_listener = _configure_logging()
 logger = logging.getLogger(__name__)
 
 # Environment variables
@@ -26,64 +131,1592 @@ CW_API_URL = os.getenv('CW_API_URL', 'https://api-na.myconnectwise.net')
 CW_API_VERSION = os.getenv('CW_API_VERSION', 'v2023.2')
 CW_CLIENT_ID = os.getenv('CW_CLIENT_ID', 'mcp-connectwise-server')
 
+# Multi-tenant configuration
+CW_TENANTS_FILE = os.getenv('CW_TENANTS_FILE')
+CW_DEFAULT_TENANT = os.getenv('CW_DEFAULT_TENANT', 'default')
+CW_TENANT_IDLE_TIMEOUT = float(os.getenv('CW_TENANT_IDLE_TIMEOUT', '600'))
+
+# Per-tenant upstream limits and response cache
+CW_RATE_LIMIT = float(os.getenv('CW_RATE_LIMIT', '0'))
+CW_RATE_BURST = int(os.getenv('CW_RATE_BURST', '10'))
+CW_MAX_CONNECTIONS = int(os.getenv('CW_MAX_CONNECTIONS', '20'))
+CW_CACHE_TTL = float(os.getenv('CW_CACHE_TTL', '0'))
+CW_CACHE_MAX_ENTRIES = int(os.getenv('CW_CACHE_MAX_ENTRIES', '1000'))
+# Window for collecting concurrent single-record gets into one 'id in (...)' request (0 = disabled)
+CW_BATCH_WINDOW_MS = float(os.getenv('CW_BATCH_WINDOW_MS', '0'))
+CW_BATCH_MAX_SIZE = int(os.getenv('CW_BATCH_MAX_SIZE', '50'))
+# Seconds a page walk's cursors are kept for rewriting the next page to "id > last id" (0 = disabled)
+CW_KEYSET_TTL = float(os.getenv('CW_KEYSET_TTL', '600'))
+
+# Response cache on disk, shared between processes and kept across restarts ('' = disabled)
+CW_DISK_CACHE_PATH = os.getenv('CW_DISK_CACHE_PATH', '')
+CW_DISK_CACHE_MAX_MB = float(os.getenv('CW_DISK_CACHE_MAX_MB', '256'))
+CW_DISK_CACHE_TTL = float(os.getenv('CW_DISK_CACHE_TTL', '300'))
+# Per-endpoint TTLs, e.g. "service/tickets/{id}=60,system/members=3600"
+CW_DISK_CACHE_TTLS = os.getenv('CW_DISK_CACHE_TTLS', '')
+
+# Local checking of conditions strings (syntax, strict or off). strict also checks field names against
+# the hand-written lists in connectwise_conditions, which don't cover every upstream field
+CW_VALIDATE_CONDITIONS = os.getenv('CW_VALIDATE_CONDITIONS', 'syntax').lower()
+
+# Reference data held in memory and queried locally
+CW_LOCAL_QUERY_TTL = float(os.getenv('CW_LOCAL_QUERY_TTL', '300'))
+CW_LOCAL_QUERY_MAX_RECORDS = int(os.getenv('CW_LOCAL_QUERY_MAX_RECORDS', '5000'))
+LOCAL_QUERY_ENDPOINTS = {
+    'system/members',
+    'service/boards',
+    'service/boards/{id}/statuses',
+    'service/priorities',
+    'service/sources',
+    'company/configurations/types',
+    'company/companies/types',
+    'company/companies/statuses',
+    'company/contacts/types',
+    'finance/billingCycles',
+}
+
+# Seconds a board snapshot is reused, and most open tickets scanned for its owner counts
+CW_SNAPSHOT_TTL = float(os.getenv('CW_SNAPSHOT_TTL', '10'))
+CW_SNAPSHOT_OWNER_SCAN = int(os.getenv('CW_SNAPSHOT_OWNER_SCAN', '5000'))
+
+# Columnar store behind connectwise_get_report: days of history held and refresh interval
+CW_ANALYTICS_DAYS = int(os.getenv('CW_ANALYTICS_DAYS', '365'))
+CW_ANALYTICS_REFRESH = float(os.getenv('CW_ANALYTICS_REFRESH', '300'))
+
+# Change feeds (MCP resource subscriptions): seconds between polls, records per feed, pages per poll
+CW_FEED_INTERVAL = float(os.getenv('CW_FEED_INTERVAL', '30'))
+CW_FEED_MAX_RECORDS = int(os.getenv('CW_FEED_MAX_RECORDS', '1000'))
+CW_FEED_MAX_PAGES = int(os.getenv('CW_FEED_MAX_PAGES', '10'))
+
+# Directory connectwise_export writes into
+CW_EXPORT_DIR = os.getenv('CW_EXPORT_DIR', 'exports')
+
+# Receiver for ConnectWise callbacks that invalidate cached records (0 = disabled)
+CW_CALLBACK_PORT = int(os.getenv('CW_CALLBACK_PORT', '0'))
+CW_CALLBACK_HOST = os.getenv('CW_CALLBACK_HOST', '0.0.0.0')
+CW_CALLBACK_SECRET = os.getenv('CW_CALLBACK_SECRET', '')
+# Seconds between checks of the shared invalidation log by workers that don't run the receiver
+CW_INVALIDATION_POLL = float(os.getenv('CW_INVALIDATION_POLL', '1'))
+
+# Speculative prefetch of follow-up lookups after list calls (top N results, 0 = disabled)
+CW_PREFETCH_TOP_N = int(os.getenv('CW_PREFETCH_TOP_N', '0'))
+CW_PREFETCH_BUDGET = int(os.getenv('CW_PREFETCH_BUDGET', '30'))
+CW_PREFETCH_TTL = float(os.getenv('CW_PREFETCH_TTL', '120'))
+
+# Default deadline for a tool call in seconds (0 = none); a tool's timeout argument overrides it
+CW_TOOL_TIMEOUT = float(os.getenv('CW_TOOL_TIMEOUT', '0'))
+# Per-request upstream timeout in seconds, shortened to fit the call's deadline
+CW_REQUEST_TIMEOUT = float(os.getenv('CW_REQUEST_TIMEOUT', '30'))
+
+# Worker mode (connectwise_mcp.py serve): processes, listen address and seconds to drain on reload
+CW_WORKERS = int(os.getenv('CW_WORKERS', '0')) or os.cpu_count() or 1
+CW_SERVE_HOST = os.getenv('CW_SERVE_HOST', '0.0.0.0')
+CW_SERVE_PORT = int(os.getenv('CW_SERVE_PORT', '3003'))
+CW_WORKER_DRAIN = float(os.getenv('CW_WORKER_DRAIN', '30'))
+# SQLite file holding rate limits and caller usage shared by every process using it (':memory:' = per process).
+# On by default, since the bridge starts a new process per call and per-process counts would never add up
+CW_SHARED_STATE_PATH = (
+    os.getenv('CW_SHARED_STATE_PATH') or os.path.join(tempfile.gettempdir(), 'connectwise-mcp-state.sqlite')
+)
+
+# Per-caller quotas on upstream usage (0 = unlimited) and what to do with a call over quota
+CW_CALLERS_FILE = os.getenv('CW_CALLERS_FILE')
+CW_DEFAULT_CALLER = os.getenv('CW_DEFAULT_CALLER', 'default')
+# Caller every call of this process is charged to, overriding the caller argument (the bridge sets it from X-Caller)
+CW_CALLER = os.getenv('CW_CALLER', '')
+CW_CALLER_REQUESTS_PER_MINUTE = int(os.getenv('CW_CALLER_REQUESTS_PER_MINUTE', '0'))
+CW_CALLER_REQUESTS_PER_HOUR = int(os.getenv('CW_CALLER_REQUESTS_PER_HOUR', '0'))
+CW_CALLER_MB_PER_HOUR = float(os.getenv('CW_CALLER_MB_PER_HOUR', '0'))
+CW_CALLER_OVER_QUOTA = os.getenv('CW_CALLER_OVER_QUOTA', 'reject').lower()
+# Longest a queued call waits for its caller's quota, when it has no earlier deadline
+CW_CALLER_MAX_QUEUE = float(os.getenv('CW_CALLER_MAX_QUEUE', '30'))
+
+# Record/replay of upstream traffic
+CW_CASSETTE_MODE = os.getenv('CW_CASSETTE_MODE', '').lower()
+CW_CASSETTE_PATH = os.getenv('CW_CASSETTE_PATH', 'connectwise.cassette.ndjson.gz')
+CW_CASSETTE_SPEED = float(os.getenv('CW_CASSETTE_SPEED', '1.0'))
+
+# Headers that are never written to a cassette
+_SCRUBBED_HEADERS = {'authorization', 'cookie', 'set-cookie', 'clientid'}
+# Headers that describe the wire encoding rather than the payload
+_WIRE_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+def _cassette_key(method: str, url: httpx.URL) -> str:
+    """Build a host-independent key for matching requests against a cassette"""
+    query = urlencode(sorted(parse_qsl(url.query.decode('ascii'), keep_blank_values=True)))
+    return f"{method} {url.path}?{query}" if query else f"{method} {url.path}"
+
+
+class CassetteMissError(httpx.TransportError):
+    """Raised in replay mode when a request has no recorded response"""
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transport that forwards requests upstream and appends each exchange to a cassette"""
+
+    def __init__(self, path: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.path = path
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._started = time.monotonic()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        offset = time.monotonic() - self._started
+        response = await self._transport.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        duration = time.monotonic() - self._started - offset
+
+        headers = {
+            k: v for k, v in response.headers.items()
+            if k.lower() not in _SCRUBBED_HEADERS | _WIRE_HEADERS
+        }
+        entry = {
+            "k": _cassette_key(request.method, request.url),
+            "s": response.status_code,
+            "h": headers,
+            "t": round(offset, 4),
+            "d": round(duration, 4),
+        }
+        try:
+            entry["b"] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            entry["b64"] = base64.b64encode(body).decode('ascii')
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=body,
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        self._file.close()
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Transport that serves responses from a cassette without touching the network
+
+    With ``speed`` of 1.0 each response is delayed by its recorded duration; larger
+    values replay proportionally faster and 0 disables the delay entirely.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self._entries: dict[str, deque] = defaultdict(deque)
+        for entry in load_cassette(path):
+            self._entries[entry["k"]].append(entry)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = _cassette_key(request.method, request.url)
+        recorded = self._entries.get(key)
+        if not recorded:
+            raise CassetteMissError(f"No cassette entry for {key}", request=request)
+
+        # Serve recordings of the same request in order, repeating the last one
+        entry = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        if self.speed > 0:
+            await asyncio.sleep(entry.get("d", 0) / self.speed)
+
+        if "b64" in entry:
+            body = base64.b64decode(entry["b64"])
+        else:
+            body = entry.get("b", "").encode('utf-8')
+        return httpx.Response(
+            status_code=entry["s"],
+            headers=entry.get("h", {}),
+            content=body,
+            request=request,
+        )
+
+
+def load_cassette(path: str) -> list[dict]:
+    """Read all entries from a cassette, tolerating a truncated final record"""
+    entries = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if line.strip():
+                    entries.append(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            logger.warning("Cassette %s is truncated, loaded %d entries", path, len(entries))
+    return entries
+
+
+def _build_transport(tenant: str = '') -> Optional[httpx.AsyncBaseTransport]:
+    """Create the transport selected by CW_CASSETTE_MODE, if any"""
+    path = CW_CASSETTE_PATH
+    if tenant and tenant != CW_DEFAULT_TENANT:
+        # Keep each tenant's traffic in its own cassette next to the default one
+        directory, filename = os.path.split(path)
+        path = os.path.join(directory, f"{tenant}-{filename}")
+
+    if CW_CASSETTE_MODE == 'record':
+        logger.info("Recording upstream traffic to cassette: %s", path)
+        return RecordingTransport(path)
+    if CW_CASSETTE_MODE == 'replay':
+        logger.info("Replaying upstream traffic from cassette: %s", path)
+        return ReplayTransport(path, speed=CW_CASSETTE_SPEED)
+    if CW_CASSETTE_MODE:
+        raise ValueError(f"Unknown CW_CASSETTE_MODE: {CW_CASSETTE_MODE}")
+    return None
+
+
+class JSONArrayParser:
+    """Incrementally split a top-level JSON array into its elements as bytes arrive
+
+    Each element is decoded with the C decoder once all of its bytes are in,
+    so only the unparsed tail of the body is buffered, never the whole page.
+    """
+
+    _decoder = json.JSONDecoder()
+    _NUMBER_CHARS = '0123456789+-.eE'
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        # What the array allows next: 'open' (after '['), 'item' (after an element) or 'comma'
+        self._state = 'open'
+
+    def _skip(self) -> None:
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        self._pos = pos
+
+    def feed(self, chunk: bytes, final: bool = False) -> list:
+        """Add bytes and return every element completed by them"""
+        self._buffer += self._text.decode(chunk, final)
+        items = []
+        if not self._started:
+            self._skip()
+            if self._pos >= len(self._buffer):
+                if final:
+                    raise ValueError("Empty body, expected a JSON array")
+                return items
+            if self._buffer[self._pos] != '[':
+                raise ValueError("Expected a JSON array")
+            self._started = True
+            self._pos += 1
+
+        while not self._finished:
+            self._skip()
+            if self._pos >= len(self._buffer):
+                break
+            char = self._buffer[self._pos]
+            if char == ']' and self._state != 'comma':
+                self._finished = True
+                self._pos += 1
+                break
+            if (char == ',') != (self._state == 'item'):
+                raise ValueError("Expected exactly one ',' between array elements")
+            if char == ',':
+                self._state = 'comma'
+                self._pos += 1
+                continue
+            try:
+                item, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if final:
+                    raise
+                break  # element not complete yet
+            if not final and not self._buffer[end:].strip(self._NUMBER_CHARS):
+                break  # a number cut short at '.', 'e' or '-' might still be growing
+            items.append(item)
+            self._pos = end
+            self._state = 'item'
+
+        if self._finished:
+            # Only whitespace may follow the array; anything else means a garbled or concatenated body
+            self._skip()
+            if self._pos < len(self._buffer):
+                raise ValueError("Unexpected data after the JSON array")
+
+        # Drop consumed text so the buffer only holds the incomplete element
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        if final and not self._finished:
+            raise ValueError("Truncated JSON array")
+        return items
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of upstream requests"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for a token and return the number of seconds spent waiting"""
+        if self.rate <= 0:
+            return 0.0
+
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+
+            wait = (1 - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+            return wait
+
+
+# Monotonic time by which the current tool call must finish, if any
+request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('request_deadline', default=None)
+
+
+# Upstream usage of the current tool call, charged to its caller when the call ends
+call_usage: contextvars.ContextVar[Optional[CallUsage]] = contextvars.ContextVar('call_usage', default=None)
+
+
+# Caller named by the deployment (a worker's X-Caller header) for the current tool call, if any
+deployment_caller: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('deployment_caller', default=None)
+
+
+def _charge(requests: int, size: int) -> None:
+    """Add upstream requests and response bytes to the current call's usage"""
+    usage = call_usage.get()
+    if usage is not None:
+        usage.requests += requests
+        usage.bytes += size
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised instead of starting upstream work once the tool call's deadline has passed"""
+
+
+def _request_timeout() -> float:
+    """Upstream timeout for the next request, capped by the current deadline"""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return CW_REQUEST_TIMEOUT
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Deadline exceeded before the upstream request was sent")
+    return min(CW_REQUEST_TIMEOUT, remaining)
+
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_NORMAL = 'normal'
+PRIORITY_BULK = 'bulk'
+PRIORITY_BACKGROUND = 'background'
+
+# Relative share of upstream slots when classes below interactive compete
+PRIORITY_WEIGHTS = {PRIORITY_NORMAL: 8, PRIORITY_BULK: 2, PRIORITY_BACKGROUND: 1}
+
+
+class RequestScheduler:
+    """Hands out a tenant's upstream request slots by priority class
+
+    Interactive requests (single-entity lookups) always go first. The other
+    classes share what is left by weighted fair queuing, so bulk pagination
+    keeps making progress without starving normal traffic.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = max(1, slots)
+        self.active = 0
+        self._queues: dict[str, deque] = {p: deque() for p in (PRIORITY_INTERACTIVE, *PRIORITY_WEIGHTS)}
+        self._finish = {p: 0.0 for p in PRIORITY_WEIGHTS}
+        self._clock = 0.0
+        self._served = {p: 0 for p in self._queues}
+        self._wait_total = {p: 0.0 for p in self._queues}
+        self._wait_max = {p: 0.0 for p in self._queues}
+
+    def _next(self) -> Optional[asyncio.Future]:
+        if self._queues[PRIORITY_INTERACTIVE]:
+            return self._queues[PRIORITY_INTERACTIVE].popleft()
+        backlogged = [p for p in PRIORITY_WEIGHTS if self._queues[p]]
+        if not backlogged:
+            return None
+        priority = min(backlogged, key=lambda p: self._finish[p])
+        self._clock = self._finish[priority]
+        self._finish[priority] += 1 / PRIORITY_WEIGHTS[priority]
+        return self._queues[priority].popleft()
+
+    def _release(self) -> None:
+        while True:
+            waiter = self._next()
+            if waiter is None:
+                self.active -= 1
+                return
+            if not waiter.done():
+                # Hand the slot straight over, so active stays the same
+                waiter.set_result(None)
+                return
+
+    @asynccontextmanager
+    async def slot(self, priority: str = PRIORITY_NORMAL):
+        """Hold one upstream slot for the duration of the block"""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority '{priority}'")
+        started = time.monotonic()
+        if self.active < self.slots and not any(self._queues.values()):
+            self.active += 1
+        else:
+            queue = self._queues[priority]
+            if not queue and priority in self._finish:
+                # A class that was idle doesn't get credit for the time it wasn't queued
+                self._finish[priority] = max(self._finish[priority], self._clock)
+            waiter = asyncio.get_running_loop().create_future()
+            queue.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as we were cancelled
+                    self._release()
+                else:
+                    queue.remove(waiter)
+                raise
+
+        waited = time.monotonic() - started
+        self._served[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def has_headroom(self) -> bool:
+        """True when nothing is queued and at least half the slots are free"""
+        return self.active < max(1, self.slots // 2) and not any(self._queues.values())
+
+    def stats(self) -> dict:
+        """Queue depth and time spent waiting for a slot, per priority class"""
+        return {
+            p: {
+                "queued": len(self._queues[p]),
+                "served": self._served[p],
+                "avg_wait_ms": round(1000 * self._wait_total[p] / self._served[p], 1) if self._served[p] else 0.0,
+                "max_wait_ms": round(1000 * self._wait_max[p], 1),
+            }
+            for p in self._queues
+        }
+
+
+class ResponseCache:
+    """Bounded TTL cache of parsed GET responses for one tenant
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    @staticmethod
+    def key(endpoint: str, params: Optional[dict] = None) -> str:
+        """Build a cache key that does not depend on parameter order"""
+        endpoint = endpoint.strip('/')
+        if not params:
+            return endpoint
+        return f"{endpoint}?{urlencode(sorted((k, str(v)) for k, v in params.items()))}"
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def stale_keys(endpoint: str, record_id: int) -> tuple[list[str], list[str]]:
+        """Keys (exact, prefixes) covering a record, its sub-resources and its endpoint's lists"""
+        endpoint = endpoint.strip('/')
+        record = f"{endpoint}/{record_id}"
+        return [record, endpoint], [f"{record}/", f"{record}?", f"{endpoint}?", f"{endpoint}/count"]
+
+    def invalidate(self, endpoint: str, record_id: int) -> int:
+        """Drop a record, its sub-resources and every list of its endpoint; returns the count"""
+        exact, prefixes = self.stale_keys(endpoint, record_id)
+        stale = [key for key in self._entries if key in exact or key.startswith(tuple(prefixes))]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# orderBy values a page walk can seek under, and whether they sort descending
+_KEYSET_ORDERS = {'': False, 'id': False, 'id asc': False, 'id desc': True}
+
+
+class KeysetCursors:
+    """Where each page of recent page walks ended, so the next page can seek by id
+
+    A request for page N of a list ordered by id (or not ordered at all, which
+    ConnectWise serves in id order) is sent as page 1 of ``id > X``, where X is
+    the last id of page N-1. Upstream cost then stays flat however deep the walk
+    goes, and once a walk seeks, records changing between its pages can't shift
+    it. Cursors are also kept in the disk cache, if any, so bridge-spawned
+    processes continue each other's walks.
+    """
+
+    def __init__(self, ttl: float, disk_cache: Optional[DiskCache] = None, tenant: str = '', max_walks: int = 256):
+        self.ttl = ttl
+        self.disk_cache = disk_cache
+        self.tenant = tenant
+        self.max_walks = max_walks
+        self._walks: OrderedDict[str, tuple[float, dict[int, int]]] = OrderedDict()
+
+    @staticmethod
+    def walk(endpoint: str, params: Optional[dict]) -> Optional[tuple[str, int, bool]]:
+        """(walk key, page, descending) for a list request that can seek by id, else None"""
+        if entity_for_endpoint(endpoint).endswith(('{id}', '/count')):
+            return None
+        params = params or {}
+        order = ' '.join(str(params.get('orderBy') or '').lower().split())
+        if order not in _KEYSET_ORDERS:
+            return None
+        try:
+            page = int(params.get('page', 1))
+        except (TypeError, ValueError):
+            return None
+        descending = _KEYSET_ORDERS[order]
+        query = {k: v for k, v in params.items() if k != 'page'}
+        query['orderBy'] = 'id desc' if descending else 'id asc'
+        return ResponseCache.key(endpoint, query), page, descending
+
+    @staticmethod
+    def seek_params(params: dict, last_id: int, descending: bool) -> dict:
+        """Page 1 of the records after ``last_id`` in the walk's order"""
+        keyset = f"id < {last_id}" if descending else f"id > {last_id}"
+        conditions = params.get('conditions')
+        return {
+            **params,
+            'conditions': f"({conditions}) and {keyset}" if conditions else keyset,
+            'orderBy': 'id desc' if descending else 'id asc',
+            'page': 1,
+        }
+
+    def _disk_key(self, walk: str) -> str:
+        return f"{self.tenant}|keyset|{walk}"
+
+    async def _load(self, key: str) -> dict[int, int]:
+        """The walk's cursors by page, from memory or else from the disk cache"""
+        entry = self._walks.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        cursors: dict[int, int] = {}
+        if self.disk_cache is not None:
+            stored = await asyncio.to_thread(self.disk_cache.get, self._disk_key(key))
+            # JSON turns the page numbers into strings
+            cursors = {int(page): last_id for page, last_id in (stored or {}).items()}
+        return cursors
+
+    async def seek(self, walk: tuple[str, int, bool]) -> Optional[int]:
+        """Last id of the page before this one, if that page was fetched recently"""
+        key, page, _ = walk
+        if self.ttl <= 0 or page < 2:
+            return None
+        return (await self._load(key)).get(page - 1)
+
+    async def record(self, walk: tuple[str, int, bool], data: Any) -> None:
+        """Remember where a page ended, if its records really are in id order
+
+        A page ending somewhere new invalidates the cursors of every later page,
+        which were taken from the earlier version of this one, so the walk
+        only ever seeks from pages fetched after the page before them.
+        """
+        key, page, descending = walk
+        if self.ttl <= 0 or not isinstance(data, list) or not data:
+            return
+        ids = [record.get('id') if isinstance(record, dict) else None for record in data]
+        if not all(isinstance(i, int) for i in ids):
+            return
+        if any(a <= b if descending else a >= b for a, b in zip(ids, ids[1:])):
+            return
+
+        cursors = await self._load(key)
+        known = cursors.get(page) == ids[-1]
+        if not known:
+            cursors = {p: last_id for p, last_id in cursors.items() if p < page}
+            cursors[page] = ids[-1]
+        self._walks[key] = (time.monotonic() + self.ttl, cursors)
+        self._walks.move_to_end(key)
+        while len(self._walks) > self.max_walks:
+            self._walks.popitem(last=False)
+        if self.disk_cache is not None and not known:
+            await asyncio.to_thread(self.disk_cache.set, self._disk_key(key), cursors, self.ttl)
+
+    def __len__(self) -> int:
+        return len(self._walks)
+
+
+class ClientMetrics:
+    """Upstream traffic counters for one tenant, kept across client evictions"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.invalid_conditions = 0
+        self.local_queries = 0
+        self.cache_hits = 0
+        self.disk_cache_hits = 0
+        self.keyset_pages = 0
+        self.batches = 0
+        self.batched_gets = 0
+        self.bytes_received = 0
+        self.latency_total = 0.0
+        self.rate_limit_wait = 0.0
+        self.clients_created = 0
+        self.clients_evicted = 0
+        self.prefetch_issued = 0
+        self.prefetch_hits = 0
+        self.prefetch_skipped = 0
+        self.callbacks = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "invalid_conditions": self.invalid_conditions,
+            "local_queries": self.local_queries,
+            "cache_hits": self.cache_hits,
+            "disk_cache_hits": self.disk_cache_hits,
+            "keyset_pages": self.keyset_pages,
+            "batches": self.batches,
+            "batched_gets": self.batched_gets,
+            "avg_batch_size": round(self.batched_gets / self.batches, 1) if self.batches else 0.0,
+            "batch_requests_saved": self.batched_gets - self.batches,
+            "bytes_received": self.bytes_received,
+            "avg_latency_ms": round(1000 * self.latency_total / self.requests, 1) if self.requests else 0.0,
+            "rate_limit_wait_s": round(self.rate_limit_wait, 3),
+            "clients_created": self.clients_created,
+            "clients_evicted": self.clients_evicted,
+            "prefetch_issued": self.prefetch_issued,
+            "prefetch_hits": self.prefetch_hits,
+            "prefetch_skipped": self.prefetch_skipped,
+            "prefetch_hit_rate": round(self.prefetch_hits / self.prefetch_issued, 3) if self.prefetch_issued else 0.0,
+            "callbacks": self.callbacks,
+        }
+
+
+def _ticket_follow_ups(record: dict) -> list[tuple[str, Optional[dict]]]:
+    # Same parameters as connectwise_get_ticket_notes, so the prefetched page is a cache hit
+    requests = [(f"service/tickets/{record['id']}/notes", {"pageSize": 25})]
+    for field, endpoint in (("company", "company/companies"), ("contact", "company/contacts")):
+        if isinstance(record.get(field), dict) and record[field].get("id"):
+            requests.append((f"{endpoint}/{record[field]['id']}", None))
+    return requests
+
+
+def _company_follow_ups(record: dict) -> list[tuple[str, Optional[dict]]]:
+    if isinstance(record.get("company"), dict) and record["company"].get("id"):
+        return [(f"company/companies/{record['company']['id']}", None)]
+    return []
+
+
+# List endpoints whose results are usually followed by lookups of related records
+PREFETCH_FOLLOW_UPS = {
+    "service/tickets": _ticket_follow_ups,
+    "company/contacts": _company_follow_ups,
+    "sales/opportunities": _company_follow_ups,
+}
+
+
+class Prefetcher:
+    """Warms a client's response cache with the likely follow-ups of a list call
+
+    After a list of tickets, for example, the notes, company and contact of the
+    top results are fetched in the background. Prefetches run one at a time in
+    the background priority class and only when the scheduler has headroom, and
+    at most CW_PREFETCH_BUDGET are issued per minute. A later request served
+    from a prefetched entry counts as a hit.
+    """
+
+    def __init__(self, client: 'ConnectWiseClient', top_n: int, budget: int, ttl: float):
+        self.client = client
+        self.top_n = top_n
+        self.budget = budget
+        self.ttl = ttl
+        self._pending: deque = deque()
+        self._issued: deque = deque()
+        self._unclaimed: OrderedDict[str, float] = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_n > 0 and self.budget > 0 and self.ttl > 0
+
+    def schedule(self, endpoint: str, data: Any) -> None:
+        """Queue the follow-ups of a list response, replacing older predictions"""
+        follow_ups = PREFETCH_FOLLOW_UPS.get(endpoint.strip('/'))
+        if not self.enabled or follow_ups is None or not isinstance(data, list):
+            return
+        requests = []
+        for record in data[:self.top_n]:
+            if isinstance(record, dict) and record.get("id") is not None:
+                requests.extend(follow_ups(record))
+        # The newest list is what the caller is looking at now
+        self._pending = deque(dict.fromkeys((e, json.dumps(p, sort_keys=True)) for e, p in requests))
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    def claim(self, key: str) -> bool:
+        """Record a cache hit; True if the entry was prefetched and not used before"""
+        expires = self._unclaimed.pop(key, None)
+        return expires is not None and expires > time.monotonic()
+
+    def _within_budget(self) -> bool:
+        now = time.monotonic()
+        while self._issued and self._issued[0] < now - 60:
+            self._issued.popleft()
+        return len(self._issued) < self.budget
+
+    async def _run(self) -> None:
+        # Background work must not inherit the deadline of the call that triggered it
+        request_deadline.set(None)
+        metrics = self.client.metrics
+        while self._pending:
+            endpoint, params = self._pending.popleft()
+            params = json.loads(params)
+            key = ResponseCache.key(endpoint, params)
+            if self.client.cache.get(key) is not None:
+                continue
+            if not self._within_budget() or not self.client.scheduler.has_headroom():
+                metrics.prefetch_skipped += 1
+                continue
+            self._issued.append(time.monotonic())
+            metrics.prefetch_issued += 1
+            try:
+                await self.client.get(endpoint, params, priority=PRIORITY_BACKGROUND, cache_ttl=self.ttl)
+            except Exception as e:
+                logger.debug("Prefetch of %s failed: %s", endpoint, e)
+                continue
+            self._unclaimed[key] = time.monotonic() + self.ttl
+            while len(self._unclaimed) > 1000:
+                self._unclaimed.popitem(last=False)
+
+    async def close(self) -> None:
+        self._pending.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def _reference_key(value: dict) -> Optional[str]:
+    """'<type>/<id>' for a nested reference object such as {"id": 5, "name": ..., "_info": {"board_href": ...}}"""
+    record_id = value.get("id")
+    info = value.get("_info")
+    if not isinstance(record_id, int) or not isinstance(info, dict):
+        return None
+    for key in info:
+        if key.endswith("_href"):
+            return f"{key[:-5]}/{record_id}"
+    return None
+
+
+# Reference types (named by their _info href) that list tools can expand, and where they live
+EXPAND_ENDPOINTS = {
+    'company': 'company/companies',
+    'contact': 'company/contacts',
+    'member': 'system/members',
+    'configuration': 'company/configurations',
+    'board': 'service/boards',
+    'ticket': 'service/tickets',
+    'opportunity': 'sales/opportunities',
+    'project': 'project/projects',
+    'agreement': 'finance/agreements',
+}
+# Ids per 'id in (...)' request, and such requests run at once, when expanding references
+EXPAND_BATCH_SIZE = 50
+EXPAND_CONCURRENCY = 4
+
+
+class GetBatcher:
+    """Coalesces concurrent single-record gets into 'id in (...)' list requests
+
+    The first get for a record such as service/tickets/123 opens a batch for
+    its endpoint, which collects further ids for ``window`` seconds or until
+    ``max_size`` are waiting. The batch is then sent as one list request and
+    each caller receives its own record. Ids the list doesn't return are
+    fetched singly, so callers still see the usual 404.
+    """
+
+    def __init__(self, client: 'ConnectWiseClient', window: float, max_size: int):
+        self.client = client
+        self.window = window
+        self.max_size = max_size
+        self._batches: dict[str, dict[int, list[tuple[asyncio.Future, Optional[float]]]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_size > 1
+
+    def split(self, endpoint: str, params: Optional[dict]) -> Optional[tuple[str, int]]:
+        """(list endpoint, id) for a single-record get that can be batched, else None"""
+        if not self.enabled or params:
+            return None
+        base, _, record_id = endpoint.strip('/').rpartition('/')
+        if base not in EXPAND_ENDPOINTS.values() or not record_id.isdigit():
+            return None
+        return base, int(record_id)
+
+    async def load(self, endpoint: str, record_id: int, priority: str) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._batches.get(endpoint)
+        if batch is None:
+            batch = self._batches[endpoint] = {}
+            loop.call_later(self.window, self._flush, endpoint, batch, priority)
+        batch.setdefault(record_id, []).append((future, request_deadline.get()))
+        if len(batch) >= self.max_size:
+            self._flush(endpoint, batch, priority)
+        return await future
+
+    def _flush(self, endpoint: str, batch: dict, priority: str) -> None:
+        if self._batches.get(endpoint) is not batch:
+            return
+        del self._batches[endpoint]
+        task = asyncio.create_task(self._run(endpoint, batch, priority))
+        self.client._background.add(task)
+        task.add_done_callback(self.client._background.discard)
+
+    async def _run(self, endpoint: str, batch: dict, priority: str) -> None:
+        # The shared request may run for as long as its most patient caller waits
+        deadlines = [deadline for waiters in batch.values() for _, deadline in waiters]
+        request_deadline.set(None if None in deadlines else max(deadlines))
+
+        def deliver(record_id: int, result: Any = None, error: Optional[BaseException] = None) -> None:
+            for future, _ in batch[record_id]:
+                if not future.done():
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(result)
+
+        records = {}
+        if len(batch) > 1:
+            self.client.metrics.batches += 1
+            self.client.metrics.batched_gets += len(batch)
+            try:
+                found = await self.client._fetch(endpoint, {
+                    "conditions": f"id in ({','.join(map(str, sorted(batch)))})",
+                    "pageSize": len(batch),
+                }, priority)
+                records = {r.get('id'): r for r in found if isinstance(r, dict)}
+            except Exception as e:
+                logger.warning("Batched get of %d %s records failed, fetching singly: %s", len(batch), endpoint, e)
+
+        async def single(record_id: int) -> None:
+            try:
+                deliver(record_id, await self.client._fetch(f"{endpoint}/{record_id}", None, priority))
+            except Exception as e:
+                deliver(record_id, error=e)
+
+        for record_id, record in records.items():
+            if record_id in batch:
+                deliver(record_id, record)
+        await asyncio.gather(*(single(record_id) for record_id in batch if record_id not in records))
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": round(1000 * self.window, 1),
+            "max_size": self.max_size,
+            "open_batches": len(self._batches),
+        }
+
+
 class ConnectWiseClient:
     """Client for ConnectWise Manage API - Read-only operations"""
     
-    def __init__(self):
-        if not all([CW_COMPANY_ID, CW_PUBLIC_KEY, CW_PRIVATE_KEY]):
-            raise ValueError("ConnectWise credentials not configured")
+    def __init__(
+        self,
+        company_id: Optional[str] = None,
+        public_key: Optional[str] = None,
+        private_key: Optional[str] = None,
+        api_url: Optional[str] = None,
+        api_version: Optional[str] = None,
+        client_id: Optional[str] = None,
+        rate_limit: Optional[float] = None,
+        rate_burst: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        tenant: str = '',
+        metrics: Optional[ClientMetrics] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        disk_cache: Optional[DiskCache] = None,
+    ):
+        self.tenant = tenant or CW_DEFAULT_TENANT
+        self.company_id = company_id or CW_COMPANY_ID
+        public_key = public_key or CW_PUBLIC_KEY
+        private_key = private_key or CW_PRIVATE_KEY
+
+        if transport is None:
+            transport = _build_transport(self.tenant)
+        replaying = isinstance(transport, ReplayTransport)
+        if not replaying and not all([self.company_id, public_key, private_key]):
+            raise ValueError(f"ConnectWise credentials not configured for tenant: {self.tenant}")
         
-        self.base_url = f"{CW_API_URL}/{CW_API_VERSION}/apis/3.0"
+        self.base_url = f"{api_url or CW_API_URL}/{api_version or CW_API_VERSION}/apis/3.0"
         
         # Create Basic Auth header
-        auth_string = f"{CW_COMPANY_ID}+{CW_PUBLIC_KEY}:{CW_PRIVATE_KEY}"
+        auth_string = f"{self.company_id}+{public_key}:{private_key}"
         auth_bytes = auth_string.encode('ascii')
         auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
         
         self.headers = {
             'Authorization': f'Basic {auth_b64}',
             'Content-Type': 'application/json',
-            'clientId': CW_CLIENT_ID,
+            'clientId': client_id or CW_CLIENT_ID,
             'Accept': 'application/json'
         }
-        
-        self.client = httpx.AsyncClient(headers=self.headers, timeout=30.0)
-        logger.info(f"ConnectWise client initialized for company: {CW_COMPANY_ID}")
+
+        rate_limit = CW_RATE_LIMIT if rate_limit is None else rate_limit
+        rate_burst = CW_RATE_BURST if rate_burst is None else rate_burst
+        if CW_SHARED_STATE_PATH != ':memory:':
+            self.rate_limiter = SharedRateLimiter(CW_SHARED_STATE_PATH, self.tenant, rate_limit, rate_burst)
+        else:
+            self.rate_limiter = RateLimiter(rate_limit, rate_burst)
+        self.cache = ResponseCache(CW_CACHE_TTL, CW_CACHE_MAX_ENTRIES)
+        self.disk_cache = disk_cache
+        self.cursors = KeysetCursors(CW_KEYSET_TTL, disk_cache, self.tenant)
+        self.batcher = GetBatcher(self, CW_BATCH_WINDOW_MS / 1000, CW_BATCH_MAX_SIZE)
+        self.datasets: dict[str, tuple[float, Optional[list]]] = {}
+        self._dataset_locks: dict[str, asyncio.Lock] = {}
+        self._snapshot_locks: dict[str, asyncio.Lock] = {}
+        self.analytics = AnalyticsStore(CW_ANALYTICS_DAYS, CW_ANALYTICS_REFRESH)
+        self.prefetcher = Prefetcher(self, CW_PREFETCH_TOP_N, CW_PREFETCH_BUDGET, CW_PREFETCH_TTL)
+        self._background: set[asyncio.Task] = set()
+        self.metrics = metrics or ClientMetrics()
+        self.last_used = time.monotonic()
+        self.active_requests = 0
+
+        self.scheduler = RequestScheduler(max_connections or CW_MAX_CONNECTIONS)
+        limits = httpx.Limits(max_connections=max_connections or CW_MAX_CONNECTIONS)
+        self.client = httpx.AsyncClient(
+            headers=self.headers, timeout=CW_REQUEST_TIMEOUT, limits=limits, transport=transport
+        )
+        logger.info("ConnectWise client initialized for company: %s (tenant: %s)", self.company_id, self.tenant)
     
-    async def get(self, endpoint: str, params: Optional[dict] = None) -> Any:
-        """Make a GET request to ConnectWise API"""
+    def _check_conditions(self, endpoint: str, params: Optional[dict]) -> Optional[dict]:
+        """Validate and canonicalize the conditions parameter, if any"""
+        if not params or not params.get("conditions") or CW_VALIDATE_CONDITIONS == 'off':
+            return params
+        # Reject malformed conditions locally instead of paying for a 400 upstream
+        entity = entity_for_endpoint(endpoint) if CW_VALIDATE_CONDITIONS == 'strict' else None
+        try:
+            conditions = canonicalize_conditions(params["conditions"], entity)
+        except ConditionsError:
+            self.metrics.invalid_conditions += 1
+            raise
+        return {**params, "conditions": conditions}
+
+    async def get(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        priority: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+    ) -> Any:
+        """Make a GET request to ConnectWise API
+
+        Single-entity lookups default to the interactive priority class and
+        everything else to normal; see RequestScheduler. ``cache_ttl`` overrides
+        CW_CACHE_TTL for this response. With a disk cache, misses in memory are
+        looked up on disk before going upstream. The next page of a recent page
+        walk is fetched by id instead of offset; see KeysetCursors. Concurrent
+        single-record gets may share one upstream request; see GetBatcher.
+        """
+        if priority is None:
+            priority = PRIORITY_INTERACTIVE if entity_for_endpoint(endpoint).endswith('{id}') else PRIORITY_NORMAL
+        params = self._check_conditions(endpoint, params)
+        cache_key = ResponseCache.key(endpoint, params)
+        walk = KeysetCursors.walk(endpoint, params)
+        cached = await self._cached(cache_key, cache_ttl)
+        if cached is not None:
+            if self.prefetcher.claim(cache_key):
+                self.metrics.prefetch_hits += 1
+            if walk is not None:
+                await self.cursors.record(walk, cached)
+            return cached
+
+        request_params = params
+        last_id = await self.cursors.seek(walk) if walk is not None else None
+        if last_id is not None:
+            request_params = KeysetCursors.seek_params(params, last_id, walk[2])
+            self.metrics.keyset_pages += 1
+
+        batchable = self.batcher.split(endpoint, params)
+        if batchable is not None:
+            data = await self.batcher.load(*batchable, priority)
+        else:
+            data = await self._fetch(endpoint, request_params, priority)
+
+        await self._store(endpoint, cache_key, data, cache_ttl)
+        if walk is not None:
+            await self.cursors.record(walk, data)
+        if priority != PRIORITY_BACKGROUND:
+            self.prefetcher.schedule(endpoint, data)
+        return data
+
+    async def _fetch(self, endpoint: str, params: Optional[dict], priority: str) -> Any:
+        """Send one GET upstream under the scheduler and rate limiter, bypassing the caches"""
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        logger.info(f"GET request to: {url}")
-        
+        logger.info("GET request to: %s", url, extra={"sample_rate": CW_LOG_SAMPLE_RATE})
+
+        self.active_requests += 1
+        self.metrics.requests += 1
         try:
-            response = await self.client.get(url, params=params)
+            async with self.scheduler.slot(priority):
+                self.metrics.rate_limit_wait += await self.rate_limiter.acquire()
+                started = time.monotonic()
+                response = await self.client.get(url, params=params, timeout=_request_timeout())
+                self.metrics.latency_total += time.monotonic() - started
+            self.metrics.bytes_received += len(response.content)
+            _charge(1, len(response.content))
             response.raise_for_status()
             return response.json()
         except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error: {e.response.status_code} - {e.response.text}")
+            self.metrics.errors += 1
+            logger.error("HTTP error: %s - %s", e.response.status_code, _truncate_body(e.response.content))
             raise
         except Exception as e:
-            logger.error(f"Request failed: {str(e)}")
+            self.metrics.errors += 1
+            logger.error("Request failed: %s", e)
             raise
+        finally:
+            self.active_requests -= 1
+            self.last_used = time.monotonic()
     
+    async def _cached(self, cache_key: str, cache_ttl: Optional[float] = None) -> Any:
+        """A cached response from memory, or from disk (copied into memory), else None"""
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self.metrics.cache_hits += 1
+            return cached
+        if self.disk_cache is not None:
+            cached = await asyncio.to_thread(self.disk_cache.get, f"{self.tenant}|{cache_key}")
+            if cached is not None:
+                self.metrics.disk_cache_hits += 1
+                self.cache.set(cache_key, cached, cache_ttl)
+        return cached
+
+    async def _store(self, endpoint: str, cache_key: str, data: Any, cache_ttl: Optional[float] = None) -> None:
+        self.cache.set(cache_key, data, cache_ttl)
+        if self.disk_cache is not None:
+            ttl = self.disk_cache.ttl_for(entity_for_endpoint(endpoint))
+            await asyncio.to_thread(self.disk_cache.set, f"{self.tenant}|{cache_key}", data, ttl)
+
+    async def expand(self, records: list, fields: list[str]) -> list:
+        """Replace the named reference fields of each record with the full referenced record
+
+        Distinct ids are collected per endpoint. Records already cached are
+        reused and the rest are fetched with 'id in (...)' conditions,
+        EXPAND_BATCH_SIZE ids per request and EXPAND_CONCURRENCY requests at a
+        time. Fetched records are also cached under their single-record key, so
+        a later connectwise_get_company or similar is a cache hit. References
+        that can't be resolved are left as they are.
+        """
+        def target(ref: Any, field: str) -> Optional[str]:
+            if not isinstance(ref, dict) or not isinstance(ref.get('id'), int):
+                return None
+            key = _reference_key(ref)
+            return EXPAND_ENDPOINTS.get(key.split('/')[0] if key else field)
+
+        wanted: dict[str, set[int]] = defaultdict(set)
+        for record in records:
+            if isinstance(record, dict):
+                for field in fields:
+                    endpoint = target(record.get(field), field)
+                    if endpoint is not None:
+                        wanted[endpoint].add(record[field]['id'])
+
+        found: dict[tuple[str, int], dict] = {}
+        batches = []
+        for endpoint, ids in wanted.items():
+            missing = []
+            for record_id in sorted(ids):
+                cached = await self._cached(ResponseCache.key(f"{endpoint}/{record_id}"))
+                if cached is not None:
+                    found[(endpoint, record_id)] = cached
+                else:
+                    missing.append(record_id)
+            for i in range(0, len(missing), EXPAND_BATCH_SIZE):
+                batches.append((endpoint, missing[i:i + EXPAND_BATCH_SIZE]))
+
+        semaphore = asyncio.Semaphore(EXPAND_CONCURRENCY)
+
+        async def fetch(endpoint: str, ids: list[int]) -> list:
+            async with semaphore:
+                return await self.query(endpoint, {
+                    "conditions": f"id in ({','.join(map(str, ids))})",
+                    "pageSize": len(ids),
+                })
+
+        results = await asyncio.gather(*(fetch(endpoint, ids) for endpoint, ids in batches), return_exceptions=True)
+        for (endpoint, ids), result in zip(batches, results):
+            if isinstance(result, BaseException):
+                logger.warning("Could not expand %d %s records: %s", len(ids), endpoint, result)
+                continue
+            for item in result:
+                found[(endpoint, item['id'])] = item
+                await self._store(endpoint, ResponseCache.key(f"{endpoint}/{item['id']}"), item)
+
+        expanded = []
+        for record in records:
+            if isinstance(record, dict):
+                joined = {}
+                for field in fields:
+                    ref = record.get(field)
+                    endpoint = target(ref, field)
+                    full = found.get((endpoint, ref['id'])) if endpoint is not None else None
+                    if full is not None:
+                        # Keep the reference's own href first so the result still reads as that type
+                        joined[field] = {**full, '_info': {**ref.get('_info', {}), **full.get('_info', {})}}
+                if joined:
+                    record = {**record, **joined}
+            expanded.append(record)
+        return expanded
+
+    async def stream(
+        self, endpoint: str, params: Optional[dict] = None, priority: str = PRIORITY_BULK
+    ) -> AsyncIterator[Any]:
+        """Yield the records of a list request as they are parsed from the response body
+
+        Unlike get(), the page is never held in memory as a whole, so callers can
+        project, aggregate or write out records as they arrive. Responses are not
+        cached, and requests default to the bulk priority class.
+        """
+        params = self._check_conditions(endpoint, params)
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        logger.info("GET request to: %s (streamed)", url, extra={"sample_rate": CW_LOG_SAMPLE_RATE})
+
+        self.active_requests += 1
+        self.metrics.requests += 1
+        try:
+            async with self.scheduler.slot(priority):
+                self.metrics.rate_limit_wait += await self.rate_limiter.acquire()
+                started = time.monotonic()
+                _charge(1, 0)
+                async with self.client.stream("GET", url, params=params, timeout=_request_timeout()) as response:
+                    if response.is_error:
+                        await response.aread()
+                        self.metrics.bytes_received += len(response.content)
+                        _charge(0, len(response.content))
+                        response.raise_for_status()
+                    parser = JSONArrayParser()
+                    async for chunk in response.aiter_bytes():
+                        self.metrics.bytes_received += len(chunk)
+                        _charge(0, len(chunk))
+                        for record in parser.feed(chunk):
+                            yield record
+                    for record in parser.feed(b'', final=True):
+                        yield record
+                self.metrics.latency_total += time.monotonic() - started
+        except httpx.HTTPStatusError as e:
+            self.metrics.errors += 1
+            logger.error("HTTP error: %s - %s", e.response.status_code, _truncate_body(e.response.content))
+            raise
+        except Exception as e:
+            self.metrics.errors += 1
+            logger.error("Request failed: %s", e)
+            raise
+        finally:
+            self.active_requests -= 1
+            self.last_used = time.monotonic()
+
+    async def query(self, endpoint: str, params: Optional[dict] = None) -> Any:
+        """Run a list query, evaluating it in memory for reference data endpoints
+
+        Conditions, orderBy and paging are applied locally to the endpoint's full
+        record set, which is loaded once and kept for CW_LOCAL_QUERY_TTL seconds.
+        Other endpoints, and sets larger than CW_LOCAL_QUERY_MAX_RECORDS, go upstream.
+        """
+        if CW_LOCAL_QUERY_TTL <= 0 or entity_for_endpoint(endpoint) not in LOCAL_QUERY_ENDPOINTS:
+            return await self.get(endpoint, params)
+
+        params = self._check_conditions(endpoint, params) or {}
+        records = await self._load_dataset(endpoint)
+        if records is None:
+            return await self.get(endpoint, params)
+
+        self.metrics.local_queries += 1
+        return apply_query(
+            records,
+            conditions=params.get("conditions"),
+            order_by=params.get("orderBy"),
+            page=int(params.get("page", 1)),
+            page_size=int(params.get("pageSize", 25)),
+        )
+
+    async def _load_dataset(self, endpoint: str) -> Optional[list]:
+        """Return every record of an endpoint, or None if it is too large to hold"""
+        entry = self.datasets.get(endpoint)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        lock = self._dataset_locks.setdefault(endpoint, asyncio.Lock())
+        async with lock:
+            entry = self.datasets.get(endpoint)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+
+            records: Optional[list] = []
+            page = 1
+            while True:
+                batch = await self.get(endpoint, {"orderBy": "id asc", "page": page, "pageSize": 1000})
+                records.extend(batch)
+                if len(batch) < 1000:
+                    break
+                if len(records) >= CW_LOCAL_QUERY_MAX_RECORDS:
+                    logger.info("Not holding %s in memory, more than %d records", endpoint, CW_LOCAL_QUERY_MAX_RECORDS)
+                    records = None
+                    break
+                page += 1
+
+            self.datasets[endpoint] = (time.monotonic() + CW_LOCAL_QUERY_TTL, records)
+            return records
+
+    async def board_snapshot(self, board_id: int, include_closed: bool = False) -> dict:
+        """Ticket counts per status, priority and owner for one service board
+
+        Statuses and priorities come from the in-memory reference data, and
+        each is counted with a /count request, all sent at once. Owners are
+        counted from a projection of just the owner field, skipped when the
+        board holds more than CW_SNAPSHOT_OWNER_SCAN tickets. Snapshots are
+        reused for CW_SNAPSHOT_TTL seconds, and concurrent calls for one board
+        share a single refresh.
+        """
+        # Under service/tickets/count, so a ticket callback also drops the snapshot
+        key = ResponseCache.key("service/tickets/count", {"snapshot": board_id, "closed": include_closed})
+        snapshot = self.cache.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        lock = self._snapshot_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            snapshot = self.cache.get(key)
+            if snapshot is not None:
+                return snapshot
+
+            statuses, priorities = await asyncio.gather(
+                self.query(f"service/boards/{board_id}/statuses", {"pageSize": 1000}),
+                self.query("service/priorities", {"pageSize": 1000}),
+            )
+            statuses = [
+                s for s in statuses
+                if not s.get("inactive") and (include_closed or not s.get("closedStatus"))
+            ]
+            base = f"board/id = {board_id}" if include_closed else f"board/id = {board_id} AND closedFlag = false"
+
+            async def count(conditions: str) -> int:
+                data = await self.get(
+                    "service/tickets/count", {"conditions": conditions},
+                    priority=PRIORITY_INTERACTIVE, cache_ttl=CW_SNAPSHOT_TTL,
+                )
+                return int(data.get("count", 0))
+
+            counts = await asyncio.gather(
+                count(base),
+                *(count(f"{base} AND status/id = {s['id']}") for s in statuses),
+                *(count(f"{base} AND priority/id = {p['id']}") for p in priorities),
+            )
+            total = counts[0]
+            by_status = counts[1:1 + len(statuses)]
+            by_priority = counts[1 + len(statuses):]
+
+            snapshot = {
+                "board_id": board_id,
+                "total": total,
+                "by_status": {s.get("name", str(s["id"])): n for s, n in zip(statuses, by_status)},
+                "by_priority": {p.get("name", str(p["id"])): n for p, n in zip(priorities, by_priority) if n},
+                "by_owner": await self._count_owners(base, total),
+                "as_of": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            }
+            self.cache.set(key, snapshot, CW_SNAPSHOT_TTL)
+            return snapshot
+
+    async def _count_owners(self, conditions: str, total: int) -> Optional[dict]:
+        """Tickets per owner identifier, from an owner-only projection walked by id
+
+        Each page asks for ``id >`` the last id of the one before, bypassing the
+        caches and KeysetCursors, so every ticket is counted exactly once.
+        """
+        if total > CW_SNAPSHOT_OWNER_SCAN:
+            logger.info("Not counting owners of %d tickets, more than %d", total, CW_SNAPSHOT_OWNER_SCAN)
+            return None
+        owners: dict[str, int] = defaultdict(int)
+        first = {"conditions": conditions, "fields": "id,owner/identifier", "orderBy": "id asc", "pageSize": 1000}
+        params = first
+        while True:
+            page = await self._fetch(
+                "service/tickets", self._check_conditions("service/tickets", params), PRIORITY_INTERACTIVE
+            )
+            for ticket in page:
+                owners[(ticket.get("owner") or {}).get("identifier") or "(unassigned)"] += 1
+            if len(page) < 1000:
+                break
+            params = KeysetCursors.seek_params(first, page[-1]["id"], False)
+        return dict(sorted(owners.items(), key=lambda item: -item[1]))
+
+    async def invalidate(self, event: CallbackEvent) -> dict:
+        """Forget everything held about a record that ConnectWise reported as changed
+
+        Cached responses for the record and its endpoint's lists are dropped,
+        in-memory reference datasets and report tables are marked stale, and a
+        record that was cached is fetched again in the background.
+        """
+        record_key = ResponseCache.key(f"{event.endpoint}/{event.record_id}")
+        was_cached = self.cache.get(record_key) is not None
+        dropped = self.cache.invalidate(event.endpoint, event.record_id)
+
+        if self.datasets.pop(event.endpoint, None) is not None:
+            dropped += 1
+        for table in self.analytics.tables.values():
+            if table.spec.endpoint == event.endpoint:
+                # Deletions are only picked up by a full rebuild
+                table.refreshed_at = 0.0
+                if event.action == 'deleted':
+                    table.rebuilt_at = 0.0
+
+        refresh = was_cached and event.action != 'deleted'
+        if refresh:
+            task = asyncio.create_task(self._refresh(record_key))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        return {"invalidated": dropped, "refreshing": refresh}
+
+    async def _refresh(self, endpoint: str) -> None:
+        request_deadline.set(None)
+        try:
+            await self.get(endpoint, priority=PRIORITY_BACKGROUND)
+        except Exception as e:
+            logger.debug("Refresh of %s failed: %s", endpoint, e)
+
     async def close(self):
-        """Close the HTTP client"""
+        """Stop background prefetching and close the HTTP client"""
+        await self.prefetcher.close()
+        for task in list(self._background):
+            task.cancel()
         await self.client.aclose()
 
-# Initialize ConnectWise client
+
+class TenantRegistry:
+    """Lazily created ConnectWise clients, one per configured tenant
+
+    Each tenant gets its own connection pool, rate limiter and response cache.
+    Clients that stay idle for longer than ``idle_timeout`` seconds are closed
+    and transparently recreated on next use; metrics survive eviction.
+    """
+
+    def __init__(
+        self,
+        configs: dict[str, dict],
+        default: str,
+        idle_timeout: float,
+        disk_cache: Optional[DiskCache] = None,
+    ):
+        self.configs = configs
+        self.default = default
+        self.idle_timeout = idle_timeout
+        self.disk_cache = disk_cache
+        self.clients: dict[str, ConnectWiseClient] = {}
+        self.metrics: dict[str, ClientMetrics] = {name: ClientMetrics() for name in configs}
+
+    @classmethod
+    def from_env(cls) -> 'TenantRegistry':
+        """Build the registry from CW_* variables and the optional CW_TENANTS_FILE"""
+        configs: dict[str, dict] = {}
+        if all([CW_COMPANY_ID, CW_PUBLIC_KEY, CW_PRIVATE_KEY]) or CW_CASSETTE_MODE == 'replay':
+            configs[CW_DEFAULT_TENANT] = {}
+        if CW_TENANTS_FILE:
+            with open(CW_TENANTS_FILE, encoding='utf-8') as f:
+                configs.update(json.load(f))
+        if not configs:
+            raise ValueError("ConnectWise credentials not configured")
+        disk_cache = None
+        if CW_DISK_CACHE_PATH:
+            disk_cache = DiskCache(
+                CW_DISK_CACHE_PATH,
+                int(CW_DISK_CACHE_MAX_MB * 1024 * 1024),
+                CW_DISK_CACHE_TTL,
+                parse_ttls(CW_DISK_CACHE_TTLS),
+            )
+        return cls(configs, CW_DEFAULT_TENANT, CW_TENANT_IDLE_TIMEOUT, disk_cache)
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(self.configs)
+
+    @property
+    def multi_tenant(self) -> bool:
+        return len(self.configs) > 1 or self.default not in self.configs
+
+    async def get(self, tenant: Optional[str] = None) -> ConnectWiseClient:
+        """Return the client for a tenant, creating it if needed"""
+        name = tenant or self.default
+        if name not in self.configs:
+            if tenant:
+                raise ValueError(f"Unknown tenant: {tenant}")
+            raise ValueError(f"tenant is required (one of: {', '.join(self.names)})")
+
+        await self.evict_idle()
+        client = self.clients.get(name)
+        if client is None:
+            client = ConnectWiseClient(
+                **self.configs[name], tenant=name, metrics=self.metrics[name], disk_cache=self.disk_cache
+            )
+            self.metrics[name].clients_created += 1
+            self.clients[name] = client
+        client.last_used = time.monotonic()
+        return client
+
+    async def evict_idle(self) -> None:
+        """Close clients that have been idle for longer than the idle timeout"""
+        if self.idle_timeout <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        for name, client in list(self.clients.items()):
+            if client.active_requests == 0 and client.last_used < cutoff:
+                logger.info("Evicting idle ConnectWise client for tenant: %s", name)
+                del self.clients[name]
+                self.metrics[name].clients_evicted += 1
+                await client.close()
+
+    async def invalidate(self, tenant: str, event: CallbackEvent, disk: bool = True) -> dict:
+        """Apply a change callback to the disk cache and to a tenant's client, if it is running
+
+        ``disk=False`` leaves the disk cache alone, for a callback another process already applied.
+        """
+        if tenant not in self.configs:
+            raise CallbackError(f"Unknown tenant: {tenant}")
+        self.metrics[tenant].callbacks += 1
+        dropped = 0
+        if disk and self.disk_cache is not None:
+            # Clear the disk first so the client's background refresh isn't answered from it
+            exact, prefixes = ResponseCache.stale_keys(event.endpoint, event.record_id)
+            dropped = await asyncio.to_thread(
+                self.disk_cache.invalidate,
+                [f"{tenant}|{key}" for key in prefixes],
+                [f"{tenant}|{key}" for key in exact],
+            )
+        client = self.clients.get(tenant)
+        if client is None:
+            return {"invalidated": dropped, "refreshing": False}
+        result = await client.invalidate(event)
+        result["invalidated"] += dropped
+        return result
+
+    async def close(self) -> None:
+        for client in self.clients.values():
+            await client.close()
+        self.clients.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "active": name in self.clients,
+                "cached_responses": len(self.clients[name].cache) if name in self.clients else 0,
+                "queues": self.clients[name].scheduler.stats() if name in self.clients else {},
+                "analytics": self.clients[name].analytics.stats() if name in self.clients else {},
+                "batching": self.clients[name].batcher.stats() if name in self.clients else {},
+                **self.metrics[name].snapshot(),
+            }
+            for name in self.names
+        }
+
+
+# Initialize ConnectWise clients
 try:
-    cw_client = ConnectWiseClient()
+    tenants = TenantRegistry.from_env()
 except Exception as e:
-    logger.error(f"Failed to initialize ConnectWise client: {str(e)}")
+    logger.error("Failed to initialize ConnectWise client: %s", e)
+    raise
+
+
+def _load_budgets() -> CallerBudgets:
+    """Caller quotas from CW_CALLER_* variables and the optional CW_CALLERS_FILE"""
+    default = Quota(CW_CALLER_REQUESTS_PER_MINUTE, CW_CALLER_REQUESTS_PER_HOUR, CW_CALLER_MB_PER_HOUR)
+    quotas = {}
+    if CW_CALLERS_FILE:
+        with open(CW_CALLERS_FILE, encoding='utf-8') as f:
+            for caller, quota in json.load(f).items():
+                quotas[caller] = Quota.from_dict(quota, default)
+    return CallerBudgets(CW_SHARED_STATE_PATH, default, quotas)
+
+
+try:
+    budgets = _load_budgets()
+except (OSError, ValueError, TypeError) as e:
+    logger.error("Failed to load caller quotas: %s", e)
     raise
 
+# Started by main() when CW_CALLBACK_PORT is set
+callback_server: Optional[CallbackServer] = None
+# Set in the worker that runs the receiver, to pass its callbacks on to the other workers
+invalidation_log: Optional[InvalidationLog] = None
+
+
+async def _feed_fetch(tenant: str, endpoint: str, params: dict) -> list:
+    """One page for the feed poller, always from upstream since a cached page would hide changes"""
+    client = await tenants.get(tenant)
+    return await client._fetch(endpoint, client._check_conditions(endpoint, params), PRIORITY_BACKGROUND)
+
+
+async def _feed_notify(session: Any, uri: str) -> None:
+    await session.send_resource_updated(AnyUrl(uri))
+
+
+feeds = FeedHub(
+    _feed_fetch, _feed_notify, tenants.default, CW_FEED_INTERVAL, CW_FEED_MAX_RECORDS, CW_FEED_MAX_PAGES
+)
+
 # Initialize MCP server
 app = Server("connectwise-mcp-server")
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List all available read-only ConnectWise tools"""
-    return [
+    tools = [
         # Company endpoints
         Tool(
             name="connectwise_get_companies",
@@ -816,183 +2449,459 @@ async def list_tools() -> list[Tool]:
                 "required": ["ticket_id"]
             }
         ),
+
+        Tool(
+            name="connectwise_board_snapshot",
+            description="Current ticket counts per status, priority and owner for a service board. One fast call with a small result; use it instead of pulling the board's tickets.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "board_id": {
+                        "type": "integer",
+                        "description": "Board ID"
+                    },
+                    "include_closed": {
+                        "type": "boolean",
+                        "description": "Also count closed tickets and closed statuses",
+                        "default": False
+                    }
+                },
+                "required": ["board_id"]
+            }
+        ),
+
+        # Reporting
+        Tool(
+            name="connectwise_get_report",
+            description="Grouped totals over time entries, expenses or invoices (e.g. hours per member per month). Answered from an in-memory columnar store, so it is much faster than paging through entries.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "dataset": {
+                        "type": "string",
+                        "description": "Data to report on",
+                        "enum": list(DATASETS)
+                    },
+                    "group_by": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Columns to group by: a period (day, week, month, year) and/or member, company, work_type, type, status, billable"
+                    },
+                    "measures": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Values to sum (time: hours, billed_hours; expenses: amount, bill_amount; invoices: total, subtotal, balance). Defaults to all"
+                    },
+                    "start_date": {
+                        "type": "string",
+                        "description": "First day to include (YYYY-MM-DD)"
+                    },
+                    "end_date": {
+                        "type": "string",
+                        "description": "Last day to include (YYYY-MM-DD)"
+                    },
+                    "filters": {
+                        "type": "object",
+                        "description": "Exact column matches, e.g. {\"member\": \"jsmith\", \"billable\": \"Billable\"}"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum rows to return",
+                        "default": 100
+                    }
+                },
+                "required": ["dataset"]
+            }
+        ),
+
+        # Bulk export
+        Tool(
+            name="connectwise_export",
+            description="Export every record of a list endpoint (e.g. service/tickets, time/entries, company/configurations) to a gzip-compressed NDJSON file on the server. Resumes an interrupted export of the same file.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "endpoint": {
+                        "type": "string",
+                        "description": "List endpoint to export, e.g. 'service/tickets'"
+                    },
+                    "filename": {
+                        "type": "string",
+                        "description": "Output file name inside the export directory, e.g. 'tickets.ndjson.gz'"
+                    },
+                    "conditions": {
+                        "type": "string",
+                        "description": "Optional filter conditions"
+                    },
+                    "fields": {
+                        "type": "string",
+                        "description": "Optional comma-separated fields to keep, e.g. 'id,summary,status/name'"
+                    },
+                    "page_size": {
+                        "type": "integer",
+                        "description": "Records per upstream request (max 1000)",
+                        "default": 1000
+                    },
+                    "resume": {
+                        "type": "boolean",
+                        "description": "Continue an interrupted export instead of starting over",
+                        "default": True
+                    }
+                },
+                "required": ["endpoint", "filename"]
+            }
+        ),
+
+        # Server diagnostics
+        Tool(
+            name="connectwise_get_server_stats",
+            description="Get per-tenant upstream request, cache and latency metrics for this server",
+            inputSchema={
+                "type": "object",
+                "properties": {}
+            }
+        ),
     ]
 
+    for tool in tools:
+        tool.inputSchema["properties"]["timeout"] = {
+            "type": "number",
+            "exclusiveMinimum": 0,
+            "description": "Seconds to allow for this call; remaining upstream requests are cancelled after it"
+        }
+        tool.inputSchema["properties"]["caller"] = {
+            "type": "string",
+            "description": "Who this call is for; its upstream usage is charged to that caller's quota. "
+                           "Ignored when the deployment names the caller itself"
+        }
+        if "pageSize" in tool.inputSchema["properties"]:
+            tool.inputSchema["properties"]["expand"] = {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Reference fields to replace with the full record, e.g. [\"company\", \"contact\", \"owner\"]; "
+                               "fetched in batches, so no follow-up get calls are needed"
+            }
+            tool.inputSchema["properties"]["format"] = {
+                "type": "string",
+                "enum": ["records", "normalized"],
+                "description": "normalized lists each distinct company, board, status, member etc. once under refs, "
+                               "and records refer to them by key (e.g. \"company/250\"); saves tokens on large pages"
+            }
+
+    if tenants.multi_tenant:
+        # Every tool accepts the tenant it should run against
+        for tool in tools:
+            tool.inputSchema["properties"]["tenant"] = {
+                "type": "string",
+                "description": "ConnectWise tenant to query",
+                "enum": tenants.names
+            }
+            if tenants.default not in tenants.configs:
+                tool.inputSchema.setdefault("required", []).append("tenant")
+    return tools
+
+def _parse_timeout(value: Any) -> float:
+    """Seconds a call may take: its timeout argument if given, else CW_TOOL_TIMEOUT (0 = no deadline)"""
+    if value is None:
+        return CW_TOOL_TIMEOUT
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"timeout must be a number of seconds, got {value!r}") from None
+    if not math.isfinite(timeout) or timeout <= 0:
+        raise ValueError(f"timeout must be a positive number of seconds, got {value!r}")
+    return timeout
+
+async def _admit(caller: str, deadline: Optional[float]) -> Optional[Verdict]:
+    """Admit a call if its caller is within quota, else return why not
+
+    With CW_CALLER_OVER_QUOTA=queue the call instead waits until the caller's
+    usage has aged out of the window, unless that would pass its deadline.
+    """
+    if budgets.quota(caller).unlimited:
+        return None
+    if deadline is None:
+        deadline = time.monotonic() + CW_CALLER_MAX_QUEUE
+    while True:
+        verdict = await asyncio.to_thread(budgets.check, caller)
+        if verdict is None:
+            return None
+        if CW_CALLER_OVER_QUOTA != 'queue' or time.monotonic() + verdict.retry_after > deadline:
+            await asyncio.to_thread(budgets.record, caller, rejected=1)
+            logger.warning("Rejected call: %s", verdict.reason)
+            return verdict
+        await asyncio.sleep(verdict.retry_after)
+
 @app.call_tool()
 async def call_tool(name: str, arguments: Any) -> list[TextContent]:
+    """Run a tool call under its deadline and its caller's quota
+
+    The deadline comes from the timeout argument or CW_TOOL_TIMEOUT. When it
+    expires, or the client cancels the MCP request, the call's task is
+    cancelled, which aborts in-flight upstream requests and returns their
+    connections to the pool. The call's upstream requests and bytes are
+    charged to its caller: the one the deployment names (X-Caller or
+    CW_CALLER) if any, else the self-declared caller argument.
+    """
+    arguments = dict(arguments or {})
+    try:
+        # Worker mode doesn't check arguments against the schema, so this may be anything
+        timeout = _parse_timeout(arguments.pop("timeout", None))
+    except ValueError as e:
+        return [TextContent(type="text", text=json.dumps({"error": str(e)}))]
+    named = arguments.pop("caller", None)
+    caller = deployment_caller.get() or CW_CALLER or str(named or CW_DEFAULT_CALLER)
+    deadline = time.monotonic() + timeout if timeout > 0 else None
+
+    verdict = await _admit(caller, deadline)
+    if verdict is not None:
+        return [TextContent(type="text", text=json.dumps({
+            "error": f"{verdict.reason}; retry in {math.ceil(verdict.retry_after)}s",
+            "retry_after": math.ceil(verdict.retry_after),
+        }))]
+
+    usage = CallUsage()
+    usage_token = call_usage.set(usage)
+    try:
+        if deadline is None:
+            return await _call_tool(name, arguments)
+        token = request_deadline.set(deadline)
+        try:
+            return await asyncio.wait_for(_call_tool(name, arguments), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            logger.warning("Tool %s cancelled after its %ss deadline", name, timeout)
+            return [TextContent(
+                type="text",
+                text=json.dumps({"error": f"Deadline of {timeout:g}s exceeded"})
+            )]
+        finally:
+            request_deadline.reset(token)
+    finally:
+        call_usage.reset(usage_token)
+        await asyncio.to_thread(budgets.record, caller, calls=1, requests=usage.requests, size=usage.bytes)
+
+async def _call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Handle tool calls for read-only ConnectWise operations"""
     try:
+        if name == "connectwise_get_server_stats":
+            stats = {"tenants": tenants.stats()}
+            if callback_server is not None:
+                stats["callbacks"] = callback_server.stats()
+            if tenants.disk_cache is not None:
+                stats["disk_cache"] = await asyncio.to_thread(tenants.disk_cache.stats)
+            stats["top_callers"] = await asyncio.to_thread(budgets.top)
+            stats["feeds"] = feeds.stats()
+            return [TextContent(type="text", text=json.dumps(stats, indent=2))]
+
+        client = await tenants.get(arguments.get("tenant"))
+
         # Companies
         if name == "connectwise_get_companies":
             params = _build_params(arguments)
-            data = await cw_client.get("company/companies", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("company/companies", params=params)
+            return await _respond(client, data, arguments)
         
         elif name == "connectwise_get_company":
             company_id = arguments.get("company_id")
-            data = await cw_client.get(f"company/companies/{company_id}")
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get(f"company/companies/{company_id}")
+            return await _respond(client, data, arguments)
         
         # Tickets
         elif name == "connectwise_get_tickets":
             params = _build_params(arguments)
-            data = await cw_client.get("service/tickets", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("service/tickets", params=params)
+            return await _respond(client, data, arguments)
         
         elif name == "connectwise_get_ticket":
             ticket_id = arguments.get("ticket_id")
-            data = await cw_client.get(f"service/tickets/{ticket_id}")
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get(f"service/tickets/{ticket_id}")
+            return await _respond(client, data, arguments)
         
         elif name == "connectwise_get_ticket_notes":
             ticket_id = arguments.get("ticket_id")
             page_size = arguments.get("pageSize", 25)
             params = {"pageSize": page_size}
-            data = await cw_client.get(f"service/tickets/{ticket_id}/notes", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get(f"service/tickets/{ticket_id}/notes", params=params)
+            return await _respond(client, data, arguments)
         
         # Contacts
         elif name == "connectwise_get_contacts":
             params = _build_params(arguments)
-            data = await cw_client.get("company/contacts", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("company/contacts", params=params)
+            return await _respond(client, data, arguments)
         
         elif name == "connectwise_get_contact":
             contact_id = arguments.get("contact_id")
-            data = await cw_client.get(f"company/contacts/{contact_id}")
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get(f"company/contacts/{contact_id}")
+            return await _respond(client, data, arguments)
         
         # Opportunities
         elif name == "connectwise_get_opportunities":
             params = _build_params(arguments)
-            data = await cw_client.get("sales/opportunities", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("sales/opportunities", params=params)
+            return await _respond(client, data, arguments)
         
         # Agreements
         elif name == "connectwise_get_agreements":
             params = _build_params(arguments)
-            data = await cw_client.get("finance/agreements", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("finance/agreements", params=params)
+            return await _respond(client, data, arguments)
         
         # Time Entries
         elif name == "connectwise_get_time_entries":
             params = _build_params(arguments)
-            data = await cw_client.get("time/entries", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("time/entries", params=params)
+            return await _respond(client, data, arguments)
         
         # Projects
         elif name == "connectwise_get_projects":
             params = _build_params(arguments)
-            data = await cw_client.get("project/projects", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("project/projects", params=params)
+            return await _respond(client, data, arguments)
         
         # Activities
         elif name == "connectwise_get_activities":
             params = _build_params(arguments)
-            data = await cw_client.get("sales/activities", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("sales/activities", params=params)
+            return await _respond(client, data, arguments)
         
         # Members
         elif name == "connectwise_get_members":
             params = _build_params(arguments)
-            data = await cw_client.get("system/members", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query("system/members", params=params)
+            return await _respond(client, data, arguments)
 
         # IT Asset Management - Configurations
         elif name == "connectwise_get_configurations":
             params = _build_params(arguments)
-            data = await cw_client.get("company/configurations", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("company/configurations", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_configuration":
             configuration_id = arguments.get("configuration_id")
-            data = await cw_client.get(f"company/configurations/{configuration_id}")
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get(f"company/configurations/{configuration_id}")
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_configuration_types":
             params = _build_params(arguments)
-            data = await cw_client.get("company/configurations/types", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query("company/configurations/types", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_company_sites":
             company_id = arguments.get("company_id")
             params = _build_params(arguments)
-            data = await cw_client.get(f"company/companies/{company_id}/sites", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get(f"company/companies/{company_id}/sites", params=params)
+            return await _respond(client, data, arguments)
 
         # Reference Data - Company
         elif name == "connectwise_get_company_types":
             params = _build_params(arguments)
-            data = await cw_client.get("company/companies/types", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query("company/companies/types", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_company_statuses":
             params = _build_params(arguments)
-            data = await cw_client.get("company/companies/statuses", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query("company/companies/statuses", params=params)
+            return await _respond(client, data, arguments)
 
         # Reference Data - Tickets
         elif name == "connectwise_get_ticket_priorities":
             params = _build_params(arguments)
-            data = await cw_client.get("service/priorities", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query("service/priorities", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_ticket_sources":
             params = _build_params(arguments)
-            data = await cw_client.get("service/sources", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query("service/sources", params=params)
+            return await _respond(client, data, arguments)
 
         # Reference Data - Contacts
         elif name == "connectwise_get_contact_types":
             params = _build_params(arguments)
-            data = await cw_client.get("company/contacts/types", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query("company/contacts/types", params=params)
+            return await _respond(client, data, arguments)
 
         # Finance & Billing
         elif name == "connectwise_get_invoices":
             params = _build_params(arguments)
-            data = await cw_client.get("finance/invoices", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("finance/invoices", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_expense_entries":
             params = _build_params(arguments)
-            data = await cw_client.get("expense/entries", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get("expense/entries", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_billing_cycles":
             params = _build_params(arguments)
-            data = await cw_client.get("finance/billingCycles", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query("finance/billingCycles", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_agreement_additions":
             agreement_id = arguments.get("agreement_id")
             params = _build_params(arguments)
-            data = await cw_client.get(f"finance/agreements/{agreement_id}/additions", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get(f"finance/agreements/{agreement_id}/additions", params=params)
+            return await _respond(client, data, arguments)
 
         # Service Desk Enhancements
         elif name == "connectwise_get_service_boards":
             params = _build_params(arguments)
-            data = await cw_client.get("service/boards", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query("service/boards", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_board_statuses":
             board_id = arguments.get("board_id")
             params = _build_params(arguments)
-            data = await cw_client.get(f"service/boards/{board_id}/statuses", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.query(f"service/boards/{board_id}/statuses", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_ticket_tasks":
             ticket_id = arguments.get("ticket_id")
             params = _build_params(arguments)
-            data = await cw_client.get(f"service/tickets/{ticket_id}/tasks", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get(f"service/tickets/{ticket_id}/tasks", params=params)
+            return await _respond(client, data, arguments)
 
         elif name == "connectwise_get_ticket_schedules":
             ticket_id = arguments.get("ticket_id")
             params = _build_params(arguments)
-            data = await cw_client.get(f"service/tickets/{ticket_id}/scheduleentries", params=params)
-            return [TextContent(type="text", text=json.dumps(data, indent=2))]
+            data = await client.get(f"service/tickets/{ticket_id}/scheduleentries", params=params)
+            return await _respond(client, data, arguments)
+
+        elif name == "connectwise_board_snapshot":
+            board_id = int(arguments.get("board_id"))
+            data = await client.board_snapshot(board_id, bool(arguments.get("include_closed", False)))
+            return await _respond(client, data, arguments)
+
+        # Reporting
+        elif name == "connectwise_get_report":
+            table = await client.analytics.table(arguments.get("dataset"), client.stream)
+            rows = table.report(
+                group_by=arguments.get("group_by") or [],
+                measures=arguments.get("measures"),
+                start=parse_day(arguments.get("start_date"), "start_date"),
+                end=parse_day(arguments.get("end_date"), "end_date"),
+                filters=arguments.get("filters"),
+            )
+            limit = arguments.get("limit", 100)
+            data = {"dataset": arguments.get("dataset"), "total_groups": len(rows), "rows": rows[:limit]}
+            return await _respond(client, data, arguments)
+
+        # Bulk export
+        elif name == "connectwise_export":
+            filename = os.path.basename(arguments.get("filename") or "")
+            if not filename or filename != arguments.get("filename"):
+                raise ValueError("filename must be a plain file name inside the export directory")
+            os.makedirs(CW_EXPORT_DIR, exist_ok=True)
+            data = await export_endpoint(
+                client.stream,
+                _export_endpoint_path(arguments.get("endpoint")),
+                os.path.join(CW_EXPORT_DIR, filename),
+                conditions=arguments.get("conditions"),
+                fields=arguments.get("fields"),
+                page_size=arguments.get("page_size", 1000),
+                resume=arguments.get("resume", True),
+            )
+            return await _respond(client, data, arguments)
 
         else:
             return [TextContent(
@@ -1001,12 +2910,117 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
             )]
             
     except Exception as e:
-        logger.error(f"Error executing tool {name}: {str(e)}")
+        logger.error("Error executing tool %s: %s", name, e)
         return [TextContent(
             type="text",
             text=json.dumps({"error": str(e)})
         )]
 
+@app.list_resources()
+async def list_resources() -> list[Resource]:
+    """Change feeds currently being watched"""
+    return [
+        Resource(uri=AnyUrl(uri), name=uri.split('://', 1)[1], mimeType="application/json",
+                 description=f"Changes to {feed.endpoint}" + (f" where {feed.conditions}" if feed.conditions else ""))
+        for uri, feed in feeds.feeds.items()
+    ]
+
+@app.list_resource_templates()
+async def list_resource_templates() -> list[ResourceTemplate]:
+    return [ResourceTemplate(
+        uriTemplate=FEED_URI_TEMPLATE,
+        name="connectwise-feed",
+        mimeType="application/json",
+        description=(
+            f"Records of a ConnectWise query that changed since you last read it. name is one of "
+            f"{', '.join(FEED_ENDPOINTS)}; conditions uses the API syntax. Subscribe to be notified "
+            "of changes; the first read returns every matching record, later reads only changed and removed ones."
+        ),
+    )]
+
+@app.read_resource()
+async def read_resource(uri: AnyUrl) -> list[ReadResourceContents]:
+    body = await feeds.read(str(uri), app.request_context.session)
+    return [ReadResourceContents(content=json.dumps(body, indent=2), mime_type="application/json")]
+
+@app.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl) -> None:
+    await feeds.subscribe(str(uri), app.request_context.session)
+
+@app.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    await feeds.unsubscribe(str(uri), app.request_context.session)
+
+async def _on_callback(tenant: str, event: CallbackEvent) -> dict:
+    """Apply a change callback and let the feeds pick the change up right away"""
+    result = await tenants.invalidate(tenant, event)
+    if invalidation_log is not None:
+        await asyncio.to_thread(invalidation_log.append, tenant, event.endpoint, event.record_id, event.action)
+    feeds.wake()
+    return result
+
+async def _follow_invalidations(log: InvalidationLog) -> None:
+    """Apply the callbacks another worker received to this worker's in-memory state
+
+    That worker has already cleared the shared disk cache, so only the memory
+    cache, keyset cursors and in-memory datasets are cleared here.
+    """
+    seq = await asyncio.to_thread(log.latest)
+    while True:
+        await asyncio.sleep(CW_INVALIDATION_POLL)
+        try:
+            entries = await asyncio.to_thread(log.since, seq)
+        except Exception as e:
+            logger.warning("Reading the invalidation log failed: %s", e)
+            continue
+        for seq, tenant, endpoint, record_id, action in entries:
+            try:
+                await tenants.invalidate(tenant, CallbackEvent(endpoint, record_id, action), disk=False)
+            except Exception as e:
+                logger.warning("Applying invalidation of %s/%s failed: %s", endpoint, record_id, e)
+        if entries:
+            feeds.wake()
+
+def _export_endpoint_path(endpoint: Optional[str]) -> str:
+    """Check that an export endpoint is a relative API path such as service/tickets"""
+    endpoint = (endpoint or "").strip("/")
+    if not re.fullmatch(r"[A-Za-z]+(/[A-Za-z0-9]+)*", endpoint):
+        raise ValueError(f"Invalid endpoint '{endpoint}', expected a path such as 'service/tickets'")
+    return endpoint
+
+def normalize_references(records: list) -> dict:
+    """Move the reference objects of a list response into a side table
+
+    Each distinct reference is emitted once under ``refs`` and replaced in the
+    records by its key. The records themselves, which may be shared with the
+    response cache, are not modified.
+    """
+    refs: dict[str, dict] = {}
+
+    def visit(value: Any, top: bool = False) -> Any:
+        if isinstance(value, dict):
+            key = None if top else _reference_key(value)
+            if key is not None:
+                known = refs.get(key)
+                # Different records may carry different fields of the same reference
+                refs[key] = value if known is None or known is value else {**known, **value}
+                return key
+            return {k: v if k == "_info" else visit(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [visit(item) for item in value]
+        return value
+
+    return {"records": [visit(record, top=True) for record in records], "refs": refs}
+
+
+async def _respond(client: ConnectWiseClient, data: Any, arguments: dict) -> list[TextContent]:
+    """Expand references and encode a tool result in the format the caller asked for"""
+    if arguments.get("expand") and isinstance(data, list):
+        data = await client.expand(data, arguments["expand"])
+    if arguments.get("format") == "normalized" and isinstance(data, list):
+        data = normalize_references(data)
+    return [TextContent(type="text", text=json.dumps(data, indent=2))]
+
 def _build_params(arguments: dict) -> dict:
     """Build query parameters from arguments"""
     params = {}
@@ -1028,14 +3042,146 @@ def _build_params(arguments: dict) -> dict:
 async def main():
     """Run the MCP server"""
     from mcp.server.stdio import stdio_server
-    
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options()
+    global callback_server
+
+    if CW_CALLBACK_PORT:
+        callback_server = CallbackServer(
+            _on_callback, CW_CALLBACK_HOST, CW_CALLBACK_PORT, CW_CALLBACK_SECRET, tenants.default
+        )
+        try:
+            await callback_server.start()
+        except OSError as e:
+            # Usually another process (e.g. a concurrent bridge call) already holds the port
+            logger.warning("Callback receiver not started on port %d: %s", CW_CALLBACK_PORT, e)
+            callback_server = None
+
+    options = app.create_initialization_options()
+    # The low-level server never advertises subscriptions itself
+    options.capabilities.resources.subscribe = True
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(
+                read_stream,
+                write_stream,
+                options
+            )
+    finally:
+        if callback_server is not None:
+            await callback_server.close()
+        await feeds.close()
+        await tenants.close()
+        budgets.close()
+
+async def export_main(args) -> None:
+    """Run a bulk export from the command line and print its summary"""
+    try:
+        client = await tenants.get(args.tenant)
+        result = await export_endpoint(
+            client.stream,
+            _export_endpoint_path(args.endpoint),
+            args.output,
+            conditions=args.conditions,
+            fields=args.fields,
+            page_size=args.page_size,
+            resume=not args.restart,
         )
+        print(json.dumps(result, indent=2))
+    finally:
+        await tenants.close()
+        budgets.close()
+
+async def execute_tool(name: str, arguments: dict, caller: Optional[str] = None) -> str:
+    """Run a tool call and return its JSON text, for the worker HTTP server"""
+    token = deployment_caller.set(caller)
+    try:
+        return (await call_tool(name, arguments))[0].text
+    finally:
+        deployment_caller.reset(token)
+
+async def worker_main(args) -> None:
+    """Serve tool calls over HTTP on a socket inherited from the supervisor
+
+    The worker handed ``--callback-fd`` also runs the callback receiver. Its
+    invalidations reach the other workers through the disk cache, and through
+    the invalidation log in CW_SHARED_STATE_PATH for their memory caches.
+    """
+    import signal
+    import socket
+    global callback_server, invalidation_log
+
+    server = ToolServer(execute_tool, socket.socket(fileno=args.fd))
+    log = InvalidationLog(CW_SHARED_STATE_PATH) if CW_CALLBACK_PORT else None
+    follower = None
+    if args.callback_fd is not None:
+        callback_server = CallbackServer(
+            _on_callback, CW_CALLBACK_HOST, CW_CALLBACK_PORT, CW_CALLBACK_SECRET, tenants.default,
+            sock=socket.socket(fileno=args.callback_fd),
+        )
+        invalidation_log = log
+    elif log is not None:
+        follower = asyncio.create_task(_follow_invalidations(log))
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    await server.start()
+    if callback_server is not None:
+        await callback_server.start()
+    logger.info("Worker %d ready", os.getpid())
+    try:
+        await stop.wait()
+        if callback_server is not None:
+            await callback_server.close()
+        await server.close(CW_WORKER_DRAIN)
+    finally:
+        if follower is not None:
+            follower.cancel()
+        await tenants.close()
+        budgets.close()
+        if log is not None:
+            log.close()
+    logger.info("Worker %d stopped after %d calls", os.getpid(), server.handled)
+
+def serve_main(args) -> int:
+    """Run the pre-fork supervisor; its workers share rate limits through CW_SHARED_STATE_PATH"""
+    env = {**os.environ, 'CW_SHARED_STATE_PATH': CW_SHARED_STATE_PATH}
+    supervisor = Supervisor(
+        worker_command(os.path.abspath(__file__)), args.host, args.port, args.workers, env,
+        CW_CALLBACK_HOST, CW_CALLBACK_PORT,
+    )
+    return supervisor.run()
 
 if __name__ == "__main__":
-    import asyncio
-    asyncio.run(main())
+    import sys
+    import argparse
+
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        parser = argparse.ArgumentParser(
+            prog="connectwise_mcp.py serve",
+            description="Serve tool calls over HTTP from a pool of worker processes"
+        )
+        parser.add_argument("--workers", type=int, default=CW_WORKERS, help="Worker processes (default: CPU count)")
+        parser.add_argument("--host", default=CW_SERVE_HOST, help=f"Interface to listen on (default {CW_SERVE_HOST})")
+        parser.add_argument("--port", type=int, default=CW_SERVE_PORT, help=f"Port to listen on (default {CW_SERVE_PORT})")
+        sys.exit(serve_main(parser.parse_args(sys.argv[2:])))
+    elif len(sys.argv) > 1 and sys.argv[1] == "worker":
+        parser = argparse.ArgumentParser(prog="connectwise_mcp.py worker")
+        parser.add_argument("--fd", type=int, required=True, help="Listening socket inherited from the supervisor")
+        parser.add_argument("--callback-fd", type=int, help="Callback receiver socket, given to one worker")
+        asyncio.run(worker_main(parser.parse_args(sys.argv[2:])))
+    elif len(sys.argv) > 1 and sys.argv[1] == "export":
+        parser = argparse.ArgumentParser(
+            prog="connectwise_mcp.py export",
+            description="Export every record of a ConnectWise endpoint to gzip-compressed NDJSON"
+        )
+        parser.add_argument("endpoint", help="List endpoint, e.g. service/tickets")
+        parser.add_argument("output", help="Output file, e.g. tickets.ndjson.gz")
+        parser.add_argument("--conditions", help="Filter conditions")
+        parser.add_argument("--fields", help="Comma-separated fields to keep")
+        parser.add_argument("--page-size", type=int, default=1000, help="Records per request (default 1000)")
+        parser.add_argument("--tenant", help="Tenant to export from")
+        parser.add_argument("--restart", action="store_true", help="Start over instead of resuming")
+        asyncio.run(export_main(parser.parse_args(sys.argv[2:])))
+    else:
+        asyncio.run(main())
@@ -4,49 +4,451 @@ description: Read-only access to ConnectWise Manage via MCP
 author: AI Assistant
 version: 1.1.0
 license: MIT
-requirements: requests
+requirements: requests, httpx
 """
 
 import requests
+import httpx
 import json
+import time
+import asyncio
+import inspect
+import threading
+import contextvars
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from requests.adapters import HTTPAdapter
 from pydantic import BaseModel, Field
 
 
+# Reference data rarely changes, so these tools are cached by default
+REFERENCE_TOOLS = {
+    "connectwise_get_members",
+    "connectwise_get_configuration_types",
+    "connectwise_get_company_types",
+    "connectwise_get_company_statuses",
+    "connectwise_get_ticket_priorities",
+    "connectwise_get_ticket_sources",
+    "connectwise_get_contact_types",
+    "connectwise_get_billing_cycles",
+    "connectwise_get_service_boards",
+    "connectwise_get_board_statuses",
+}
+
+
+class _TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float, max_entries: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Set while a method is called through a RawView, to skip JSON encoding
+_RAW_OUTPUT = contextvars.ContextVar("connectwise_raw_output", default=False)
+
+
+def _strip_metadata(value):
+    """Return a copy of a result without the ``_info`` metadata ConnectWise adds to records"""
+    if isinstance(value, dict):
+        return {k: _strip_metadata(v) for k, v in value.items() if k != "_info"}
+    if isinstance(value, list):
+        return [_strip_metadata(v) for v in value]
+    return value
+
+
+class RawView:
+    """Call Tools methods and get parsed results back instead of JSON strings
+
+    Available as ``Tools().raw`` and ``Tools().aio.raw``. Results may be shared
+    with the result cache and must not be modified.
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name: str):
+        method = getattr(self._target, name)
+        if inspect.iscoroutinefunction(method):
+            async def call_async(*args, **kwargs):
+                token = _RAW_OUTPUT.set(True)
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    _RAW_OUTPUT.reset(token)
+            return call_async
+
+        def call(*args, **kwargs):
+            token = _RAW_OUTPUT.set(True)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _RAW_OUTPUT.reset(token)
+        return call
+
+
+# Read-only tools run_many accepts besides the get_* ones
+_BATCH_TOOLS = {"board_snapshot"}
+
+
+def _resolve_call(call: dict) -> tuple:
+    """Return (tool_name, arguments, timeout) for one run_many invocation"""
+    tool = call.get("tool") or ""
+    if not tool.startswith("connectwise_"):
+        tool = f"connectwise_{tool}"
+    method = tool[len("connectwise_"):]
+    if not (method.startswith("get_") or method in _BATCH_TOOLS) or not hasattr(Tools, method):
+        raise ValueError(f"Unknown tool: {call.get('tool')}")
+    return tool, call.get("arguments") or {}, call.get("timeout")
+
+
+class _AsyncClientLease:
+    """One event loop's pooled async client and how many requests are using it
+
+    Only touched from its own loop's thread, so the counts need no lock.
+    """
+
+    def __init__(self, pool_size: int):
+        self.pool_size = pool_size
+        self.client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size
+        ))
+        self.active = 0
+        self.retired = False
+
+    async def release(self) -> None:
+        self.active -= 1
+        if self.retired and self.active == 0:
+            await self.client.aclose()
+
+
+def _close_detached(client: httpx.AsyncClient) -> None:
+    """Close an async client whose event loop has stopped, dropping its connections"""
+    try:
+        asyncio.run(client.aclose())
+    except Exception:
+        pass  # the sockets belong to the dead loop; they are released when collected
+
+
+def _list_args(
+    page: int,
+    page_size: int,
+    conditions: Optional[str] = None,
+    order_by: Optional[str] = None,
+    **ids
+) -> dict:
+    """Build the arguments of a paged list tool"""
+    args = dict(ids)
+    args["page"] = page
+    args["pageSize"] = page_size
+    if conditions:
+        args["conditions"] = conditions
+    if order_by:
+        args["orderBy"] = order_by
+    return args
+
+
+def _report_args(
+    dataset: str,
+    group_by: str,
+    measures: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    filters: Optional[str],
+    limit: int
+) -> dict:
+    """Build the arguments of connectwise_get_report from comma-separated strings"""
+    args = {
+        "dataset": dataset,
+        "group_by": [c.strip() for c in group_by.split(",") if c.strip()],
+        "limit": limit
+    }
+    if measures:
+        args["measures"] = [m.strip() for m in measures.split(",") if m.strip()]
+    if start_date:
+        args["start_date"] = start_date
+    if end_date:
+        args["end_date"] = end_date
+    if filters:
+        args["filters"] = dict(
+            (part.split("=", 1)[0].strip(), part.split("=", 1)[1].strip())
+            for part in filters.split(",") if "=" in part
+        )
+    return args
+
+
 class Tools:
     class Valves(BaseModel):
         CONNECTWISE_BRIDGE_URL: str = Field(
             default="http://connectwise-mcp-bridge:3002",
             description="URL of the ConnectWise MCP bridge server"
         )
+        CONNECT_TIMEOUT: float = Field(
+            default=10,
+            description="Timeout in seconds for connecting to the bridge"
+        )
         REQUEST_TIMEOUT: int = Field(
             default=300,
-            description="Request timeout in seconds"
+            description="Timeout in seconds for reading a response from the bridge"
+        )
+        POOL_MAXSIZE: int = Field(
+            default=10,
+            description="Maximum number of keep-alive connections to the bridge"
+        )
+        MAX_PARALLEL_CALLS: int = Field(
+            default=4,
+            description="Maximum number of tool calls run_many executes at the same time"
+        )
+        COMPACT_OUTPUT: bool = Field(
+            default=False,
+            description="Return JSON without indentation to save payload size and tokens"
+        )
+        STRIP_METADATA: bool = Field(
+            default=False,
+            description="Remove ConnectWise _info metadata (hrefs, audit fields) from results"
+        )
+        NORMALIZE_REFERENCES: bool = Field(
+            default=False,
+            description="Return list results with each repeated company, board, status, member etc. listed once under refs"
+        )
+        CACHE_TTL: int = Field(
+            default=0,
+            description="Seconds to cache results of non-reference tools (0 disables)"
+        )
+        REFERENCE_CACHE_TTL: int = Field(
+            default=600,
+            description="Seconds to cache results of reference-data tools such as priorities, boards and members (0 disables)"
+        )
+        CACHE_MAX_ENTRIES: int = Field(
+            default=256,
+            description="Maximum number of cached tool results"
+        )
+        CALLER_ID: str = Field(
+            default="",
+            description="Name this tool's calls are charged to in the server's per-caller quotas (empty uses the server default)"
         )
 
     def __init__(self):
         self.valves = self.Valves()
+        self.aio = AsyncTools(self)
+        self.raw = RawView(self)
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_pool_size = None
+        # Event loop -> its _AsyncClientLease; clients are never shared between loops
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._cache = _TTLCache()
+
+    def _get_session(self) -> requests.Session:
+        """Return the pooled keep-alive session, rebuilding it if POOL_MAXSIZE changed"""
+        with self._lock:
+            if self._session is None or self._session_pool_size != self.valves.POOL_MAXSIZE:
+                if self._session is not None:
+                    self._session.close()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.valves.POOL_MAXSIZE)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+                self._session_pool_size = self.valves.POOL_MAXSIZE
+            return self._session
+
+    @asynccontextmanager
+    async def _async_client(self):
+        """Lease the running loop's pooled async client for one request
+
+        Each loop gets its own client, created on first use. A client replaced
+        because POOL_MAXSIZE changed is closed once its last request finishes;
+        clients of loops that have been closed are closed here too.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            dead = [key for key in self._async_clients if key.is_closed()]
+            stale = [self._async_clients.pop(key).client for key in dead]
+            lease = self._async_clients.get(loop)
+            if lease is None or lease.pool_size != self.valves.POOL_MAXSIZE:
+                if lease is not None:
+                    lease.retired = True
+                lease = self._async_clients[loop] = _AsyncClientLease(self.valves.POOL_MAXSIZE)
+            lease.active += 1
+        for client in stale:
+            # Their loop can't run aclose() any more; run it on a throwaway loop in another thread
+            closer = threading.Thread(target=_close_detached, args=(client,), daemon=True)
+            closer.start()
+            closer.join()
+        try:
+            yield lease.client
+        finally:
+            await lease.release()
+
+    def _render(self, result):
+        """Encode a result as configured by the output Valves, or pass it through for RawView callers"""
+        if self.valves.STRIP_METADATA:
+            result = _strip_metadata(result)
+        if _RAW_OUTPUT.get():
+            return result
+        if self.valves.COMPACT_OUTPUT:
+            return json.dumps(result, separators=(",", ":"))
+        return json.dumps(result, indent=2)
 
-    def _execute_tool(self, tool_name: str, arguments: dict) -> dict:
+    def _cache_ttl(self, tool_name: str) -> int:
+        """Return how long results of a tool may be cached"""
+        if self.valves.CACHE_MAX_ENTRIES <= 0:
+            return 0
+        if tool_name in REFERENCE_TOOLS:
+            return self.valves.REFERENCE_CACHE_TTL
+        return self.valves.CACHE_TTL
+
+    @staticmethod
+    def _cache_key(tool_name: str, arguments: dict) -> str:
+        return f"{tool_name}:{json.dumps(arguments, sort_keys=True)}"
+
+    def _store(self, key: str, result: dict, ttl: int) -> None:
+        """Cache a successful tool result"""
+        if ttl > 0 and not (isinstance(result, dict) and "error" in result):
+            self._cache.set(key, result, ttl, self.valves.CACHE_MAX_ENTRIES)
+
+    def _with_format(self, arguments: dict) -> dict:
+        """Request the normalized list format when configured; RawView callers always get plain records"""
+        if self.valves.NORMALIZE_REFERENCES and not _RAW_OUTPUT.get():
+            return {**arguments, "format": "normalized"}
+        return arguments
+
+    def _execute_tool(self, tool_name: str, arguments: dict, timeout: Optional[float] = None) -> dict:
+        """Execute a ConnectWise tool, serving repeated calls from the cache"""
+        arguments = self._with_format(arguments)
+        ttl = self._cache_ttl(tool_name)
+        key = self._cache_key(tool_name, arguments)
+        if ttl > 0:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = self._post_tool(tool_name, arguments, timeout)
+        self._store(key, result, ttl)
+        return result
+
+    async def _aexecute_tool(self, tool_name: str, arguments: dict, timeout: Optional[float] = None) -> dict:
+        """Async version of :meth:`_execute_tool`"""
+        arguments = self._with_format(arguments)
+        ttl = self._cache_ttl(tool_name)
+        key = self._cache_key(tool_name, arguments)
+        if ttl > 0:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = await self._apost_tool(tool_name, arguments, timeout)
+        self._store(key, result, ttl)
+        return result
+
+    def _deadline(self, timeout: Optional[float]) -> float:
+        """Deadline to send with a call, slightly inside our own read timeout
+
+        The server then cancels its upstream work and reports the overrun before we give up waiting.
+        """
+        return max(1.0, (timeout or self.valves.REQUEST_TIMEOUT) - 1)
+
+    def _headers(self) -> dict:
+        """Request headers identifying the caller to the bridge"""
+        return {"X-Caller": self.valves.CALLER_ID} if self.valves.CALLER_ID else {}
+
+    def _post_tool(self, tool_name: str, arguments: dict, timeout: Optional[float] = None) -> dict:
         """Execute a ConnectWise tool via the MCP bridge"""
         url = f"{self.valves.CONNECTWISE_BRIDGE_URL}/v1/tools/execute"
         
         payload = {
             "tool_name": tool_name,
-            "arguments": arguments
+            "arguments": arguments,
+            "timeout": self._deadline(timeout)
         }
         
         try:
-            response = requests.post(
+            response = self._get_session().post(
                 url,
                 json=payload,
-                timeout=self.valves.REQUEST_TIMEOUT
+                headers=self._headers(),
+                timeout=(self.valves.CONNECT_TIMEOUT, timeout or self.valves.REQUEST_TIMEOUT)
             )
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             return {"error": f"Request failed: {str(e)}"}
 
+    async def _apost_tool(self, tool_name: str, arguments: dict, timeout: Optional[float] = None) -> dict:
+        """Execute a ConnectWise tool via the MCP bridge without blocking the event loop"""
+        url = f"{self.valves.CONNECTWISE_BRIDGE_URL}/v1/tools/execute"
+
+        payload = {
+            "tool_name": tool_name,
+            "arguments": arguments,
+            "timeout": self._deadline(timeout)
+        }
+
+        try:
+            async with self._async_client() as client:
+                response = await client.post(
+                    url,
+                    json=payload,
+                    headers=self._headers(),
+                    timeout=httpx.Timeout(timeout or self.valves.REQUEST_TIMEOUT, connect=self.valves.CONNECT_TIMEOUT)
+                )
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            return {"error": f"Request failed: {str(e)}"}
+
+    def run_many(self, calls: list[dict]) -> str:
+        """
+        Run several ConnectWise tool calls concurrently and return all results at once.
+        Use this to fetch related data together, e.g. a ticket with its notes, tasks and company.
+
+        :param calls: List of calls, each like {"tool": "get_ticket", "arguments": {"ticket_id": 123}}. Arguments use the bridge names (e.g. pageSize, orderBy). An optional "timeout" in seconds applies to that call.
+        :return: JSON string with a list of results in the same order as the calls
+        """
+        def run(call: dict) -> dict:
+            try:
+                tool_name, arguments, timeout = _resolve_call(call)
+                return self._execute_tool(tool_name, arguments, timeout)
+            except Exception as e:
+                return {"error": str(e)}
+
+        if not calls:
+            return self._render([])
+        workers = max(1, min(self.valves.MAX_PARALLEL_CALLS, len(calls)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Pool threads don't inherit context variables, so each call carries a copy of ours (e.g. RawView's)
+            futures = [executor.submit(contextvars.copy_context().run, run, call) for call in calls]
+            results = [future.result() for future in futures]
+        return self._render(results)
+
     def get_companies(
         self,
         conditions: Optional[str] = None,
@@ -63,17 +465,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with company data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
             
         result = self._execute_tool("connectwise_get_companies", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_company(self, company_id: int) -> str:
         """
@@ -83,14 +478,15 @@ class Tools:
         :return: JSON string with company data
         """
         result = self._execute_tool("connectwise_get_company", {"company_id": company_id})
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_tickets(
         self,
         conditions: Optional[str] = None,
         order_by: Optional[str] = None,
         page: int = 1,
-        page_size: int = 25
+        page_size: int = 25,
+        expand: Optional[str] = None
     ) -> str:
         """
         Search and retrieve service tickets from ConnectWise.
@@ -99,19 +495,15 @@ class Tools:
         :param order_by: Field to order by (e.g., 'id desc', 'summary')
         :param page: Page number (1-based)
         :param page_size: Results per page (max 1000)
+        :param expand: Comma-separated references to include in full (e.g., 'company,contact,owner'), instead of calling get_company/get_contact per ticket
         :return: JSON string with ticket data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
+        if expand:
+            args["expand"] = [f.strip() for f in expand.split(",") if f.strip()]
             
         result = self._execute_tool("connectwise_get_tickets", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_ticket(self, ticket_id: int) -> str:
         """
@@ -121,7 +513,7 @@ class Tools:
         :return: JSON string with ticket data
         """
         result = self._execute_tool("connectwise_get_ticket", {"ticket_id": ticket_id})
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_ticket_notes(self, ticket_id: int, page_size: int = 25) -> str:
         """
@@ -135,7 +527,7 @@ class Tools:
             "ticket_id": ticket_id,
             "pageSize": page_size
         })
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_contacts(
         self,
@@ -153,17 +545,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with contact data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
             
         result = self._execute_tool("connectwise_get_contacts", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_contact(self, contact_id: int) -> str:
         """
@@ -173,7 +558,7 @@ class Tools:
         :return: JSON string with contact data
         """
         result = self._execute_tool("connectwise_get_contact", {"contact_id": contact_id})
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_opportunities(
         self,
@@ -191,17 +576,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with opportunity data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
             
         result = self._execute_tool("connectwise_get_opportunities", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_agreements(
         self,
@@ -219,17 +597,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with agreement data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
             
         result = self._execute_tool("connectwise_get_agreements", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_time_entries(
         self,
@@ -247,17 +618,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with time entry data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
             
         result = self._execute_tool("connectwise_get_time_entries", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_projects(
         self,
@@ -275,17 +639,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with project data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
             
         result = self._execute_tool("connectwise_get_projects", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_activities(
         self,
@@ -303,17 +660,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with activity data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
             
         result = self._execute_tool("connectwise_get_activities", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_members(
         self,
@@ -331,17 +681,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with member data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
 
         result = self._execute_tool("connectwise_get_members", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     # IT Asset Management
     def get_configurations(
@@ -360,17 +703,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with configuration data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
 
         result = self._execute_tool("connectwise_get_configurations", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_configuration(self, configuration_id: int) -> str:
         """
@@ -380,7 +716,7 @@ class Tools:
         :return: JSON string with configuration data
         """
         result = self._execute_tool("connectwise_get_configuration", {"configuration_id": configuration_id})
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_configuration_types(
         self,
@@ -396,15 +732,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with configuration type data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
+        args = _list_args(page, page_size, conditions)
 
         result = self._execute_tool("connectwise_get_configuration_types", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_company_sites(
         self,
@@ -420,14 +751,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with company site data
         """
-        args = {
-            "company_id": company_id,
-            "page": page,
-            "pageSize": page_size
-        }
+        args = _list_args(page, page_size, company_id=company_id)
 
         result = self._execute_tool("connectwise_get_company_sites", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     # Reference Data - Company
     def get_company_types(
@@ -444,15 +771,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with company type data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
+        args = _list_args(page, page_size, conditions)
 
         result = self._execute_tool("connectwise_get_company_types", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_company_statuses(
         self,
@@ -468,15 +790,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with company status data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
+        args = _list_args(page, page_size, conditions)
 
         result = self._execute_tool("connectwise_get_company_statuses", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     # Reference Data - Tickets
     def get_ticket_priorities(
@@ -493,15 +810,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with ticket priority data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
+        args = _list_args(page, page_size, conditions)
 
         result = self._execute_tool("connectwise_get_ticket_priorities", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_ticket_sources(
         self,
@@ -517,15 +829,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with ticket source data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
+        args = _list_args(page, page_size, conditions)
 
         result = self._execute_tool("connectwise_get_ticket_sources", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     # Reference Data - Contacts
     def get_contact_types(
@@ -542,15 +849,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with contact type data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
+        args = _list_args(page, page_size, conditions)
 
         result = self._execute_tool("connectwise_get_contact_types", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     # Finance & Billing
     def get_invoices(
@@ -569,17 +871,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with invoice data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
 
         result = self._execute_tool("connectwise_get_invoices", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_expense_entries(
         self,
@@ -597,17 +892,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with expense entry data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
-        if order_by:
-            args["orderBy"] = order_by
+        args = _list_args(page, page_size, conditions, order_by)
 
         result = self._execute_tool("connectwise_get_expense_entries", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_billing_cycles(
         self,
@@ -623,15 +911,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with billing cycle data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
+        args = _list_args(page, page_size, conditions)
 
         result = self._execute_tool("connectwise_get_billing_cycles", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_agreement_additions(
         self,
@@ -647,14 +930,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with agreement addition data
         """
-        args = {
-            "agreement_id": agreement_id,
-            "page": page,
-            "pageSize": page_size
-        }
+        args = _list_args(page, page_size, agreement_id=agreement_id)
 
         result = self._execute_tool("connectwise_get_agreement_additions", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     # Service Desk Enhancements
     def get_service_boards(
@@ -671,15 +950,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with service board data
         """
-        args = {
-            "page": page,
-            "pageSize": page_size
-        }
-        if conditions:
-            args["conditions"] = conditions
+        args = _list_args(page, page_size, conditions)
 
         result = self._execute_tool("connectwise_get_service_boards", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_board_statuses(
         self,
@@ -695,14 +969,31 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with board status data
         """
+        args = _list_args(page, page_size, board_id=board_id)
+
+        result = self._execute_tool("connectwise_get_board_statuses", args)
+        return self._render(result)
+
+    def board_snapshot(
+        self,
+        board_id: int,
+        include_closed: bool = False
+    ) -> str:
+        """
+        Get current ticket counts per status, priority and owner for a service board.
+        Use this for "what does the board look like right now" instead of pulling tickets.
+
+        :param board_id: Board ID
+        :param include_closed: Also count closed tickets and closed statuses
+        :return: JSON string with the board's ticket counts
+        """
         args = {
             "board_id": board_id,
-            "page": page,
-            "pageSize": page_size
+            "include_closed": include_closed
         }
 
-        result = self._execute_tool("connectwise_get_board_statuses", args)
-        return json.dumps(result, indent=2)
+        result = self._execute_tool("connectwise_board_snapshot", args)
+        return self._render(result)
 
     def get_ticket_tasks(
         self,
@@ -718,14 +1009,10 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with ticket task data
         """
-        args = {
-            "ticket_id": ticket_id,
-            "page": page,
-            "pageSize": page_size
-        }
+        args = _list_args(page, page_size, ticket_id=ticket_id)
 
         result = self._execute_tool("connectwise_get_ticket_tasks", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
 
     def get_ticket_schedules(
         self,
@@ -741,11 +1028,412 @@ class Tools:
         :param page_size: Results per page (max 1000)
         :return: JSON string with ticket schedule data
         """
-        args = {
-            "ticket_id": ticket_id,
-            "page": page,
-            "pageSize": page_size
-        }
+        args = _list_args(page, page_size, ticket_id=ticket_id)
 
         result = self._execute_tool("connectwise_get_ticket_schedules", args)
-        return json.dumps(result, indent=2)
+        return self._render(result)
+
+    # Reporting
+    def get_report(
+        self,
+        dataset: str,
+        group_by: str = "",
+        measures: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        filters: Optional[str] = None,
+        limit: int = 100
+    ) -> str:
+        """
+        Get grouped totals of time entries, expenses or invoices, such as hours per member per month.
+        Much faster than paging through entries for utilization and billing questions.
+
+        :param dataset: 'time', 'expenses' or 'invoices'
+        :param group_by: Comma-separated columns: day, week, month, year, member, company, work_type, type, status, billable
+        :param measures: Comma-separated values to sum (time: hours, billed_hours; expenses: amount, bill_amount; invoices: total, subtotal, balance)
+        :param start_date: First day to include (YYYY-MM-DD)
+        :param end_date: Last day to include (YYYY-MM-DD)
+        :param filters: Comma-separated exact matches (e.g., 'member=jsmith,billable=Billable')
+        :param limit: Maximum rows to return
+        :return: JSON string with report rows, largest first
+        """
+        args = _report_args(dataset, group_by, measures, start_date, end_date, filters, limit)
+        result = self._execute_tool("connectwise_get_report", args)
+        return self._render(result)
+
+
+class AsyncTools:
+    """Async versions of the :class:`Tools` methods, available as ``Tools().aio``
+
+    These share the Tools Valves and use a pooled ``httpx.AsyncClient``, so
+    concurrent calls don't each hold a worker thread while waiting on the bridge.
+    """
+
+    def __init__(self, tools: Tools):
+        self._tools = tools
+        self.raw = RawView(self)
+
+    async def run_many(self, calls: list[dict]) -> str:
+        """Async version of :meth:`Tools.run_many`"""
+        semaphore = asyncio.Semaphore(max(1, self._tools.valves.MAX_PARALLEL_CALLS))
+
+        async def run(call: dict) -> dict:
+            try:
+                tool_name, arguments, timeout = _resolve_call(call)
+                async with semaphore:
+                    return await asyncio.wait_for(
+                        self._tools._aexecute_tool(tool_name, arguments, timeout),
+                        timeout
+                    )
+            except asyncio.TimeoutError:
+                return {"error": f"Timed out after {call.get('timeout')} seconds"}
+            except Exception as e:
+                return {"error": str(e)}
+
+        results = await asyncio.gather(*(run(call) for call in calls))
+        return self._tools._render(results)
+
+    async def get_companies(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_companies`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_companies", args)
+        return self._tools._render(result)
+
+    async def get_company(self, company_id: int) -> str:
+        """Async version of :meth:`Tools.get_company`"""
+        args = {"company_id": company_id}
+        result = await self._tools._aexecute_tool("connectwise_get_company", args)
+        return self._tools._render(result)
+
+    async def get_tickets(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25,
+        expand: Optional[str] = None
+    ) -> str:
+        """Async version of :meth:`Tools.get_tickets`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        if expand:
+            args["expand"] = [f.strip() for f in expand.split(",") if f.strip()]
+        result = await self._tools._aexecute_tool("connectwise_get_tickets", args)
+        return self._tools._render(result)
+
+    async def get_ticket(self, ticket_id: int) -> str:
+        """Async version of :meth:`Tools.get_ticket`"""
+        args = {"ticket_id": ticket_id}
+        result = await self._tools._aexecute_tool("connectwise_get_ticket", args)
+        return self._tools._render(result)
+
+    async def get_ticket_notes(self, ticket_id: int, page_size: int = 25) -> str:
+        """Async version of :meth:`Tools.get_ticket_notes`"""
+        args = {"ticket_id": ticket_id, "pageSize": page_size}
+        result = await self._tools._aexecute_tool("connectwise_get_ticket_notes", args)
+        return self._tools._render(result)
+
+    async def get_contacts(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_contacts`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_contacts", args)
+        return self._tools._render(result)
+
+    async def get_contact(self, contact_id: int) -> str:
+        """Async version of :meth:`Tools.get_contact`"""
+        args = {"contact_id": contact_id}
+        result = await self._tools._aexecute_tool("connectwise_get_contact", args)
+        return self._tools._render(result)
+
+    async def get_opportunities(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_opportunities`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_opportunities", args)
+        return self._tools._render(result)
+
+    async def get_agreements(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_agreements`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_agreements", args)
+        return self._tools._render(result)
+
+    async def get_time_entries(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_time_entries`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_time_entries", args)
+        return self._tools._render(result)
+
+    async def get_projects(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_projects`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_projects", args)
+        return self._tools._render(result)
+
+    async def get_activities(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_activities`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_activities", args)
+        return self._tools._render(result)
+
+    async def get_members(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_members`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_members", args)
+        return self._tools._render(result)
+
+    async def get_configurations(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_configurations`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_configurations", args)
+        return self._tools._render(result)
+
+    async def get_configuration(self, configuration_id: int) -> str:
+        """Async version of :meth:`Tools.get_configuration`"""
+        args = {"configuration_id": configuration_id}
+        result = await self._tools._aexecute_tool("connectwise_get_configuration", args)
+        return self._tools._render(result)
+
+    async def get_configuration_types(
+        self,
+        conditions: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_configuration_types`"""
+        args = _list_args(page, page_size, conditions)
+        result = await self._tools._aexecute_tool("connectwise_get_configuration_types", args)
+        return self._tools._render(result)
+
+    async def get_company_sites(
+        self,
+        company_id: int,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_company_sites`"""
+        args = _list_args(page, page_size, company_id=company_id)
+        result = await self._tools._aexecute_tool("connectwise_get_company_sites", args)
+        return self._tools._render(result)
+
+    async def get_company_types(
+        self,
+        conditions: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_company_types`"""
+        args = _list_args(page, page_size, conditions)
+        result = await self._tools._aexecute_tool("connectwise_get_company_types", args)
+        return self._tools._render(result)
+
+    async def get_company_statuses(
+        self,
+        conditions: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_company_statuses`"""
+        args = _list_args(page, page_size, conditions)
+        result = await self._tools._aexecute_tool("connectwise_get_company_statuses", args)
+        return self._tools._render(result)
+
+    async def get_ticket_priorities(
+        self,
+        conditions: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_ticket_priorities`"""
+        args = _list_args(page, page_size, conditions)
+        result = await self._tools._aexecute_tool("connectwise_get_ticket_priorities", args)
+        return self._tools._render(result)
+
+    async def get_ticket_sources(
+        self,
+        conditions: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_ticket_sources`"""
+        args = _list_args(page, page_size, conditions)
+        result = await self._tools._aexecute_tool("connectwise_get_ticket_sources", args)
+        return self._tools._render(result)
+
+    async def get_contact_types(
+        self,
+        conditions: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_contact_types`"""
+        args = _list_args(page, page_size, conditions)
+        result = await self._tools._aexecute_tool("connectwise_get_contact_types", args)
+        return self._tools._render(result)
+
+    async def get_invoices(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_invoices`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_invoices", args)
+        return self._tools._render(result)
+
+    async def get_expense_entries(
+        self,
+        conditions: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_expense_entries`"""
+        args = _list_args(page, page_size, conditions, order_by)
+        result = await self._tools._aexecute_tool("connectwise_get_expense_entries", args)
+        return self._tools._render(result)
+
+    async def get_billing_cycles(
+        self,
+        conditions: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_billing_cycles`"""
+        args = _list_args(page, page_size, conditions)
+        result = await self._tools._aexecute_tool("connectwise_get_billing_cycles", args)
+        return self._tools._render(result)
+
+    async def get_agreement_additions(
+        self,
+        agreement_id: int,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_agreement_additions`"""
+        args = _list_args(page, page_size, agreement_id=agreement_id)
+        result = await self._tools._aexecute_tool("connectwise_get_agreement_additions", args)
+        return self._tools._render(result)
+
+    async def get_service_boards(
+        self,
+        conditions: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_service_boards`"""
+        args = _list_args(page, page_size, conditions)
+        result = await self._tools._aexecute_tool("connectwise_get_service_boards", args)
+        return self._tools._render(result)
+
+    async def get_board_statuses(
+        self,
+        board_id: int,
+        page: int = 1,
+        page_size: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_board_statuses`"""
+        args = _list_args(page, page_size, board_id=board_id)
+        result = await self._tools._aexecute_tool("connectwise_get_board_statuses", args)
+        return self._tools._render(result)
+
+    async def board_snapshot(
+        self,
+        board_id: int,
+        include_closed: bool = False
+    ) -> str:
+        """Async version of :meth:`Tools.board_snapshot`"""
+        args = {"board_id": board_id, "include_closed": include_closed}
+        result = await self._tools._aexecute_tool("connectwise_board_snapshot", args)
+        return self._tools._render(result)
+
+    async def get_ticket_tasks(
+        self,
+        ticket_id: int,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_ticket_tasks`"""
+        args = _list_args(page, page_size, ticket_id=ticket_id)
+        result = await self._tools._aexecute_tool("connectwise_get_ticket_tasks", args)
+        return self._tools._render(result)
+
+    async def get_ticket_schedules(
+        self,
+        ticket_id: int,
+        page: int = 1,
+        page_size: int = 25
+    ) -> str:
+        """Async version of :meth:`Tools.get_ticket_schedules`"""
+        args = _list_args(page, page_size, ticket_id=ticket_id)
+        result = await self._tools._aexecute_tool("connectwise_get_ticket_schedules", args)
+        return self._tools._render(result)
+
+    async def get_report(
+        self,
+        dataset: str,
+        group_by: str = "",
+        measures: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        filters: Optional[str] = None,
+        limit: int = 100
+    ) -> str:
+        """Async version of :meth:`Tools.get_report`"""
+        args = _report_args(dataset, group_by, measures, start_date, end_date, filters, limit)
+        result = await self._tools._aexecute_tool("connectwise_get_report", args)
+        return self._tools._render(result)
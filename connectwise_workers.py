@@ -0,0 +1,345 @@
+"""
+ConnectWise worker mode - pre-fork supervisor, HTTP tool server, cross-process rate limits and invalidations
+"""
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import asyncio
+import logging
+import sqlite3
+import threading
+import subprocess
+from typing import Any, Awaitable, Callable, Optional
+
+from connectwise_callbacks import read_body, read_head, send_json
+
+logger = logging.getLogger('connectwise_mcp')
+
+# A worker that exits this soon after starting is restarted with a delay, to avoid a crash loop
+_MIN_UPTIME = 5
+_RESTART_DELAY = 2
+
+
+class SharedRateLimiter:
+    """Token bucket kept in SQLite, so every worker draws from the same per-tenant budget
+
+    Each acquire reserves a token in one short write transaction and sleeps
+    outside it. The bucket may go negative, meaning later callers are queued
+    behind earlier reservations, so the combined rate across processes never
+    exceeds ``rate``. Same interface as RateLimiter.
+    """
+
+    def __init__(self, path: str, key: str, rate: float, burst: int = 1):
+        self.path = path
+        self.key = key
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _reserve(self) -> float:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (self.key,)).fetchone()
+                tokens = float(self.burst) if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+                tokens -= 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (self.key, tokens, now)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return max(0.0, -tokens / self.rate)
+
+    async def acquire(self) -> float:
+        """Wait for a token and return the number of seconds spent waiting"""
+        if self.rate <= 0:
+            return 0.0
+        wait = await asyncio.to_thread(self._reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class InvalidationLog:
+    """Change callbacks kept in SQLite, so every worker applies the ones one worker receives
+
+    The worker running the callback receiver appends each callback it applies;
+    the others read the entries after the last one they applied and clear their
+    in-memory caches for them. Entries older than ``retention`` seconds are
+    deleted. Methods are blocking; call them through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str, retention: float = 3600):
+        self.path = path
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            if self.path != ':memory:':
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "at REAL NOT NULL, tenant TEXT NOT NULL, endpoint TEXT NOT NULL, record_id INTEGER NOT NULL, "
+                "action TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def append(self, tenant: str, endpoint: str, record_id: int, action: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO invalidations (at, tenant, endpoint, record_id, action) VALUES (?, ?, ?, ?, ?)",
+                (now, tenant, endpoint, record_id, action),
+            )
+            conn.execute("DELETE FROM invalidations WHERE at < ?", (now - self.retention,))
+
+    def latest(self) -> int:
+        """Sequence number of the newest entry, 0 if there is none"""
+        with self._lock:
+            return self._connect().execute("SELECT COALESCE(MAX(seq), 0) FROM invalidations").fetchone()[0]
+
+    def since(self, seq: int) -> list[tuple[int, str, str, int, str]]:
+        """Entries after ``seq`` as (seq, tenant, endpoint, record_id, action), oldest first"""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT seq, tenant, endpoint, record_id, action FROM invalidations WHERE seq > ? ORDER BY seq",
+                (seq,),
+            ).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+Execute = Callable[[str, dict, Optional[str]], Awaitable[str]]
+
+
+class ToolServer:
+    """HTTP front end for tool calls in one worker, speaking the bridge's API
+
+    POST /v1/tools/execute takes {"tool_name", "arguments", "timeout"} and
+    returns the tool's JSON result, so the OpenWebUI tool can point at a worker
+    pool instead of the bridge. An X-Caller header names the caller the call
+    is charged to, overriding any caller argument. GET /health reports liveness. A call whose client
+    disconnects is cancelled.
+    """
+
+    def __init__(self, execute: Execute, sock: socket.socket, max_body: int = 1024 * 1024):
+        self.execute = execute
+        self.sock = sock
+        self.max_body = max_body
+        self.handled = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._active: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, sock=self.sock)
+
+    async def close(self, drain: float) -> None:
+        """Stop accepting connections and give in-flight calls ``drain`` seconds to finish"""
+        if self._server is not None:
+            self._server.close()
+        if self._active:
+            logger.info("Draining %d in-flight calls", len(self._active))
+            _, pending = await asyncio.wait(list(self._active), timeout=drain)
+            for task in pending:
+                task.cancel()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._active.add(task)
+        try:
+            status, body = await self._process(reader)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            status, body = 400, {"error": "Malformed request"}
+        except asyncio.TimeoutError:
+            status, body = 408, {"error": "Timed out reading the request"}
+        except ConnectionError:
+            # The client is gone; there is nobody to answer
+            writer.close()
+            return
+        except asyncio.CancelledError:
+            # Cancelled by close(); the handler task is awaited by nobody, so end it quietly
+            writer.close()
+            return
+        except Exception as e:
+            logger.error("Tool request failed: %s", e)
+            status, body = 500, {"error": str(e)}
+        finally:
+            self._active.discard(task)
+        self.handled += 1
+        await send_json(writer, status, body)
+
+    async def _process(self, reader: asyncio.StreamReader) -> tuple[int, Any]:
+        head = await read_head(reader)
+        if head is None:
+            return 400, {"error": "Malformed request line"}
+        method, target, headers = head
+        path = target.split('?', 1)[0].rstrip('/')
+
+        if path == '/health' and method == 'GET':
+            return 200, {"status": "ok", "service": "connectwise-mcp-worker", "pid": os.getpid()}
+        if path != '/v1/tools/execute':
+            return 404, {"error": "Not found"}
+        if method != 'POST':
+            return 405, {"error": "Use POST"}
+
+        raw = await read_body(reader, headers, self.max_body)
+        if raw is None:
+            return 413, {"error": "Request body too large"}
+        request = json.loads(raw or b'null')
+        if not isinstance(request, dict) or not request.get('tool_name'):
+            return 400, {"error": "tool_name is required"}
+        arguments = dict(request.get('arguments') or {})
+        if request.get('timeout'):
+            arguments.setdefault('timeout', request['timeout'])
+
+        # The header is set by the deployment, so it wins over a caller named in the arguments
+        call = asyncio.create_task(self.execute(request['tool_name'], arguments, headers.get('x-caller') or None))
+        # The client sends nothing after the body, so a completed read means it hung up
+        hangup = asyncio.create_task(reader.read(1))
+        try:
+            await asyncio.wait({call, hangup}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            # Cancelled by close() after the drain timeout; stop the tool call too
+            call.cancel()
+            raise
+        finally:
+            hangup.cancel()
+        if not call.done():
+            logger.info("Client disconnected, cancelling %s", request['tool_name'])
+            call.cancel()
+            raise ConnectionResetError("client disconnected")
+        return 200, call.result().encode('utf-8')
+
+
+class Supervisor:
+    """Pre-fork supervisor: one listening socket shared by N worker processes
+
+    The supervisor binds the socket once and starts each worker as
+    ``command + ['--fd', <fd>]`` with the socket inherited. The kernel hands
+    each connection to whichever worker accepts it first, so throughput
+    scales with cores. SIGHUP starts a fresh set of workers, which load the
+    current code and tenants file, then tells the old set to drain and exit.
+    The socket stays open throughout, so no connection is refused during a
+    reload. SIGTERM or SIGINT drains every worker and exits. A worker that
+    dies unexpectedly is replaced.
+
+    With ``callback_port`` set, the supervisor also binds the callback port
+    once and hands it to the first worker of each generation only, as
+    ``--callback-fd <fd>``, so exactly one long-lived process receives
+    ConnectWise callbacks and reloads never have to rebind it.
+    """
+
+    def __init__(
+        self,
+        command: list[str],
+        host: str,
+        port: int,
+        workers: int,
+        env: Optional[dict] = None,
+        callback_host: str = '0.0.0.0',
+        callback_port: int = 0,
+    ):
+        self.command = command
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.env = env
+        self.callback_host = callback_host
+        self.callback_port = callback_port
+        self._callback_sock: Optional[socket.socket] = None
+        self.generation = 0
+        self._procs: list[subprocess.Popen] = []
+        self._started: dict[int, float] = {}
+        self._retiring: list[subprocess.Popen] = []
+        self._reload = False
+        self._stop = False
+
+    def _spawn(self, sock: socket.socket, slot: int) -> subprocess.Popen:
+        args, fds = ['--fd', str(sock.fileno())], [sock.fileno()]
+        if slot == 0 and self._callback_sock is not None:
+            args += ['--callback-fd', str(self._callback_sock.fileno())]
+            fds.append(self._callback_sock.fileno())
+        proc = subprocess.Popen([*self.command, *args], pass_fds=fds, env=self.env)
+        self._started[proc.pid] = time.monotonic()
+        logger.info("Started worker %d (generation %d)", proc.pid, self.generation)
+        return proc
+
+    def _on_signal(self, signum, frame) -> None:
+        if signum == signal.SIGHUP:
+            self._reload = True
+        else:
+            self._stop = True
+
+    def run(self) -> int:
+        sock = socket.create_server((self.host, self.port), backlog=1024)
+        sock.set_inheritable(True)
+        if self.callback_port:
+            self._callback_sock = socket.create_server((self.callback_host, self.callback_port))
+            self._callback_sock.set_inheritable(True)
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._on_signal)
+        logger.info("Supervisor %d listening on %s:%d with %d workers", os.getpid(), self.host, self.port, self.workers)
+        self._procs = [self._spawn(sock, slot) for slot in range(self.workers)]
+
+        while not self._stop:
+            time.sleep(0.2)
+            if self._reload:
+                self._reload = False
+                self.generation += 1
+                logger.info("Reloading: starting generation %d", self.generation)
+                old, self._procs = self._procs, [self._spawn(sock, slot) for slot in range(self.workers)]
+                for proc in old:
+                    proc.send_signal(signal.SIGTERM)
+                self._retiring.extend(old)
+
+            self._retiring = [proc for proc in self._retiring if proc.poll() is None]
+            for i, proc in enumerate(self._procs):
+                if proc.poll() is None:
+                    continue
+                logger.warning("Worker %d exited with code %s, restarting", proc.pid, proc.returncode)
+                if time.monotonic() - self._started.pop(proc.pid, 0) < _MIN_UPTIME:
+                    time.sleep(_RESTART_DELAY)
+                self._procs[i] = self._spawn(sock, i)
+
+        logger.info("Stopping %d workers", len(self._procs) + len(self._retiring))
+        for proc in self._procs + self._retiring:
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGTERM)
+        for proc in self._procs + self._retiring:
+            proc.wait()
+        sock.close()
+        if self._callback_sock is not None:
+            self._callback_sock.close()
+        return 0
+
+
+def worker_command(script: str) -> list[str]:
+    """Command line that starts one worker of ``script``"""
+    return [sys.executable, script, 'worker']
@@ -0,0 +1,71 @@
+"""
+Post a sample ConnectWise callback to the MCP server's callback receiver
+
+Usage:
+    python send_callback.py --type ticket --id 12345
+    python send_callback.py --type company --id 250 --action deleted --tenant acme
+    python send_callback.py --url http://localhost:8090/callback --key secret --type configuration --id 77
+"""
+import sys
+import json
+import argparse
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+
+def build_payload(kind: str, record_id: int, action: str) -> dict:
+    """A callback body shaped like the ones ConnectWise sends"""
+    entity = {
+        "id": record_id,
+        "_info": {"lastUpdated": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')},
+    }
+    return {
+        "MessageId": f"sample-{kind}-{record_id}",
+        "FromUrl": "https://na.myconnectwise.net",
+        "CompanyId": "sample",
+        "MemberId": "admin",
+        "Action": action,
+        "Type": kind,
+        "ID": record_id,
+        "ProductInstanceId": None,
+        "PartnerId": None,
+        "Entity": json.dumps(entity),
+        "Metadata": {"key_url": None},
+        "CallbackObjectRecId": 1,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Send a sample ConnectWise callback")
+    parser.add_argument("--url", default="http://localhost:8090/callback", help="Callback receiver URL")
+    parser.add_argument("--tenant", help="Tenant to address (appended to the URL)")
+    parser.add_argument("--key", help="Callback secret (CW_CALLBACK_SECRET)")
+    parser.add_argument("--type", default="ticket", help="Record type, e.g. ticket, company, contact, configuration")
+    parser.add_argument("--id", type=int, required=True, help="Record ID")
+    parser.add_argument("--action", default="updated", choices=["added", "updated", "deleted"])
+    args = parser.parse_args()
+
+    url = args.url.rstrip('/')
+    if args.tenant:
+        url += f"/{quote(args.tenant)}"
+    if args.key:
+        url += f"?key={quote(args.key)}"
+
+    body = json.dumps(build_payload(args.type, args.id, args.action)).encode('utf-8')
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            print(response.status, response.read().decode('utf-8'))
+            return 0
+    except urllib.error.HTTPError as e:
+        print(e.code, e.read().decode('utf-8'))
+        return 1
+    except urllib.error.URLError as e:
+        print(f"Could not reach {url}: {e.reason}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
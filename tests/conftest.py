@@ -0,0 +1,33 @@
+"""
+Shared test setup: import the flat modules from the repository root, and give
+connectwise_mcp the configuration it reads at import time without touching the
+filesystem or a real ConnectWise tenant.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('CW_COMPANY_ID', 'test')
+os.environ.setdefault('CW_PUBLIC_KEY', 'test')
+os.environ.setdefault('CW_PRIVATE_KEY', 'test')
+os.environ['CW_SHARED_STATE_PATH'] = ':memory:'
+os.environ['CW_DISK_CACHE_PATH'] = ''
+os.environ['CW_CASSETTE_MODE'] = ''
+os.environ['LOG_LEVEL'] = 'ERROR'
+
+
+class FakeClock:
+    """Stand-in for a module's ``time`` import, advanced by hand"""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
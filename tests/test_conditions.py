@@ -0,0 +1,102 @@
+import pytest
+
+from connectwise_conditions import (
+    ConditionsError,
+    apply_query,
+    canonicalize_conditions,
+    compile_conditions,
+    entity_for_endpoint,
+)
+
+
+@pytest.mark.parametrize("text, canonical", [
+    ('status/name="New"', 'status/name = "New"'),
+    ('status/name = "New" AND  priority/id>2', 'status/name = "New" and priority/id > 2'),
+    ('(a=1 or b=2) and c=3', '(a = 1 or b = 2) and c = 3'),
+    ('a=1 and (b=2 and c=3)', 'a = 1 and b = 2 and c = 3'),
+    ('id in (1,2, 3)', 'id in (1,2,3)'),
+    ('name NOT LIKE "a%"', 'name not like "a%"'),
+    ('closedFlag = false', 'closedFlag = false'),
+    ('owner = null', 'owner = null'),
+    ('lastUpdated > [2024-01-01]', 'lastUpdated > [2024-01-01]'),
+    ('lastUpdated > [2024-01-01T10:00:00+02:00]', 'lastUpdated > [2024-01-01T08:00:00Z]'),
+    ('lastUpdated > [2024-01-01T10:00:00.500Z]', 'lastUpdated > [2024-01-01T10:00:00.500Z]'),
+    ('lastUpdated > [2024-01-01T10:00:00.5Z]', 'lastUpdated > [2024-01-01T10:00:00.500Z]'),
+    ('lastUpdated > [2024-01-01T10:00:00.123456Z]', 'lastUpdated > [2024-01-01T10:00:00.123456Z]'),
+])
+def test_canonical_form(text, canonical):
+    assert canonicalize_conditions(text) == canonical
+    # The canonical form is a fixed point
+    assert canonicalize_conditions(canonical) == canonical
+
+
+@pytest.mark.parametrize("text, message, position", [
+    ('status = New', 'must be enclosed in double quotes', 9),
+    ('a = "x', 'Unterminated string', 4),
+    ('a ==  1', "Expected a value but found '='", 3),
+    ('a = 1 and', 'Expected a field name but found end of conditions', 9),
+    ('lastUpdated > [yesterday]', 'Invalid date literal', 14),
+    ('', 'empty', None),
+])
+def test_malformed_conditions(text, message, position):
+    with pytest.raises(ConditionsError) as error:
+        canonicalize_conditions(text)
+    assert message in str(error.value)
+    assert error.value.position == position
+
+
+def test_field_check_suggests_the_closest_field():
+    with pytest.raises(ConditionsError, match=r"Unknown field 'stauts' for service/tickets \(did you mean 'status'\?\)"):
+        canonicalize_conditions('stauts/name = "New"', 'service/tickets')
+
+
+def test_field_check_normalizes_casing():
+    assert canonicalize_conditions('STATUS/name = "x"', 'service/tickets') == 'status/name = "x"'
+    assert canonicalize_conditions('parentTicket/id = 5', 'service/tickets') == 'parentTicket/id = 5'
+
+
+def test_entity_for_endpoint():
+    assert entity_for_endpoint('/service/boards/7/statuses') == 'service/boards/{id}/statuses'
+    assert entity_for_endpoint('service/tickets') == 'service/tickets'
+
+
+RECORDS = [
+    {"id": 1, "summary": "Printer jam", "status": {"name": "New"}, "tags": [{"name": "a"}, {"name": "b"}],
+     "_info": {"lastUpdated": "2024-01-03T00:00:00Z"}},
+    {"id": 2, "summary": "printer fire", "status": {"name": "Closed"}, "owner": None,
+     "_info": {"lastUpdated": "2024-01-02T00:00:00Z"}},
+    {"id": 3, "summary": "Email", "status": {"name": "new"},
+     "_info": {"lastUpdated": "2024-01-01T00:00:00Z"}},
+]
+
+
+@pytest.mark.parametrize("text, ids", [
+    ('summary like "printer%"', [1, 2]),
+    ('status/name = "NEW"', [1, 3]),
+    ('summary contains "FIRE"', [2]),
+    ('lastUpdated > [2024-01-01T12:00:00Z]', [1, 2]),
+    ('tags/name = "b"', [1]),
+    ('id in (1,3)', [1, 3]),
+    ('id not in (1,3)', [2]),
+    ('id > 1 and status/name != "closed"', [3]),
+    ('id > 2 or status/name = "Closed"', [2, 3]),
+    ('owner = null', [1, 2, 3]),
+    ('owner != null', []),
+])
+def test_local_evaluation(text, ids):
+    match = compile_conditions(text)
+    assert [r["id"] for r in RECORDS if match(r)] == ids
+
+
+def test_apply_query_orders_through_info_fields():
+    assert [r["id"] for r in apply_query(RECORDS, order_by='lastUpdated desc')] == [1, 2, 3]
+    assert [r["id"] for r in apply_query(RECORDS, order_by='lastUpdated asc')] == [3, 2, 1]
+
+
+def test_apply_query_sorts_case_insensitively_by_each_key_in_turn():
+    assert [r["id"] for r in apply_query(RECORDS, order_by='status/name asc, id desc')] == [2, 3, 1]
+
+
+def test_apply_query_pages():
+    assert [r["id"] for r in apply_query(RECORDS, 'id > 0', None, page=2, page_size=2)] == [3]
+    assert apply_query(RECORDS, 'id > 5') == []
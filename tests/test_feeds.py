@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from connectwise_feeds import Feed, FeedError, FeedHub, parse_feed_uri
+
+
+class Session:
+    """Stands in for an MCP server session, which the feeds hold weakly"""
+
+
+def ticket(record_id, updated, status="New"):
+    return {"id": record_id, "status": {"name": status}, "_info": {"lastUpdated": updated}}
+
+
+def test_parse_feed_uri():
+    assert parse_feed_uri('connectwise://feeds/tickets', 'default') == ('default', 'service/tickets', None)
+    assert parse_feed_uri('connectwise://feeds/tickets?conditions=id%3E5&tenant=acme', 'default') == (
+        'acme', 'service/tickets', 'id>5'
+    )
+    for uri in ('connectwise://feeds/nope', 'https://feeds/tickets'):
+        with pytest.raises(FeedError):
+            parse_feed_uri(uri, 'default')
+
+
+def test_feed_deltas_per_session():
+    feed = Feed('connectwise://feeds/tickets', 'default', 'service/tickets', 'status/name = "New"')
+    first, second = Session(), Session()
+    feed.apply([ticket(1, 'T1'), ticket(2, 'T1'), ticket(3, 'T1', 'Closed')])
+    assert feed.read(first)["full"] is True
+    assert sorted(r["id"] for r in feed.read(first)["changed"]) == []
+
+    # A record that stops matching is reported as removed
+    assert feed.apply([ticket(2, 'T2', 'Closed'), ticket(4, 'T2')]) is True
+    delta = feed.read(first)
+    assert (delta["full"], [r["id"] for r in delta["changed"]], delta["removed"]) == (False, [4], [2])
+    # A session reading for the first time gets the whole current result
+    assert sorted(r["id"] for r in feed.read(second)["changed"]) == [1, 4]
+
+
+def test_unchanged_records_are_not_reported_again():
+    feed = Feed('connectwise://feeds/tickets', 'default', 'service/tickets', None)
+    session = Session()
+    feed.apply([ticket(1, 'T1')])
+    feed.read(session)
+    assert feed.apply([ticket(1, 'T1')]) is False
+    assert feed.read(session)["changed"] == []
+
+
+def test_log_is_pruned_once_every_session_has_read_it():
+    feed = Feed('connectwise://feeds/tickets', 'default', 'service/tickets', None)
+    session = Session()
+    feed.read(session)
+    feed.apply([ticket(1, 'T1'), ticket(2, 'T1')])
+    assert len(feed.log) == 2
+    feed.read(session)
+    assert feed.log == {}
+
+
+class FakeUpstream:
+    """A fetch function over an in-memory ticket list, honouring the FeedHub's queries"""
+
+    def __init__(self, records):
+        self.records = records
+        self.notified = []
+
+    async def fetch(self, tenant, endpoint, params):
+        records = sorted(self.records, key=lambda r: (r["_info"]["lastUpdated"], r["id"]))
+        conditions = params.get("conditions", "")
+        if conditions.startswith("lastUpdated >= ["):
+            mark = conditions[len("lastUpdated >= ["):-1]
+            records = [r for r in records if r["_info"]["lastUpdated"] >= mark]
+        if params.get("orderBy") == "lastUpdated desc":
+            records = records[::-1]
+        elif params.get("orderBy") == "id asc":
+            records = sorted(records, key=lambda r: r["id"])
+        page, size = params.get("page", 1), params["pageSize"]
+        return records[(page - 1) * size:page * size]
+
+    async def notify(self, session, uri):
+        self.notified.append((session, uri))
+
+
+def test_poll_picks_up_changes_after_the_watermark():
+    upstream = FakeUpstream([ticket(1, '2024-01-01T00:00:00Z'), ticket(2, '2024-01-01T00:00:05Z')])
+    hub = FeedHub(upstream.fetch, upstream.notify, 'default', interval=3600)
+    uri = 'connectwise://feeds/tickets?conditions=status/name = "New"'
+    session = Session()
+
+    async def run():
+        await hub.subscribe(uri, session)
+        assert sorted(r["id"] for r in (await hub.read(uri, session))["changed"]) == [1, 2]
+
+        # The first poll re-reads the watermark second, but the feed sees nothing changed
+        assert await hub.poll('default', 'service/tickets') == 1
+        assert upstream.notified == []
+        # After that the records at the watermark second are not fetched again
+        assert await hub.poll('default', 'service/tickets') == 0
+
+        upstream.records[0] = ticket(1, '2024-01-01T00:00:09Z', 'Closed')
+        upstream.records.append(ticket(3, '2024-01-01T00:00:09Z'))
+        assert await hub.poll('default', 'service/tickets') == 2
+        delta = await hub.read(uri, session)
+        assert ([r["id"] for r in delta["changed"]], delta["removed"]) == ([3], [1])
+        assert upstream.notified == [(session, uri)]
+
+        # A change within the same second as the watermark is still seen
+        upstream.records.append(ticket(4, '2024-01-01T00:00:09Z'))
+        assert await hub.poll('default', 'service/tickets') == 1
+        await hub.close()
+
+    asyncio.run(run())
+
+
+def test_failed_load_leaves_nothing_behind():
+    upstream = FakeUpstream([ticket(i, '2024-01-01T00:00:00Z') for i in range(1, 6)])
+    hub = FeedHub(upstream.fetch, upstream.notify, 'default', interval=3600, max_records=3)
+
+    async def run():
+        with pytest.raises(FeedError, match="more than 3 records"):
+            await hub.feed('connectwise://feeds/tickets')
+        assert (hub.feeds, hub.watermarks, hub._locks) == ({}, {}, {})
+    asyncio.run(run())
+
+
+def test_unsubscribed_feeds_are_dropped():
+    upstream = FakeUpstream([ticket(1, '2024-01-01T00:00:00Z')])
+    hub = FeedHub(upstream.fetch, upstream.notify, 'default', interval=0.01)
+    session = Session()
+
+    async def run():
+        await hub.subscribe('connectwise://feeds/tickets', session)
+        await hub.unsubscribe('connectwise://feeds/tickets', session)
+        await asyncio.sleep(0.05)
+        assert hub.stats()["feeds"] == 0 and hub.watermarks == {}
+        await hub.close()
+    asyncio.run(run())
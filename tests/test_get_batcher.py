@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from connectwise_mcp import PRIORITY_INTERACTIVE, ClientMetrics, GetBatcher
+
+
+class FakeClient:
+    """The parts of ConnectWiseClient a GetBatcher uses, serving ids 1-9"""
+
+    def __init__(self):
+        self.requests = []
+        self.metrics = ClientMetrics()
+        self._background = set()
+
+    async def _fetch(self, endpoint, params, priority):
+        self.requests.append((endpoint, params))
+        if params is None:
+            record_id = int(endpoint.rpartition('/')[2])
+            if record_id > 9:
+                raise LookupError(f"{endpoint} not found")
+            return {"id": record_id}
+        ids = [int(i) for i in params["conditions"][len("id in ("):-1].split(',')]
+        return [{"id": i} for i in ids if i <= 9]
+
+
+def load_all(batcher, ids):
+    async def run():
+        return await asyncio.gather(
+            *(batcher.load('service/tickets', i, PRIORITY_INTERACTIVE) for i in ids), return_exceptions=True
+        )
+    return asyncio.run(run())
+
+
+def test_concurrent_gets_become_one_list_request():
+    client = FakeClient()
+    results = load_all(GetBatcher(client, window=0.01, max_size=50), [3, 1, 2, 1])
+    assert results == [{"id": 3}, {"id": 1}, {"id": 2}, {"id": 1}]
+    assert client.requests == [('service/tickets', {"conditions": "id in (1,2,3)", "pageSize": 3})]
+    assert (client.metrics.batches, client.metrics.batched_gets) == (1, 3)
+
+
+def test_ids_missing_from_the_list_are_fetched_singly():
+    client = FakeClient()
+    results = load_all(GetBatcher(client, window=0.01, max_size=50), [1, 12])
+    assert results[0] == {"id": 1}
+    assert isinstance(results[1], LookupError)
+    assert client.requests[-1] == ('service/tickets/12', None)
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    client = FakeClient()
+    batcher = GetBatcher(client, window=60, max_size=2)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(
+            batcher.load('service/tickets', 1, PRIORITY_INTERACTIVE),
+            batcher.load('service/tickets', 2, PRIORITY_INTERACTIVE),
+        ), timeout=5)
+    assert asyncio.run(run()) == [{"id": 1}, {"id": 2}]
+
+
+@pytest.mark.parametrize("endpoint, params, expected", [
+    ('service/tickets/12', None, ('service/tickets', 12)),
+    ('/company/companies/250', None, ('company/companies', 250)),
+    ('service/tickets/12', {"fields": "id"}, None),
+    ('service/tickets/12/notes', None, None),
+    ('time/entries/5', None, None),
+])
+def test_split(endpoint, params, expected):
+    assert GetBatcher(FakeClient(), window=0.01, max_size=50).split(endpoint, params) == expected
+
+
+def test_disabled_without_a_window():
+    assert GetBatcher(FakeClient(), window=0, max_size=50).split('service/tickets/12', None) is None
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from connectwise_mcp import JSONArrayParser
+
+RECORDS = [
+    {"id": 1, "summary": "Café ☕ printer", "nested": [1, 2, {"a": None}]},
+    -1500.25,
+    1e-7,
+    -0,
+    True,
+    None,
+    "x,y]",
+    [],
+    {},
+]
+BODY = json.dumps(RECORDS, ensure_ascii=False).encode('utf-8')
+
+
+def parse(chunks: list[bytes]) -> list:
+    parser = JSONArrayParser()
+    items = []
+    for i, chunk in enumerate(chunks):
+        items += parser.feed(chunk, final=i == len(chunks) - 1)
+    return items
+
+
+@pytest.mark.parametrize("split", range(len(BODY) + 1))
+def test_any_split_point_gives_the_same_records(split):
+    assert parse([BODY[:split], BODY[split:]]) == RECORDS
+
+
+def test_byte_at_a_time():
+    assert parse([BODY[i:i + 1] for i in range(len(BODY))] + [b'']) == RECORDS
+
+
+def test_elements_are_returned_as_soon_as_they_are_complete():
+    parser = JSONArrayParser()
+    assert parser.feed(b'[{"id": 1}, {"id"') == [{"id": 1}]
+    assert parser.feed(b': 2}, ') == [{"id": 2}]
+    assert parser.feed(b'{"id": 3}]', final=True) == [{"id": 3}]
+
+
+@pytest.mark.parametrize("head, tail, expected", [
+    (b'[ -1500.', b'0, 2]', [-1500.0, 2]),
+    (b'[1', b'e3]', [1000.0]),
+    (b'[1e', b'-2]', [0.01]),
+    (b'[-', b'7]', [-7]),
+    (b'[12', b'34]', [1234]),
+])
+def test_numbers_split_mid_token_are_held_back(head, tail, expected):
+    assert parse([head, tail]) == expected
+
+
+def test_trailing_number_is_released_on_final():
+    parser = JSONArrayParser()
+    assert parser.feed(b'[1, 23') == [1]
+    assert parser.feed(b'4]', final=True) == [234]
+
+
+@pytest.mark.parametrize("chunks", [
+    [b' [ ', b' ] \n'],
+    [b'[]'],
+    [b'[', b']', b''],
+])
+def test_empty_array(chunks):
+    assert parse(chunks) == []
+
+
+@pytest.mark.parametrize("body", [
+    b'[1 2]',
+    b'[1,,2]',
+    b'[,1]',
+    b'[1,]',
+    b'[1]x',
+    b'[1][2]',
+    b'{"id": 1}',
+    b'[1, 2',
+    b'[{"id": 1',
+    b'',
+])
+def test_malformed_bodies_are_rejected(body):
+    with pytest.raises(ValueError):
+        parse([body])
+
+
+def test_data_after_the_array_in_a_later_chunk_is_rejected():
+    parser = JSONArrayParser()
+    assert parser.feed(b'[1]') == [1]
+    with pytest.raises(ValueError):
+        parser.feed(b' 2', final=True)
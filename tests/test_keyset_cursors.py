@@ -0,0 +1,76 @@
+import asyncio
+
+from connectwise_diskcache import DiskCache
+from connectwise_mcp import KeysetCursors
+
+
+def page(*ids):
+    return [{"id": i} for i in ids]
+
+
+def test_walk_only_for_id_ordered_lists():
+    key, number, descending = KeysetCursors.walk('service/tickets', {"page": 3, "pageSize": 100})
+    assert (number, descending) == (3, False)
+    assert KeysetCursors.walk('service/tickets', {"page": 3, "pageSize": 100, "orderBy": "id  ASC"})[0] == key
+    assert KeysetCursors.walk('service/tickets', {"orderBy": "id desc"})[2] is True
+    assert KeysetCursors.walk('service/tickets', {"orderBy": "summary"}) is None
+    assert KeysetCursors.walk('service/tickets/5', None) is None
+    assert KeysetCursors.walk('service/tickets/count', None) is None
+
+
+def test_seek_params():
+    params = {"conditions": 'status/name = "New"', "page": 4, "pageSize": 50}
+    assert KeysetCursors.seek_params(params, 120, False) == {
+        "conditions": '(status/name = "New") and id > 120', "orderBy": "id asc", "page": 1, "pageSize": 50,
+    }
+    assert KeysetCursors.seek_params({"page": 2}, 120, True)["conditions"] == "id < 120"
+
+
+def test_next_page_seeks_from_the_previous_one():
+    async def run():
+        cursors = KeysetCursors(ttl=60)
+        params = {"pageSize": 3}
+        first = KeysetCursors.walk('service/tickets', {**params, "page": 1})
+        second = KeysetCursors.walk('service/tickets', {**params, "page": 2})
+        assert await cursors.seek(second) is None
+        await cursors.record(first, page(1, 2, 5))
+        assert await cursors.seek(second) == 5
+    asyncio.run(run())
+
+
+def test_pages_out_of_id_order_are_not_recorded():
+    async def run():
+        cursors = KeysetCursors(ttl=60)
+        first = KeysetCursors.walk('service/tickets', {"page": 1})
+        await cursors.record(first, page(1, 7, 5))
+        assert await cursors.seek(KeysetCursors.walk('service/tickets', {"page": 2})) is None
+    asyncio.run(run())
+
+
+def test_a_changed_page_drops_the_cursors_after_it():
+    async def run():
+        cursors = KeysetCursors(ttl=60)
+        walk = {n: KeysetCursors.walk('service/tickets', {"page": n}) for n in (1, 2, 3)}
+        await cursors.record(walk[1], page(1, 2, 3))
+        await cursors.record(walk[2], page(4, 5, 6))
+        assert await cursors.seek(walk[3]) == 6
+        # Page 1 ends somewhere new, so page 2's cursor no longer fits the walk
+        await cursors.record(walk[1], page(1, 2, 4))
+        assert await cursors.seek(walk[2]) == 4
+        assert await cursors.seek(walk[3]) is None
+    asyncio.run(run())
+
+
+def test_cursors_are_shared_through_the_disk_cache(tmp_path):
+    async def run():
+        disk = DiskCache(str(tmp_path / "cache.sqlite"), 10 * 1024 * 1024, 60)
+        try:
+            walk = KeysetCursors.walk('service/tickets', {"page": 1})
+            await KeysetCursors(60, disk, 'acme').record(walk, page(1, 2, 3))
+            other_process = KeysetCursors(60, disk, 'acme')
+            assert await other_process.seek(KeysetCursors.walk('service/tickets', {"page": 2})) == 3
+            other_tenant = KeysetCursors(60, disk, 'globex')
+            assert await other_tenant.seek(KeysetCursors.walk('service/tickets', {"page": 2})) is None
+        finally:
+            disk.close()
+    asyncio.run(run())
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from connectwise_mcp import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NORMAL,
+    RequestScheduler,
+)
+
+
+async def grant_order(scheduler: RequestScheduler, requests: list[str]) -> list[str]:
+    """Queue ``requests`` behind a held slot, release it and return the order slots were granted in"""
+    order = []
+    release = asyncio.Event()
+
+    async def blocker():
+        async with scheduler.slot(PRIORITY_NORMAL):
+            await release.wait()
+
+    async def request(priority):
+        async with scheduler.slot(priority):
+            order.append(priority)
+            await asyncio.sleep(0)
+
+    holder = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(request(p)) for p in requests]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    return order
+
+
+def test_slots_are_granted_immediately_while_free():
+    async def run():
+        scheduler = RequestScheduler(2)
+        async with scheduler.slot(PRIORITY_BULK):
+            async with scheduler.slot(PRIORITY_BULK):
+                assert scheduler.active == 2
+        assert scheduler.active == 0
+    asyncio.run(run())
+
+
+def test_interactive_goes_first():
+    order = asyncio.run(grant_order(RequestScheduler(1), [PRIORITY_BULK] * 3 + [PRIORITY_NORMAL] * 3 + [PRIORITY_INTERACTIVE]))
+    assert order[0] == PRIORITY_INTERACTIVE
+
+
+def test_backlogged_classes_share_slots_by_weight():
+    order = asyncio.run(grant_order(
+        RequestScheduler(1), [PRIORITY_BULK] * 20 + [PRIORITY_NORMAL] * 40 + [PRIORITY_BACKGROUND] * 10
+    ))
+    # Weights 8:2:1, so each window of 11 grants holds 8 normal, 2 bulk and 1 background
+    window = order[:22]
+    assert window.count(PRIORITY_NORMAL) == 16
+    assert window.count(PRIORITY_BULK) == 4
+    assert window.count(PRIORITY_BACKGROUND) == 2
+    assert len(order) == 70
+
+
+def test_bulk_is_not_starved():
+    order = asyncio.run(grant_order(RequestScheduler(1), [PRIORITY_NORMAL] * 50 + [PRIORITY_BULK]))
+    assert order.index(PRIORITY_BULK) < 10
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def run():
+        scheduler = RequestScheduler(1)
+        async with scheduler.slot(PRIORITY_NORMAL):
+            waiter = asyncio.create_task(scheduler.slot(PRIORITY_BULK).__aenter__())
+            await asyncio.sleep(0)
+            assert scheduler.stats()[PRIORITY_BULK]["queued"] == 1
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            assert scheduler.stats()[PRIORITY_BULK]["queued"] == 0
+        assert scheduler.active == 0
+    asyncio.run(run())
+
+
+def test_unknown_priority():
+    async def run():
+        async with RequestScheduler(1).slot('urgent'):
+            pass
+    with pytest.raises(ValueError):
+        asyncio.run(run())
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+import connectwise_budgets
+import connectwise_workers
+from conftest import FakeClock
+from connectwise_budgets import CallerBudgets, Quota, QuotaError
+from connectwise_workers import InvalidationLog, SharedRateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(connectwise_budgets, 'time', clock)
+    monkeypatch.setattr(connectwise_workers, 'time', clock)
+    return clock
+
+
+def test_quota_from_dict_fills_in_the_defaults():
+    base = Quota(requests_per_minute=10, mb_per_hour=5)
+    assert Quota.from_dict({"requests_per_hour": 100}, base) == Quota(10, 100, 5)
+    assert Quota().unlimited and not base.unlimited
+    with pytest.raises(QuotaError):
+        Quota.from_dict({"requests_per_day": 1})
+
+
+def test_requests_per_minute_window_slides(clock):
+    budgets = CallerBudgets(':memory:', Quota(requests_per_minute=3))
+    budgets.record('alice', calls=1, requests=2)
+    clock.advance(30)
+    budgets.record('alice', calls=1, requests=1)
+    verdict = budgets.check('alice')
+    assert verdict is not None and "3 upstream requests per minute" in verdict.reason
+    # The first two requests leave the window 60s after they were made
+    assert verdict.retry_after == pytest.approx(31)
+    clock.advance(29)
+    assert budgets.check('alice') is not None
+    clock.advance(1)
+    assert budgets.check('alice') is None
+
+
+def test_callers_are_counted_separately(clock):
+    budgets = CallerBudgets(':memory:', Quota(requests_per_minute=2), {"vip": Quota()})
+    budgets.record('alice', requests=2)
+    budgets.record('vip', requests=50)
+    assert budgets.check('alice') is not None
+    assert budgets.check('bob') is None
+    assert budgets.check('vip') is None
+
+
+def test_megabytes_per_hour(clock):
+    budgets = CallerBudgets(':memory:', Quota(mb_per_hour=1))
+    budgets.record('alice', size=512 * 1024)
+    assert budgets.check('alice') is None
+    clock.advance(600)
+    budgets.record('alice', size=512 * 1024)
+    verdict = budgets.check('alice')
+    assert verdict is not None and "MB per hour" in verdict.reason
+    clock.advance(2999)
+    assert budgets.check('alice') is not None
+    clock.advance(1)
+    assert budgets.check('alice') is None
+
+
+def test_usage_is_shared_through_the_file(clock, tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    first, second = CallerBudgets(path, Quota(requests_per_hour=4)), CallerBudgets(path, Quota(requests_per_hour=4))
+    try:
+        first.record('alice', calls=1, requests=2)
+        second.record('alice', calls=1, requests=2, size=100)
+        assert first.check('alice') is not None
+        assert second.top() == [{
+            "caller": "alice", "calls": 2, "rejected": 0, "requests": 4, "bytes": 100,
+            "quota": {"requests_per_hour": 4},
+        }]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_top_orders_by_requests(clock):
+    budgets = CallerBudgets(':memory:', Quota())
+    budgets.record('a', requests=1)
+    budgets.record('b', requests=5)
+    budgets.record('c', requests=3, rejected=1)
+    assert [row["caller"] for row in budgets.top(limit=2)] == ['b', 'c']
+
+
+def test_shared_rate_limiter_bucket_spans_instances(clock, tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    first = SharedRateLimiter(path, 'acme', rate=10, burst=2)
+    second = SharedRateLimiter(path, 'acme', rate=10, burst=2)
+    other_tenant = SharedRateLimiter(path, 'globex', rate=10, burst=2)
+    assert first._reserve() == 0
+    assert second._reserve() == 0
+    # The burst is spent, so later reservations queue behind each other across instances
+    assert first._reserve() == pytest.approx(0.1)
+    assert second._reserve() == pytest.approx(0.2)
+    assert other_tenant._reserve() == 0
+    clock.advance(10)
+    assert first._reserve() == 0
+
+
+def test_shared_rate_limiter_unlimited(tmp_path):
+    limiter = SharedRateLimiter(str(tmp_path / "state.sqlite"), 'acme', rate=0)
+    assert asyncio.run(limiter.acquire()) == 0.0
+
+
+def test_invalidation_log(clock, tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    writer, reader = InvalidationLog(path, retention=60), InvalidationLog(path, retention=60)
+    try:
+        start = reader.latest()
+        writer.append('acme', 'service/tickets', 5, 'updated')
+        writer.append('acme', 'company/companies', 7, 'deleted')
+        entries = reader.since(start)
+        assert [entry[1:] for entry in entries] == [
+            ('acme', 'service/tickets', 5, 'updated'),
+            ('acme', 'company/companies', 7, 'deleted'),
+        ]
+        assert reader.since(entries[-1][0]) == []
+        # Entries past the retention are dropped on the next append
+        clock.advance(61)
+        writer.append('acme', 'service/tickets', 6, 'updated')
+        assert [entry[3] for entry in reader.since(0)] == [6]
+    finally:
+        writer.close()
+        reader.close()